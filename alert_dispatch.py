@@ -0,0 +1,140 @@
+import json
+import queue
+import logging
+import threading
+from datetime import datetime
+
+# 경보(alert)를 감시 루프에서 직접 처리하지 않고 큐에 넣기만 하면,
+# 전용 디스패처 스레드가 꺼내서 등록된 싱크(sink)들로 보냅니다.
+#  - PopupSink   : 기존 MessageBox 팝업 (팝업마다 별도 스레드라 확인 버튼을 누르지 않아도 감시는 계속됨)
+#  - FileSink    : heating_alert.log 에 한 줄씩 추가
+#  - WebhookSink : 로컬 HTTP/웹훅 주소로 JSON POST
+#  - MemorySink  : 메모리에 쌓아 두기 (테스트용)
+
+
+class Alert:
+    def __init__(self, tool, reason, trigger_time=None, fired_at=None, detail=""):
+        self.tool = tool
+        self.reason = reason
+        self.trigger_time = trigger_time
+        self.fired_at = fired_at or datetime.now()
+        self.detail = detail
+
+    def to_dict(self):
+        return {
+            "tool": self.tool,
+            "reason": self.reason,
+            "trigger_time": self.trigger_time.isoformat() if self.trigger_time else None,
+            "fired_at": self.fired_at.isoformat(),
+            "detail": self.detail,
+        }
+
+    def __repr__(self):
+        return f"Alert({self.tool!r}, {self.reason!r}, fired_at={self.fired_at})"
+
+
+class PopupSink:
+    name = "popup"
+
+    def __init__(self, show_popup):
+        self.show_popup = show_popup
+
+    def send(self, alert):
+        threading.Thread(target=self.show_popup, args=(alert.tool,), name="AlertPopup", daemon=True).start()
+
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alert):
+        line = (f"{alert.fired_at.strftime('%Y-%m-%d %H:%M:%S')}\t{alert.tool}\t{alert.reason}"
+                f"\t{alert.trigger_time or ''}\t{alert.detail}\n")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class WebhookSink:
+    name = "webhook"
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        import urllib.request
+
+        body = json.dumps(alert.to_dict(), ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class MemorySink:
+    name = "memory"
+
+    def __init__(self):
+        self.alerts = []
+        self.received = threading.Event()
+
+    def send(self, alert):
+        self.alerts.append(alert)
+        self.received.set()
+
+
+class AlertDispatcher:
+    """Queue of alerts drained by one daemon thread that fans out to the sinks."""
+
+    _STOP = object()
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+        self.queue = queue.Queue()
+        self.sent = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="AlertDispatcher", daemon=True)
+        self._thread.start()
+
+    def dispatch(self, alert):
+        # 감시 루프는 큐에 넣기만 하고 바로 돌아갑니다.
+        self.queue.put(alert)
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            if alert is self._STOP:
+                return
+            for sink in self.sinks:
+                try:
+                    sink.send(alert)
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.error(f"[ALERT] Failed to deliver alert through '{sink.name}' sink: {e}")
+
+    def close(self, timeout=5):
+        self.queue.put(self._STOP)
+        self._thread.join(timeout)
+
+
+def create_sinks(settings, show_popup, default_log_path):
+    """Build sinks from settings["alert_sinks"] (default: popup + file)."""
+    sinks = []
+    for name in settings.get("alert_sinks", ["popup", "file"]):
+        if name == "popup":
+            sinks.append(PopupSink(show_popup))
+        elif name == "file":
+            sinks.append(FileSink(settings.get("alert_log_file") or default_log_path))
+        elif name == "webhook":
+            url = settings.get("alert_webhook_url")
+            if not url:
+                logging.error("[CONFIG] 'webhook' alert sink needs alert_webhook_url → sink skipped.")
+                continue
+            sinks.append(WebhookSink(url, settings.get("alert_webhook_timeout", 5)))
+        elif name == "memory":
+            sinks.append(MemorySink())
+        else:
+            logging.error(f"[CONFIG] Unknown alert sink '{name}' → sink skipped.")
+    return sinks
@@ -0,0 +1,263 @@
+import os
+import csv
+import sys
+import time
+import logging
+import argparse
+import statistics
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from log_rules import TIMESTAMP_EXTRACTORS
+from log_tail import read_tail_bytes
+
+# 보관해 둔 몇 달치 CSV / 변환 로그로 threshold × interval_minutes 조합을 한꺼번에 돌려 보고
+# 조합별 경보 횟수와 감지 지연(트리거 → 경보) 표를 만듭니다. replay.py 의 재생기를 그대로 씁니다.
+#
+# 보관 폴더 구조 (장비별 하위 폴더, 파일 이름은 자유):
+#   archive/FIB-01/*.csv   archive/FIB-01/*.txt
+#   archive/FIB-02/*.csv   archive/FIB-02/*.txt
+# 하위 폴더 없이 파일만 있으면 장비 하나("default")로 봅니다.
+#
+#   python backtest.py archive --thresholds 2,3,4,5 --timeouts 30,60,90 --jobs 8 --output sweep.csv
+#
+# 작업은 (장비, 날짜) 단위로 나눠 프로세스 풀에서 처리합니다. 같은 파일들을 쓰는 연속된 날짜는
+# 한 작업으로 묶되, 장비마다 적어도 --jobs 개의 작업이 나오도록 작업당 날짜 수를 제한합니다
+# (MAX_JOB_DAYS 이하). 각 작업은 큰 파일에서 자기 날짜 구간만 이분 탐색으로 찾아 읽습니다.
+# 날짜마다 상태를 새로 시작하므로, 자정을 넘긴 LOG 모드는 그 트리거가 속한 날짜에서만 집계됩니다.
+
+CSV_SUFFIXES = (".csv",)
+CONVERTED_SUFFIXES = (".txt",)
+HEAD_SCAN_BYTES = 64 * 1024
+MAX_JOB_DAYS = 7
+
+
+def _first_timestamp(lines, extract):
+    for line in lines:
+        try:
+            return extract(line)
+        except ValueError:
+            continue
+    return None
+
+
+def file_time_range(path, timestamp):
+    """Return (first, last) timestamps of a log file by reading only its head and tail."""
+    extract = TIMESTAMP_EXTRACTORS[timestamp]
+    with open(path, "rb") as f:
+        head = f.read(HEAD_SCAN_BYTES).decode("utf-8", errors="ignore").splitlines()
+        size = os.fstat(f.fileno()).st_size
+        _, tail = read_tail_bytes(f, size, max_lines=200, max_bytes=HEAD_SCAN_BYTES)
+    tail = tail.decode("utf-8", errors="ignore").splitlines()
+    first = _first_timestamp(head, extract)
+    last = _first_timestamp(reversed(tail), extract) or first
+    return first, last
+
+
+def scan_archive(archive_dir):
+    """Return {tool: {"csv": [(path, first, last)], "converted": [...]}}."""
+    tool_dirs = {}
+    for entry in sorted(os.scandir(archive_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            tool_dirs[entry.name] = entry.path
+    if not tool_dirs:
+        tool_dirs["default"] = archive_dir
+
+    archive = {}
+    for tool, directory in tool_dirs.items():
+        files = {"csv": [], "converted": []}
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                lower = name.lower()
+                if lower.endswith(CSV_SUFFIXES):
+                    kind, timestamp = "csv", "csv_field"
+                elif lower.endswith(CONVERTED_SUFFIXES):
+                    kind, timestamp = "converted", "dash"
+                else:
+                    continue
+                try:
+                    first, last = file_time_range(path, timestamp)
+                except OSError as e:
+                    logging.warning(f"[BACKTEST] Skipping unreadable file {path}: {e}")
+                    continue
+                if first is None:
+                    continue
+                files[kind].append((path, first, last))
+        if files["csv"]:
+            archive[tool] = files
+    return archive
+
+
+def plan_jobs(archive, max_timeout_minutes, workers=None):
+    """Split each tool's archive into (tool, days, csv_paths, converted_paths) jobs.
+
+    A job holds consecutive days that use the same files, at most MAX_JOB_DAYS and
+    few enough that each tool yields at least `workers` jobs (default: CPU count).
+    """
+    margin = timedelta(minutes=max_timeout_minutes, hours=1)
+    workers = workers or os.cpu_count() or 1
+    jobs = []
+    for tool, files in archive.items():
+        first = min(f[1] for f in files["csv"]).date()
+        last = max(f[2] for f in files["csv"]).date()
+        total_days = (last - first).days + 1
+        max_days = max(1, min(MAX_JOB_DAYS, -(-total_days // workers)))
+        current = None
+        day = first
+        while day <= last:
+            start = datetime.combine(day, datetime.min.time())
+            end = start + timedelta(days=1) + margin
+            csv_paths = tuple(p for p, a, b in files["csv"] if a < end and b >= start)
+            converted_paths = tuple(p for p, a, b in files["converted"] if a < end and b >= start)
+            if csv_paths:
+                if current and current[2] == csv_paths and current[3] == converted_paths and len(current[1]) < max_days:
+                    current[1].append(day)
+                else:
+                    current = (tool, [day], csv_paths, converted_paths)
+                    jobs.append(current)
+            day += timedelta(days=1)
+    return jobs
+
+
+def _quiet_worker_logging():
+    # 자식 프로세스마다 worker.log 에 쓰거나 콘솔을 어지럽히지 않도록 합니다.
+    import heating_monitor_worker as worker
+    worker.detach_log_file(logging.ERROR)
+
+
+def run_job(job, grid, base_settings):
+    """Replay every day of one job for every (threshold, timeout) pair.
+
+    Returns [(tool, day, threshold, timeout, triggers, [delay seconds per alert])].
+    """
+    from replay import load_recording, replay
+
+    tool, days, csv_paths, converted_paths = job
+    # 이 작업의 날짜 구간(+ 가장 긴 타임아웃 여유)만 읽습니다.
+    first = datetime.combine(days[0], datetime.min.time())
+    last_end = datetime.combine(days[-1], datetime.min.time()) + timedelta(days=1)
+    converted_end = last_end + timedelta(minutes=max(timeout for _, timeout in grid), hours=1)
+    csv_entries = sorted((e for p in csv_paths for e in load_recording(p, "csv_field", start=first, end=last_end)),
+                         key=lambda e: e[0])
+    converted_entries = sorted((e for p in converted_paths for e in load_recording(p, "dash", start=first, end=converted_end)),
+                               key=lambda e: e[0])
+
+    csv_times = [e[0] for e in csv_entries]
+    converted_times = [e[0] for e in converted_entries]
+    longest_timeout = max(timeout for _, timeout in grid)
+
+    rows = []
+    for day in days:
+        start = datetime.combine(day, datetime.min.time())
+        day_end = start + timedelta(days=1)
+        # 그날 구간은 조합마다 다시 훑지 않고 정렬된 시각에서 이분 탐색으로 한 번만 잘라 둡니다.
+        day_csv = csv_entries[bisect_left(csv_times, start):bisect_left(csv_times, day_end)]
+        lo = bisect_left(converted_times, start)
+        hi = bisect_left(converted_times, day_end + timedelta(minutes=longest_timeout, hours=1))
+        day_converted, day_converted_times = converted_entries[lo:hi], converted_times[lo:hi]
+        for threshold, timeout in grid:
+            end = day_end + timedelta(minutes=timeout, hours=1)
+            settings = dict(base_settings, threshold=threshold, interval_minutes=timeout)
+            report = replay(settings, day_csv, day_converted[:bisect_left(day_converted_times, end)])
+            delays = [a["latency_from_trigger"] for a in report["alerts"] if a["trigger_time"] < day_end]
+            rows.append((tool, day.isoformat(), threshold, timeout, report["triggers"], delays))
+    return rows
+
+
+def summarize(rows, thresholds, timeouts):
+    """Aggregate rows into {(threshold, timeout): {"alerts", "triggers", "median_delay", "p90_delay"}}."""
+    matrix = {}
+    for threshold in thresholds:
+        for timeout in timeouts:
+            delays = []
+            triggers = 0
+            for _, _, t, m, trig, d in rows:
+                if t == threshold and m == timeout:
+                    delays.extend(d)
+                    triggers += trig
+            delays.sort()
+            matrix[(threshold, timeout)] = {
+                "alerts": len(delays),
+                "triggers": triggers,
+                "median_delay": statistics.median(delays) if delays else None,
+                "p90_delay": delays[int(0.9 * (len(delays) - 1))] if delays else None,
+            }
+    return matrix
+
+
+def print_matrix(matrix, thresholds, timeouts):
+    header = "threshold \\ timeout".ljust(20) + "".join(f"{m:>14}" for m in timeouts)
+    print("Alerts (triggers)")
+    print(header)
+    for t in thresholds:
+        cells = "".join(f"{matrix[(t, m)]['alerts']:>7} ({matrix[(t, m)]['triggers']:>4})" for m in timeouts)
+        print(f"{t:<20}{cells}")
+    print("\nMedian detection delay from trigger (minutes)")
+    print(header)
+    for t in thresholds:
+        cells = "".join(
+            f"{matrix[(t, m)]['median_delay'] / 60:>14.1f}" if matrix[(t, m)]['median_delay'] is not None else f"{'-':>14}"
+            for m in timeouts)
+        print(f"{t:<20}{cells}")
+
+
+def write_rows(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tool", "day", "threshold", "interval_minutes", "triggers", "alerts",
+                         "median_delay_seconds", "max_delay_seconds"])
+        for tool, day, threshold, timeout, triggers, delays in rows:
+            writer.writerow([tool, day, threshold, timeout, triggers, len(delays),
+                             f"{statistics.median(delays):.1f}" if delays else "",
+                             f"{max(delays):.1f}" if delays else ""])
+
+
+def backtest(archive_dir, thresholds, timeouts, base_settings=None, jobs=None):
+    archive = scan_archive(archive_dir)
+    planned = plan_jobs(archive, max(timeouts), jobs)
+    grid = [(t, m) for t in thresholds for m in timeouts]
+    base_settings = base_settings or {}
+    rows = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_quiet_worker_logging) as pool:
+        futures = [pool.submit(run_job, job, grid, base_settings) for job in planned]
+        for future in futures:
+            rows.extend(future.result())
+    rows.sort(key=lambda row: row[:4])
+    return planned, rows
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep threshold/interval_minutes over archived logs.")
+    parser.add_argument("archive", help="archive folder (one sub-folder per tool)")
+    parser.add_argument("--thresholds", type=_int_list, default=[2, 3, 4, 5])
+    parser.add_argument("--timeouts", type=_int_list, default=[30, 60, 90, 120], help="interval_minutes values")
+    parser.add_argument("--poll", type=float, default=60, help="poll_interval_seconds used while replaying")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", help="write per tool/day rows to this CSV")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    planned, rows = backtest(args.archive, args.thresholds, args.timeouts,
+                             {"poll_interval_seconds": args.poll}, args.jobs)
+    if not planned:
+        print("No archived CSV files found.", file=sys.stderr)
+        return 1
+    tools = {job[0] for job in planned}
+    days = sum(len(job[1]) for job in planned)
+    print(f"Replayed {days} tool-days ({len(tools)} tool(s), {len(planned)} job(s)) × "
+          f"{len(args.thresholds) * len(args.timeouts)} settings in {time.perf_counter() - started:.1f} s\n")
+    print_matrix(summarize(rows, args.thresholds, args.timeouts), args.thresholds, args.timeouts)
+    if args.output:
+        write_rows(args.output, rows)
+        print(f"\nPer tool/day rows written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+
+# 워커가 재시작되어도 하던 일을 이어서 할 수 있도록 상태를 작은 JSON 파일에 저장합니다.
+#  - 상태(CSV/LOG)가 바뀔 때마다 바로 저장
+#  - CSV를 일정량(milestone_bytes) 이상 더 읽었을 때 저장
+# 저장은 임시 파일에 쓴 뒤 os.replace()로 바꿔치기하므로, 저장 도중 꺼져도 파일이 깨지지 않습니다.
+
+CHECKPOINT_VERSION = 1
+DEFAULT_MILESTONE_BYTES = 1024 * 1024
+DEFAULT_MAX_AGE_MINUTES = 24 * 60
+
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    def __init__(self, path, milestone_bytes=DEFAULT_MILESTONE_BYTES, max_age_minutes=DEFAULT_MAX_AGE_MINUTES):
+        self.path = path
+        self.milestone_bytes = milestone_bytes
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.tools = {}
+        self.saved_offsets = {}
+        self.saved_at = None
+        self.writes = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CHECKPOINT_VERSION:
+                logging.warning(f"[CHECKPOINT] Unsupported checkpoint version, ignoring: {self.path}")
+                return
+            self.tools = data.get("tools", {})
+            self.saved_at = datetime.fromisoformat(data["saved_at"]) if data.get("saved_at") else None
+        except Exception as e:
+            logging.error(f"[CHECKPOINT] Failed to read checkpoint, starting fresh: {e}")
+            self.tools = {}
+
+    def restore(self, name, machine, csv_reader):
+        """Restore one tool. Returns True when its state machine was resumed."""
+        data = self.tools.get(name)
+        if not data:
+            return False
+        # 너무 오래된 상태는 복원하지 않습니다. (오래 꺼져 있다 켜졌을 때 지난 LOG 모드로 경보가 울리는 것을 방지)
+        # 그동안 쌓인 CSV도 다시 읽지 않고 처음 시작할 때처럼 파일 끝부분만 읽습니다.
+        if self.saved_at is None or machine.clock() - self.saved_at > self.max_age:
+            logging.info("[CHECKPOINT] Saved state is too old, starting in CSV mode from the tail of the CSV.")
+            return False
+        if csv_reader is not None and data.get("csv_reader") and csv_reader.restore(data["csv_reader"]):
+            self.saved_offsets[name] = csv_reader.offset
+            logging.info(f"[CHECKPOINT] Resuming '{os.path.basename(csv_reader.path)}' from byte offset {csv_reader.offset:,}.")
+        machine.restore(data.get("machine", {}))
+        logging.info(f"[CHECKPOINT] State restored: {machine.state} (trigger: {machine.initial_heating_time}, heating count: {machine.heating_count})")
+        return True
+
+    def update(self, name, machine, csv_reader, force=False):
+        """Record a tool's state; write the file on a transition (force) or an offset milestone."""
+        offset = csv_reader.offset if csv_reader is not None and csv_reader.offset is not None else 0
+        self.tools[name] = {
+            "machine": machine.snapshot(),
+            "csv_reader": csv_reader.snapshot() if csv_reader is not None else None,
+        }
+        if not force and abs(offset - self.saved_offsets.get(name, 0)) < self.milestone_bytes:
+            return False
+        self.saved_offsets[name] = offset
+        return self.save()
+
+    def save(self):
+        self.saved_at = datetime.now()
+        data = {"version": CHECKPOINT_VERSION, "saved_at": self.saved_at.isoformat(), "tools": self.tools}
+        try:
+            write_json_atomic(self.path, data)
+            self.writes += 1
+            return True
+        except Exception as e:
+            logging.error(f"[CHECKPOINT] Failed to write checkpoint: {e}")
+            return False
@@ -0,0 +1,153 @@
+import hmac
+import json
+import socket
+import logging
+import secrets
+import threading
+import socketserver
+
+from heartbeat import read_heartbeat
+
+# 실행 중인 워커에게 GUI/스크립트가 말을 걸 수 있는 로컬 제어 채널입니다.
+# 127.0.0.1 TCP 소켓에 JSON 한 줄을 보내면 JSON 한 줄로 답합니다.
+#
+#   → {"token": "...", "command": "status"}
+#   ← {"ok": true, "tools": {"default": {"state": "LOG", "heating_count": 2, ...}}, ...}
+#
+# 명령: status, check (지금 바로 확인), reload (settings.json 다시 읽기), shutdown (정상 종료)
+# 포트(기본: 빈 포트 자동 선택)와 토큰은 하트비트 파일에 적어 두므로, 클라이언트는 그 파일만 읽으면 됩니다.
+
+COMMANDS = ("status", "check", "reload", "shutdown")
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # 응답하지 않는 클라이언트가 종료를 막지 않도록 소켓 타임아웃을 둡니다.
+    timeout = 5
+
+    def handle(self):
+        try:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+        except OSError:
+            return
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self._reply({"ok": False, "error": f"bad request: {e}"})
+            return
+        self._reply(self.server.control.handle(request))
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    # 종료할 때 처리 중인 요청(예: shutdown 응답)을 마저 보내고 닫습니다.
+    block_on_close = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    """Serves COMMANDS on 127.0.0.1; `handlers` maps a command to a callable(request) -> dict."""
+
+    def __init__(self, handlers, port=0, token=None):
+        self.handlers = handlers
+        self.token = token or secrets.token_hex(16)
+        self.server = _Server(("127.0.0.1", port), _Handler)
+        self.server.control = self
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name="ControlServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logging.info(f"[CONTROL] Control channel listening on 127.0.0.1:{self.port}")
+
+    def handle(self, request):
+        if not hmac.compare_digest(str(request.get("token", "")), self.token):
+            return {"ok": False, "error": "invalid token"}
+        command = request.get("command")
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"unknown command '{command}'"}
+        logging.debug(f"[CONTROL] Command received: {command}")
+        try:
+            response = handler(request) or {}
+        except Exception as e:
+            logging.error(f"[CONTROL] Command '{command}' failed: {e}")
+            return {"ok": False, "error": str(e)}
+        return dict({"ok": True}, **response)
+
+    def heartbeat_fields(self):
+        return {"control_port": self.port, "control_token": self.token}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ControlError(Exception):
+    pass
+
+
+class ControlClient:
+    def __init__(self, port, token, timeout=3.0):
+        self.port = port
+        self.token = token
+        self.timeout = timeout
+
+    @classmethod
+    def from_heartbeat(cls, path, timeout=3.0):
+        """Build a client from the port/token in the worker's heartbeat file, or None."""
+        data = read_heartbeat(path)
+        if not data or not data.get("control_port") or data.get("status") == "stopped":
+            return None
+        return cls(data["control_port"], data.get("control_token", ""), timeout)
+
+    def request(self, command, **fields):
+        payload = dict(fields, token=self.token, command=command)
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=self.timeout) as sock:
+                sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as f:
+                    line = f.readline(MAX_REQUEST_BYTES * 16)
+        except OSError as e:
+            raise ControlError(f"worker is not reachable: {e}")
+        try:
+            response = json.loads(line)
+        except ValueError:
+            raise ControlError("invalid response from worker")
+        if not response.get("ok"):
+            raise ControlError(response.get("error", "request failed"))
+        return response
+
+    def status(self):
+        return self.request("status")
+
+    def check_now(self):
+        return self.request("check")
+
+    def reload(self):
+        return self.request("reload")
+
+    def shutdown(self):
+        return self.request("shutdown")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    # 사용 예: python control_channel.py status   (워커 폴더의 하트비트 파일을 사용)
+    base = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False) else __file__))
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    client = ControlClient.from_heartbeat(os.path.join(base, "worker_heartbeat.json"))
+    if client is None:
+        print("Worker is not running.")
+        sys.exit(1)
+    try:
+        print(json.dumps(client.request(command), ensure_ascii=False, indent=2))
+    except ControlError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+import os
+import hashlib
+
+# 원본 .log 파일이 지난번 변환 이후 바뀌지 않았다면 g4_converter.exe를 다시 실행할 필요가 없습니다.
+# 원본 경로/크기/수정 시각(mtime)과, 선택적으로 파일 내용 지문(fingerprint)을 기억해 두고
+# 변환된 TXT와 그 분석 결과를 그대로 재사용합니다.
+
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def content_fingerprint(path, size):
+    # 파일 앞/뒤 일부와 크기만으로 만드는 가벼운 지문 (전체 해시는 큰 로그에서 너무 느림)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+class ConversionCache:
+    """Remembers the last successful conversion and the parse results derived from it."""
+
+    def __init__(self, use_fingerprint=False):
+        self.use_fingerprint = use_fingerprint
+        self.source_key = None
+        self.source_fingerprint = None
+        self.target_key = None
+        self.results = {}
+        self.launches = 0
+        self.skipped = 0
+
+    def invalidate(self):
+        self.source_key = None
+        self.source_fingerprint = None
+        self.target_key = None
+        self.results.clear()
+
+    def is_fresh(self, source_path, target_path):
+        if self.source_key is None:
+            return False
+        try:
+            # target_path 가 None 이면 (스트리밍 변환) 원본만 비교합니다.
+            if target_path is not None and _stat_key(target_path) != self.target_key:
+                return False
+            source_key = _stat_key(source_path)
+            if source_key == self.source_key:
+                return True
+            if self.use_fingerprint and source_key[1] == self.source_key[1]:
+                # mtime만 바뀌고 내용은 같은 경우 (복사/touch 등)
+                if content_fingerprint(source_path, source_key[1]) == self.source_fingerprint:
+                    self.source_key = source_key
+                    return True
+        except OSError:
+            return False
+        return False
+
+    def snapshot(self, source_path):
+        # 변환기를 실행하기 "전"의 원본 상태를 기록해야, 변환 도중 덧붙여진 내용을 놓치지 않습니다.
+        try:
+            key = _stat_key(source_path)
+            fingerprint = content_fingerprint(source_path, key[1]) if self.use_fingerprint else None
+            return key, fingerprint
+        except OSError:
+            return None
+
+    def record(self, snapshot, target_path):
+        self.launches += 1
+        self.results.clear()
+        if snapshot is None:
+            self.invalidate()
+            return
+        try:
+            self.target_key = _stat_key(target_path) if target_path is not None else None
+            self.source_key, self.source_fingerprint = snapshot
+        except OSError:
+            self.invalidate()
+
+    def mark_failed(self):
+        # 실패한 변환은 TXT가 덜 써졌을 수 있으므로 캐시를 버립니다.
+        self.launches += 1
+        self.invalidate()
+
+    def get_result(self, *args):
+        return self.results.get(args)
+
+    def put_result(self, result, *args):
+        self.results[args] = result
@@ -0,0 +1,132 @@
+import os
+import logging
+import threading
+
+# 변환기(g4_converter)가 TXT 파일을 다 쓴 뒤에 다시 디스크에서 읽는 대신,
+# 변환기의 출력을 표준출력(stdout) 또는 FIFO(이름 있는 파이프)로 받아 한 줄씩 바로 분석합니다.
+# 리셋 줄을 보면 (리셋이 항상 이기므로, event_window.py 참고) 남은 출력은 읽지 않고 변환기를 일찍 종료합니다.
+#
+#   converter_output: "file"   → 기존 방식 (converted_log_file_path 에 TXT 저장)
+#                     "stdout" → [변환기, 원본.log, converter_stdout_arg(기본 "-")] 의 표준출력을 읽음
+#                     "fifo"   → 임시 FIFO 경로를 출력 파일로 넘기고 그 FIFO를 읽음 (POSIX 전용)
+# 워커 시작을 빠르게 하려고 subprocess/tempfile/shutil 은 변환기를 실행할 때 import 합니다.
+
+OUTPUT_MODES = ("file", "stdout", "fifo")
+
+
+def output_mode(settings):
+    mode = settings.get("converter_output", "file")
+    if mode not in OUTPUT_MODES:
+        logging.warning(f"[CONFIG] Unknown converter_output '{mode}' → Using 'file'.")
+        return "file"
+    if mode == "fifo" and not hasattr(os, "mkfifo"):
+        logging.warning("[CONFIG] converter_output 'fifo' is not available on this OS → Using 'stdout'.")
+        return "stdout"
+    return mode
+
+
+class StreamingConversion:
+    """One converter run whose output is read line by line; `stop()` ends it early."""
+
+    def __init__(self, converter_path, source_path, mode="stdout", timeout=15, stdout_arg="-", prefix=()):
+        self.converter_path = converter_path
+        self.source_path = source_path
+        self.mode = mode
+        self.timeout = timeout
+        self.stdout_arg = stdout_arg
+        self.prefix = list(prefix)
+        self.proc = None
+        self.fifo_path = None
+        self.stopped_early = False
+        self.timed_out = False
+        self._stderr = None
+        self._watchdog = None
+        self.error_output = ""
+
+    def lines(self):
+        """Start the converter and yield decoded output lines as they arrive."""
+        import tempfile
+        import subprocess
+        target = self.stdout_arg
+        if self.mode == "fifo":
+            self.fifo_path = os.path.join(tempfile.mkdtemp(prefix="g4_stream_"), "converted.fifo")
+            os.mkfifo(self.fifo_path)
+            target = self.fifo_path
+        self._stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(
+            self.prefix + [self.converter_path, self.source_path, target],
+            stdout=subprocess.PIPE if self.mode == "stdout" else subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+        self._watchdog = threading.Timer(self.timeout, self._expire)
+        self._watchdog.daemon = True
+        self._watchdog.start()
+        if self.mode == "fifo":
+            threading.Thread(target=self._reap, name="ConverterReaper", daemon=True).start()
+
+        stream = self.proc.stdout if self.mode == "stdout" else open(self.fifo_path, "rb")
+        with stream:
+            for raw_line in stream:
+                yield raw_line.decode("utf-8", errors="ignore")
+
+    def _reap(self):
+        # 변환기가 FIFO를 열지 않고 끝나도 (예: 인수 오류) 읽는 쪽이 시간 초과까지 기다리지 않게 합니다.
+        self.proc.wait()
+        self._release_fifo()
+
+    def _expire(self):
+        self.timed_out = True
+        self._kill()
+
+    def stop(self):
+        """Stop reading: the decision is made, the rest of the output is not needed."""
+        if self.proc is not None and self.proc.poll() is None:
+            self.stopped_early = True
+            self._kill()
+
+    def _kill(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+        self._release_fifo()
+
+    def _release_fifo(self):
+        # 변환기가 FIFO를 열기 전에 죽었으면 읽는 쪽 open() 이 계속 기다리므로, 쓰기 쪽을 잠깐 열어 풀어줍니다.
+        fifo_path = self.fifo_path
+        if fifo_path:
+            try:
+                os.close(os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+
+    def close(self):
+        """Wait for the converter and clean up; returns the exit code."""
+        import shutil
+        import subprocess
+        returncode = None
+        if self.proc is not None:
+            if not self.stopped_early and not self.timed_out:
+                # 출력을 끝까지 읽었으면 변환기가 스스로 끝날 때까지 기다립니다 (남은 시간은 watchdog 가 제한).
+                try:
+                    self.proc.wait(self.timeout)
+                except subprocess.TimeoutExpired:
+                    self.timed_out = True
+            if self.proc.poll() is None:
+                self.proc.kill()
+            returncode = self.proc.wait()
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self.fifo_path:
+            shutil.rmtree(os.path.dirname(self.fifo_path), ignore_errors=True)
+            self.fifo_path = None
+        if self._stderr is not None:
+            self._stderr.seek(0)
+            self.error_output = self._stderr.read().decode(errors="ignore").strip()
+            self._stderr.close()
+            self._stderr = None
+        return returncode
+
+    @property
+    def succeeded(self):
+        if self.timed_out or self.proc is None:
+            return False
+        return self.stopped_early or self.proc.returncode == 0
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+# 감지 이벤트(트리거, heating 횟수, 리셋, 경보)를 구조화된 JSONL 로 남기는 추가 전용(append-only) 저널입니다.
+# worker.log 는 2 MB 마다 잘려 나가지만, 저널은 지우지 않고 계속 쌓입니다.
+#
+#   journal/2026/2026-10-17.jsonl : 그날의 이벤트, 한 줄에 하나
+#   journal/2026/2026-10-17.idx   : 각 줄의 "오프셋<TAB>길이<TAB>장비<TAB>종류"
+#
+# 조회할 때는 파일 이름으로 날짜 범위를 고르고, 작은 .idx 만 읽어서 필요한 줄만 seek 해서 읽습니다.
+# 그래서 몇 년치가 쌓여도 원본 로그를 훑지 않습니다.
+# .idx 가 .jsonl 보다 짧으면 (쓰는 도중 종료 등) 남은 부분만 직접 읽어서 보충합니다.
+
+EVENT_KINDS = ("trigger", "heating", "reset", "alert", "suppressed")
+DATA_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+
+
+def _clean(name):
+    return str(name).replace("\t", " ").replace("\n", " ")
+
+
+def _to_json(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class EventJournal:
+    """Append-only per-day JSONL event files with a small index per day."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._day = None
+        self._data = None
+        self._index = None
+
+    # --- 쓰기 ---
+
+    def day_paths(self, day):
+        base = os.path.join(self.directory, f"{day.year:04d}", day.isoformat())
+        return base + DATA_SUFFIX, base + INDEX_SUFFIX
+
+    def _open(self, day):
+        self._close_files()
+        data_path, index_path = self.day_paths(day)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        self._data = open(data_path, "ab")
+        self._index = open(index_path, "a", encoding="utf-8")
+        self._day = day
+
+    def record(self, tool, kind, time=None, **fields):
+        """Append one event; fields must be JSON-serializable (datetimes are stored as ISO strings)."""
+        time = time or datetime.now()
+        event = {"time": time.isoformat(), "tool": tool, "kind": kind}
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False, default=_to_json).encode("utf-8") + b"\n"
+        with self.lock:
+            try:
+                if self._day != time.date():
+                    self._open(time.date())
+                offset = self._data.tell()
+                self._data.write(line)
+                self._data.flush()
+                self._index.write(f"{offset}\t{len(line)}\t{_clean(tool)}\t{_clean(kind)}\n")
+                self._index.flush()
+            except OSError as e:
+                logging.error(f"[JOURNAL] Could not write event: {e}")
+                self._close_files()
+
+    def _close_files(self):
+        for f in (self._data, self._index):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._data = self._index = self._day = None
+
+    def close(self):
+        with self.lock:
+            self._close_files()
+
+    # --- 읽기 ---
+
+    def days(self, start=None, end=None):
+        """Days that have a journal file, oldest first, limited to [start, end]."""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for year in sorted(os.listdir(self.directory)):
+            if not year.isdigit() or (start and int(year) < start.year) or (end and int(year) > end.year):
+                continue
+            for name in sorted(os.listdir(os.path.join(self.directory, year))):
+                if not name.endswith(DATA_SUFFIX):
+                    continue
+                try:
+                    day = date.fromisoformat(name[:-len(DATA_SUFFIX)])
+                except ValueError:
+                    continue
+                if (start is None or day >= start) and (end is None or day <= end):
+                    found.append(day)
+        return found
+
+    def _entries(self, day):
+        # (오프셋, 길이, 장비, 종류) 목록. 색인에 없는 뒷부분은 데이터 파일을 직접 읽어 채웁니다.
+        data_path, index_path = self.day_paths(day)
+        entries = []
+        covered = 0
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4 or not line.endswith("\n"):
+                        break
+                    offset, length = int(parts[0]), int(parts[1])
+                    entries.append((offset, length, parts[2], parts[3]))
+                    covered = offset + length
+        except (OSError, ValueError):
+            pass
+        try:
+            size = os.path.getsize(data_path)
+        except OSError:
+            return []
+        if covered > size:
+            entries = [entry for entry in entries if entry[0] + entry[1] <= size]
+            covered = entries[-1][0] + entries[-1][1] if entries else 0
+        if covered < size:
+            with open(data_path, "rb") as f:
+                f.seek(covered)
+                offset = covered
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    try:
+                        event = json.loads(raw)
+                        entries.append((offset, len(raw), _clean(event.get("tool")), _clean(event.get("kind"))))
+                    except ValueError:
+                        pass
+                    offset += len(raw)
+        return entries
+
+    def query(self, start=None, end=None, tool=None, kinds=None):
+        """Yield events between the dates `start` and `end` (inclusive), optionally for one tool/kinds."""
+        kinds = set(kinds) if kinds else None
+        for day in self.days(start, end):
+            wanted = [(offset, length) for offset, length, entry_tool, kind in self._entries(day)
+                      if (tool is None or entry_tool == tool) and (kinds is None or kind in kinds)]
+            if not wanted:
+                continue
+            with open(self.day_paths(day)[0], "rb") as f:
+                for offset, length in wanted:
+                    f.seek(offset)
+                    try:
+                        yield json.loads(f.read(length))
+                    except ValueError:
+                        continue
+
+    def counts(self, start=None, end=None, tool=None, kinds=None):
+        """{(day, tool, kind): n} from the index files only."""
+        kinds = set(kinds) if kinds else None
+        result = {}
+        for day in self.days(start, end):
+            for _, _, entry_tool, kind in self._entries(day):
+                if (tool is None or entry_tool == tool) and (kinds is None or kind in kinds):
+                    key = (day, entry_tool, kind)
+                    result[key] = result.get(key, 0) + 1
+        return result
+
+
+def _date_range(args):
+    today = date.today()
+    if args.last_month:
+        end = today.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1), end
+    if args.days:
+        return today - timedelta(days=args.days - 1), today
+    return args.since, args.until
+
+
+def main(argv=None):
+    import argparse
+    base = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False) else __file__))
+    parser = argparse.ArgumentParser(description="Query the worker's detection event journal.")
+    parser.add_argument("--dir", default=os.path.join(base, "journal"), help="journal folder")
+    parser.add_argument("--tool", help="only this tool")
+    parser.add_argument("--kind", action="append", choices=EVENT_KINDS, help="event kind (repeatable)")
+    parser.add_argument("--since", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="last day, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, help="the last N days including today")
+    parser.add_argument("--last-month", action="store_true", help="the previous calendar month")
+    parser.add_argument("--count", action="store_true", help="print counts per day/tool/kind instead of events")
+    parser.add_argument("--json", action="store_true", help="print events as JSON lines")
+    args = parser.parse_args(argv)
+
+    journal = EventJournal(args.dir)
+    start, end = _date_range(args)
+    if args.count:
+        for (day, tool, kind), n in sorted(journal.counts(start, end, args.tool, args.kind).items()):
+            print(f"{day}  {tool:<16} {kind:<10} {n}")
+        return 0
+    for event in journal.query(start, end, args.tool, args.kind):
+        if args.json:
+            print(json.dumps(event, ensure_ascii=False))
+            continue
+        extra = ", ".join(f"{key}={value}" for key, value in event.items() if key not in ("time", "tool", "kind"))
+        print(f"{event['time'][:19]}  {event['tool']:<16} {event['kind']:<10} {extra}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
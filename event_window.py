@@ -0,0 +1,141 @@
+import threading
+from collections import deque
+from datetime import timedelta
+
+# LOG 모드 동안 "heating" 이벤트 수를 매번 로그 전체에서 다시 세지 않고,
+# 새로 나온 이벤트만 덱(deque)에 넣고 시간 창(window)을 벗어난 것은 앞에서 빼는 카운터입니다.
+# 임계값 비교는 len() 한 번이므로 로그가 아무리 빨리 쌓여도 O(1)입니다.
+#
+# 판단 규칙 (변환 결과 한 묶음 단위): 묶음 안에 리셋("working properly") 줄이 하나라도 있으면
+# 임계값 도달보다 리셋이 우선합니다. 리셋 앞뒤의 heating 줄 수와 관계없이 결과는 리셋입니다.
+# 그래서 변환 출력을 읽는 쪽은 리셋을 보면 바로 멈춰도 되지만, 임계값에 도달했다고 멈추면 안 됩니다
+# (뒤에 나올 리셋을 놓침). 파일 모드(advance)와 스트리밍 모드(feed)가 같은 결과를 내는 근거입니다.
+#
+# LOG 모드 중 CSV에 다시 찍힌 트리거(add_trigger)도 같은 창에 넣습니다. 같은 heating 은 변환 로그에도
+# 같은 초(CSV는 밀리초까지, 변환 로그는 초까지)로 찍히므로, SAME_EVENT 안에 heating 줄이 있는 트리거는
+# 한 번만 셉니다. 트리거가 먼저 오면 따로 세어 두었다가 짝이 되는 heating 줄이 오면 그 줄로 바꿉니다.
+# 비동기 실행에서는 분석 스레드와 이벤트 루프가 함께 쓰므로 잠금으로 보호합니다.
+
+SAME_EVENT = timedelta(seconds=1)
+
+
+class SlidingWindowCounter:
+    def __init__(self, window_minutes=60):
+        self.window = timedelta(minutes=window_minutes)
+        self.events = deque()
+        # 짝이 되는 heating 줄이 아직 없는 CSV 트리거 시각
+        self.triggers = deque()
+        self.lock = threading.RLock()
+        self.start_time = None
+        self.reset_seen = False
+        # 변환 로그에서 어디까지 읽었는지: 마지막 이벤트 시각과, 그 시각(같은 초)에 이미 센 줄 수
+        self.watermark = None
+        self.at_watermark = 0
+        self._skip = 0
+
+    def start(self, start_time):
+        """Begin a new LOG session: only events after `start_time` are counted."""
+        with self.lock:
+            self.events.clear()
+            self.triggers.clear()
+            self.start_time = start_time
+            self.reset_seen = False
+            self.watermark = start_time
+            self.at_watermark = 0
+
+    @property
+    def count(self):
+        with self.lock:
+            return len(self.events) + len(self.triggers)
+
+    def evict(self, now):
+        limit = now - self.window
+        for events in (self.events, self.triggers):
+            while events and events[0] < limit:
+                events.popleft()
+
+    @staticmethod
+    def _near(events, ts):
+        # 시각 순으로 쌓이므로 뒤에서부터 SAME_EVENT 범위를 벗어날 때까지만 봅니다.
+        for other in reversed(events):
+            if abs(other - ts) < SAME_EVENT:
+                return other
+            if other <= ts - SAME_EVENT:
+                break
+        return None
+
+    def add(self, ts):
+        match = self._near(self.triggers, ts)
+        if match is not None:
+            # 먼저 세어 둔 CSV 트리거와 같은 heating 이므로 트리거 대신 이 줄을 셉니다.
+            self.triggers.remove(match)
+        self.events.append(ts)
+        self.evict(ts)
+
+    def add_trigger(self, ts, start_time):
+        """Count a CSV trigger seen during the LOG session that began at `start_time`.
+
+        Returns False when it is not new: at or before the session start, or already
+        counted through its converted-log heating line.
+        """
+        with self.lock:
+            if self.start_time != start_time:
+                self.start(start_time)
+            if ts <= start_time or self._near(self.events, ts) is not None or self._near(self.triggers, ts) is not None:
+                return False
+            self.triggers.append(ts)
+            self.evict(ts)
+            return True
+
+    def reset(self):
+        self.events.clear()
+        self.triggers.clear()
+        self.reset_seen = True
+
+    def advance(self, events):
+        """Feed events newer than the watermark, oldest first, as (ts, is_reset) pairs.
+
+        `events` must include every line stamped with the current watermark second;
+        the ones already counted on a previous call are skipped. Returns the new events.
+        """
+        with self.lock:
+            skip = self.at_watermark
+            added = []
+            for ts, is_reset in events:
+                if skip and ts == self.watermark:
+                    skip -= 1
+                    continue
+                added.append((ts, is_reset))
+                if is_reset:
+                    self.reset()
+                else:
+                    self.add(ts)
+            if events:
+                last_ts = events[-1][0]
+                self.at_watermark = sum(1 for ts, _ in events if ts == last_ts)
+                self.watermark = last_ts
+            return added
+
+    def begin_pass(self):
+        """Start a forward pass over the whole converted output (streaming converter mode)."""
+        self._skip = self.at_watermark
+
+    def feed(self, ts, is_reset):
+        """Streaming counterpart of advance(): one event in output order. Returns True if it was new."""
+        if ts <= self.start_time or ts < self.watermark:
+            return False
+        with self.lock:
+            if ts == self.watermark:
+                # 지난번 패스에서 이미 센, 워터마크와 같은 초의 줄들은 건너뜁니다.
+                if self._skip:
+                    self._skip -= 1
+                    return False
+                self.at_watermark += 1
+            else:
+                self.watermark = ts
+                self.at_watermark = 1
+            if is_reset:
+                self.reset()
+            else:
+                self.add(ts)
+            return True
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+# g4_converter.exe 대신 쓰는 테스트용 가짜 변환기입니다. (Linux 등 실제 변환기가 없는 곳에서 사용)
+# 원본 파일이 이미 변환된 TXT 형식이라고 보고 한 줄씩 그대로 출력합니다.
+#
+#   python fake_g4_converter.py <원본.log> <출력>      출력: TXT 파일 경로, FIFO 경로, 또는 "-" (stdout)
+#
+# settings.json 에서 "converter_exe_name": "fake_g4_converter.py" 로 지정하면 워커가 파이썬으로 실행합니다.
+# 환경 변수로 느린 변환기/실패를 흉내 낼 수 있습니다.
+#   FAKE_G4_START_DELAY : 시작 전 대기 (초)
+#   FAKE_G4_LINE_DELAY  : 한 줄 출력할 때마다 대기 (초)
+#   FAKE_G4_FAIL        : 값이 있으면 stderr 에 메시지를 쓰고 종료 코드 1
+
+
+def convert(source_path, out, line_delay=0.0):
+    written = 0
+    with open(source_path, "rb") as src:
+        for line in src:
+            out.write(line)
+            out.flush()
+            written += 1
+            if line_delay:
+                time.sleep(line_delay)
+    return written
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: fake_g4_converter.py SOURCE TARGET|-", file=sys.stderr)
+        return 2
+    source_path, target = argv
+    time.sleep(float(os.environ.get("FAKE_G4_START_DELAY", "0")))
+    if os.environ.get("FAKE_G4_FAIL"):
+        print(f"fake converter failure: {os.environ['FAKE_G4_FAIL']}", file=sys.stderr)
+        return 1
+    line_delay = float(os.environ.get("FAKE_G4_LINE_DELAY", "0"))
+    try:
+        if target == "-":
+            convert(source_path, sys.stdout.buffer, line_delay)
+        else:
+            with open(target, "wb") as out:
+                convert(source_path, out, line_delay)
+    except BrokenPipeError:
+        # 워커가 판단을 끝내고 읽기를 멈춘 경우 (조기 종료)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
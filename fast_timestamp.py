@@ -0,0 +1,90 @@
+import sys
+import time
+from datetime import datetime, date
+
+# 워커가 읽는 로그의 시간 문자열은 항상 같은 자리(고정 폭)에 같은 형식으로 찍힙니다.
+#   CSV       : 2024/01/31 13:45:07 또는 2024/01/31 13:45:07.123456
+#   변환 로그 : 2024-01-31 13:45:07
+# datetime.strptime() 대신 문자열을 잘라서(slicing) 숫자로 바꾸고,
+# 같은 날짜 부분은 캐시에 저장해서 다시 계산하지 않습니다.
+
+DATE_CACHE_SIZE = 1024
+_date_cache = {}
+
+
+def _parse_date(text, sep):
+    cached = _date_cache.get((text, sep))
+    if cached is not None:
+        return cached
+    digits = text[0:4] + text[5:7] + text[8:10]
+    if text[4] != sep or text[7] != sep or not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"time data {text!r} does not match the date layout")
+    cached = (int(text[0:4]), int(text[5:7]), int(text[8:10]))
+    date(*cached)  # 존재하지 않는 날짜(2월 30일 등)는 ValueError
+    if len(_date_cache) >= DATE_CACHE_SIZE:
+        _date_cache.clear()
+    _date_cache[(text, sep)] = cached
+    return cached
+
+
+def _parse(text, sep, allow_fraction):
+    length = len(text)
+    if length < 19 or text[10] != " " or text[13] != ":" or text[16] != ":":
+        raise ValueError(f"time data {text!r} does not match the fixed layout")
+    year, month, day = _parse_date(text[:10], sep)
+    clock = text[11:13] + text[14:16] + text[17:19]
+    if not (clock.isascii() and clock.isdigit()):
+        raise ValueError(f"time data {text!r} does not match the fixed layout")
+    microsecond = 0
+    if length > 19:
+        fraction = text[20:]
+        if (not allow_fraction or text[19] != "." or not 1 <= len(fraction) <= 6
+                or not (fraction.isascii() and fraction.isdigit())):
+            raise ValueError(f"unconverted data remains: {text[19:]!r}")
+        microsecond = int(fraction) * 10 ** (6 - len(fraction))
+    return datetime(year, month, day, int(text[11:13]), int(text[14:16]), int(text[17:19]), microsecond)
+
+
+def parse_slash_timestamp(text):
+    """Parse '%Y/%m/%d %H:%M:%S' with an optional '.%f' suffix (monitoring CSV)."""
+    return _parse(text, "/", True)
+
+
+def parse_dash_timestamp(text):
+    """Parse '%Y-%m-%d %H:%M:%S' (g4_converter output)."""
+    return _parse(text, "-", False)
+
+
+def _strptime_slash(text):
+    try:
+        return datetime.strptime(text, "%Y/%m/%d %H:%M:%S.%f")
+    except ValueError:
+        return datetime.strptime(text, "%Y/%m/%d %H:%M:%S")
+
+
+def benchmark(count=1_000_000):
+    """Compare strptime with the slicing parser on `count` CSV-style timestamps."""
+    start = datetime(2024, 1, 1)
+    samples = []
+    for i in range(count):
+        ts = datetime.fromtimestamp(start.timestamp() + i * 0.37)
+        samples.append(ts.strftime("%Y/%m/%d %H:%M:%S.%f") if i % 2 else ts.strftime("%Y/%m/%d %H:%M:%S"))
+
+    results = {}
+    for name, func in (("strptime", _strptime_slash), ("fast_timestamp", parse_slash_timestamp)):
+        t0 = time.perf_counter()
+        parsed = [func(s) for s in samples]
+        results[name] = (time.perf_counter() - t0, parsed)
+
+    if results["strptime"][1] != results["fast_timestamp"][1]:
+        raise AssertionError("fast_timestamp and strptime disagree")
+    slow, fast = results["strptime"][0], results["fast_timestamp"][0]
+    print(f"{count:,} lines")
+    print(f"strptime       : {slow:.2f} s")
+    print(f"fast_timestamp : {fast:.2f} s")
+    print(f"speedup        : x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    # python fast_timestamp.py [줄 수] : strptime과 속도를 비교합니다.
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
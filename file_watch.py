@@ -0,0 +1,431 @@
+import os
+import sys
+import time
+import select
+import struct
+import logging
+
+# 감시 대상 파일이 바뀌면 바로 깨어나도록 하는 파일 변경 알림 도구입니다.
+# - Linux   : inotify
+# - Windows : ReadDirectoryChangesW
+# - 그 외 / 실패 시 : os.stat() 폴링
+# 모든 백엔드는 파일이 들어 있는 "폴더"를 감시하므로, 파일이 교체(rotate)되거나
+# 새로 만들어져도 놓치지 않습니다.
+
+DEFAULT_POLL_SECONDS = 1.0
+DEFAULT_DEBOUNCE_SECONDS = 0.2
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+    except OSError:
+        return None
+
+
+def _group_by_directory(paths):
+    dirs = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        dirs.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+    return dirs
+
+
+class PollingBackend:
+    name = "poll"
+
+    def __init__(self, paths, poll_interval=DEFAULT_POLL_SECONDS):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.poll_interval = poll_interval
+        self.snapshot = {p: _stat_key(p) for p in self.paths}
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                key = _stat_key(path)
+                if key != self.snapshot[path]:
+                    self.snapshot[path] = key
+                    changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        # ctypes 는 네이티브 감시기를 만들 때만 로드합니다 (워커 시작 시간 단축).
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        try:
+            for directory, names in _group_by_directory(paths).items():
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+                self.watches[wd] = (directory, names)
+        except Exception:
+            os.close(self.fd)
+            raise
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if wd not in self.watches:
+                    continue
+                directory, names = self.watches[wd]
+                name = os.fsdecode(name)
+                if name in names:
+                    changed.add(os.path.join(directory, name))
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if readable:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            if time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class WindowsBackend:
+    name = "ReadDirectoryChangesW"
+
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_ALL = 0x00000001 | 0x00000002 | 0x00000004
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    FILE_FLAG_OVERLAPPED = 0x40000000
+    NOTIFY_FILTER = 0x00000001 | 0x00000008 | 0x00000010  # FILE_NAME | SIZE | LAST_WRITE
+    WAIT_OBJECT_0 = 0x00000000
+    WAIT_TIMEOUT = 0x00000102
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, paths):
+        import ctypes
+        from ctypes import wintypes
+
+        class OVERLAPPED(ctypes.Structure):
+            _fields_ = [
+                ("Internal", ctypes.c_void_p),
+                ("InternalHigh", ctypes.c_void_p),
+                ("Offset", wintypes.DWORD),
+                ("OffsetHigh", wintypes.DWORD),
+                ("hEvent", wintypes.HANDLE),
+            ]
+
+        k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        k32.CreateFileW.restype = wintypes.HANDLE
+        k32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+                                    wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        k32.CreateEventW.restype = wintypes.HANDLE
+        k32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        k32.ReadDirectoryChangesW.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD, wintypes.BOOL,
+                                              wintypes.DWORD, ctypes.POINTER(wintypes.DWORD),
+                                              ctypes.POINTER(OVERLAPPED), ctypes.c_void_p]
+        k32.GetOverlappedResult.argtypes = [wintypes.HANDLE, ctypes.POINTER(OVERLAPPED),
+                                            ctypes.POINTER(wintypes.DWORD), wintypes.BOOL]
+        k32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                               wintypes.BOOL, wintypes.DWORD]
+        k32.WaitForMultipleObjects.restype = wintypes.DWORD
+        k32.CancelIoEx.argtypes = [wintypes.HANDLE, ctypes.POINTER(OVERLAPPED)]
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        self._k32 = k32
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self.watches = []
+        invalid = wintypes.HANDLE(-1).value
+        try:
+            for directory, names in _group_by_directory(paths).items():
+                handle = k32.CreateFileW(
+                    directory, self.FILE_LIST_DIRECTORY, self.FILE_SHARE_ALL, None, self.OPEN_EXISTING,
+                    self.FILE_FLAG_BACKUP_SEMANTICS | self.FILE_FLAG_OVERLAPPED, None)
+                if not handle or handle == invalid:
+                    raise ctypes.WinError(ctypes.get_last_error())
+                watch = {
+                    "directory": directory,
+                    "names": {n.lower(): n for n in names},
+                    "handle": handle,
+                    "buffer": ctypes.create_string_buffer(self.BUFFER_SIZE),
+                    "overlapped": OVERLAPPED(),
+                }
+                watch["overlapped"].hEvent = k32.CreateEventW(None, True, False, None)
+                self.watches.append(watch)
+                self._issue(watch)
+        except Exception:
+            self.close()
+            raise
+
+    def _issue(self, watch):
+        ok = self._k32.ReadDirectoryChangesW(
+            watch["handle"], watch["buffer"], self.BUFFER_SIZE, False, self.NOTIFY_FILTER,
+            None, self._ctypes.byref(watch["overlapped"]), None)
+        if not ok:
+            raise self._ctypes.WinError(self._ctypes.get_last_error())
+
+    def _collect(self, watch):
+        transferred = self._wintypes.DWORD(0)
+        self._k32.GetOverlappedResult(watch["handle"], self._ctypes.byref(watch["overlapped"]),
+                                      self._ctypes.byref(transferred), False)
+        changed = set()
+        if transferred.value == 0:
+            # 버퍼가 넘친 경우: 어떤 파일이 바뀌었는지 모르므로 전부 바뀐 것으로 봅니다.
+            changed = {os.path.join(watch["directory"], n) for n in watch["names"].values()}
+        else:
+            raw = watch["buffer"].raw[:transferred.value]
+            offset = 0
+            while True:
+                next_offset, _action, name_length = struct.unpack_from("III", raw, offset)
+                name = raw[offset + 12:offset + 12 + name_length].decode("utf-16-le")
+                if name.lower() in watch["names"]:
+                    changed.add(os.path.join(watch["directory"], watch["names"][name.lower()]))
+                if not next_offset:
+                    break
+                offset += next_offset
+        self._issue(watch)
+        return changed
+
+    def wait(self, timeout):
+        handles = (self._wintypes.HANDLE * len(self.watches))(*[w["overlapped"].hEvent for w in self.watches])
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            result = self._k32.WaitForMultipleObjects(len(self.watches), handles, False, int(remaining * 1000))
+            if result == self.WAIT_TIMEOUT:
+                return set()
+            index = result - self.WAIT_OBJECT_0
+            if not 0 <= index < len(self.watches):
+                raise self._ctypes.WinError(self._ctypes.get_last_error())
+            changed = self._collect(self.watches[index])
+            if changed:
+                return changed
+            if time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        for watch in self.watches:
+            self._k32.CancelIoEx(watch["handle"], self._ctypes.byref(watch["overlapped"]))
+            self._k32.CloseHandle(watch["handle"])
+            if watch["overlapped"].hEvent:
+                self._k32.CloseHandle(watch["overlapped"].hEvent)
+        self.watches = []
+
+
+class FileWatcher:
+    """Wait until one of `paths` changes, or until a timeout expires.
+
+    `backend` is "auto" (native where available, polling otherwise) or "poll".
+    A short debounce after the first change folds bursts of writes into one wakeup.
+    """
+
+    def __init__(self, paths, backend="auto", poll_interval=DEFAULT_POLL_SECONDS, debounce=DEFAULT_DEBOUNCE_SECONDS):
+        self.paths = [os.path.abspath(p) for p in paths if p]
+        self.debounce = debounce
+        self.backend = None
+        if backend == "auto":
+            try:
+                if sys.platform.startswith("linux"):
+                    self.backend = InotifyBackend(self.paths)
+                elif sys.platform == "win32":
+                    self.backend = WindowsBackend(self.paths)
+            except Exception as e:
+                logging.warning(f"[WATCH] Native file watching unavailable, falling back to polling: {e}")
+        if self.backend is None:
+            self.backend = PollingBackend(self.paths, poll_interval)
+        logging.debug(f"[WATCH] Using '{self.backend.name}' backend for {len(self.paths)} file(s).")
+
+    def wait(self, timeout):
+        changed = self.backend.wait(timeout)
+        if changed and self.debounce > 0:
+            changed |= self.backend.wait(self.debounce)
+        return changed
+
+    def close(self):
+        self.backend.close()
+
+
+class WatchHub:
+    """One watcher thread shared by many asyncio tasks.
+
+    Tasks call `await hub.wait(paths, timeout)`; the hub thread wakes the matching
+    waiters through the event loop, so dozens of tools do not each hold a thread.
+    """
+
+    def __init__(self, paths, backend="auto", poll_interval=DEFAULT_POLL_SECONDS, debounce=DEFAULT_DEBOUNCE_SECONDS):
+        import threading
+
+        self.options = {"backend": backend, "poll_interval": poll_interval, "debounce": debounce}
+        self.watcher = FileWatcher(paths, **self.options)
+        self.new_paths = None
+        self.waiters = {}
+        self.loop = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="WatchHub", daemon=True)
+
+    def start(self, loop):
+        self.loop = loop
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if self.new_paths is not None:
+                    paths, self.new_paths = self.new_paths, None
+                    self.watcher.close()
+                    self.watcher = FileWatcher(paths, **self.options)
+                try:
+                    changed = self.watcher.wait(1.0)
+                except OSError as e:
+                    # 네이티브 감시가 실행 중에 실패하면 (예: WaitForMultipleObjects 의 64개 핸들 제한) 폴링으로 계속합니다.
+                    logging.error(f"[WATCH] '{self.watcher.backend.name}' backend failed, falling back to polling: {e}")
+                    self.watcher.close()
+                    self.options["backend"] = "poll"
+                    self.watcher = FileWatcher(self.watcher.paths, **self.options)
+                    # 실패하는 동안 놓친 변경이 있을 수 있으므로 기다리던 작업을 모두 한 번 깨웁니다.
+                    self.loop.call_soon_threadsafe(self._wake_all)
+                    continue
+                if changed:
+                    self.loop.call_soon_threadsafe(self._notify, changed)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힌 경우 (종료 중)
+            pass
+        finally:
+            self.watcher.close()
+
+    def _notify(self, changed):
+        for path in changed:
+            for future in self.waiters.pop(path, ()):
+                if not future.done():
+                    future.set_result(path)
+
+    def wake_all(self):
+        """Wake every waiting task now, from any thread (e.g. a "check now" request)."""
+        self.loop.call_soon_threadsafe(self._wake_all)
+
+    def _wake_all(self):
+        waiters, self.waiters = self.waiters, {}
+        for futures in waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.set_result(None)
+
+    def set_paths(self, paths):
+        """Watch a new set of paths; the hub thread switches within a second."""
+        if sorted(map(os.path.abspath, paths)) != sorted(self.watcher.paths):
+            self.new_paths = list(paths)
+
+    async def wait(self, paths, timeout):
+        """Return True if one of `paths` changed within `timeout` seconds."""
+        import asyncio
+
+        future = self.loop.create_future()
+        keys = {os.path.abspath(p) for p in paths if p}
+        for key in keys:
+            self.waiters.setdefault(key, []).append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            for key in keys:
+                waiting = self.waiters.get(key)
+                if waiting and future in waiting:
+                    waiting.remove(future)
+                    if not waiting:
+                        del self.waiters[key]
+
+    def close(self):
+        self._stop.set()
+
+
+def measure_latency(backend, writes=5, interval=0.5, debounce=DEFAULT_DEBOUNCE_SECONDS):
+    """Return the seconds between appending to a temp file and waking up, one per write (None: no wakeup)."""
+    import tempfile
+    import threading
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "monitor.csv")
+        with open(path, "w") as f:
+            f.write("start\n")
+        watcher = FileWatcher([path], backend=backend, debounce=debounce)
+        latencies = []
+        try:
+            for i in range(writes):
+                # 이전 쓰기에서 남은 알림(close 등)은 비우고 시작합니다.
+                watcher.wait(0.1)
+                written = []
+
+                def append():
+                    time.sleep(interval)
+                    written.append(time.monotonic())
+                    with open(path, "a") as f:
+                        f.write(f"line {i}\n")
+
+                writer = threading.Thread(target=append)
+                writer.start()
+                changed = watcher.wait(10)
+                woke = time.monotonic()
+                writer.join()
+                latencies.append(woke - written[0] if changed == {path} else None)
+        finally:
+            watcher.close()
+    return latencies
+
+
+if __name__ == "__main__":
+    # python file_watch.py : 임시 폴더에서 (기본 설정 그대로) 알림 지연 시간을 측정해서 보여줍니다.
+    fixed_sleep = 60
+    print(f"fixed {fixed_sleep}s sleep : ~{fixed_sleep / 2:.1f} s average, {fixed_sleep:.1f} s worst case")
+    for backend in ("auto", "poll"):
+        woke = [latency for latency in measure_latency(backend) if latency is not None]
+        label = "native" if backend == "auto" else "polling"
+        if woke:
+            print(f"{label:<16}: {sum(woke) / len(woke):.3f} s average, {max(woke):.3f} s worst case")
+        else:
+            print(f"{label:<16}: no wakeup")
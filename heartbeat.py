@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime
+
+from checkpoint import write_json_atomic
+
+# 워커가 살아 있는지 tasklist / PowerShell 을 띄워서 확인하는 대신,
+# 워커가 주기마다 갱신하는 하트비트 파일(PID, 시각, 상태) 하나를 읽고 그 PID가 살아 있는지만 봅니다.
+#
+#   {"pid": 1234, "started_at": "...", "updated_at": 1700000000.0, "updated": "...",
+#    "status": "running", "stale_after": 180, "tools": {"default": "CSV"}}
+#
+# 중복 실행 방지는 잠금 파일(worker.lock)로 합니다. 작업 스케줄러가 워커를 직접 5분마다 실행해도
+# 이미 떠 있는 워커가 잠금을 쥐고 있으면 새 워커는 바로 종료합니다.
+
+HEARTBEAT_FILE = "worker_heartbeat.json"
+LOCK_FILE = "worker.lock"
+DEFAULT_MIN_INTERVAL = 5.0
+
+
+def pid_alive(pid):
+    """True if a process with this PID exists (one system call, no shell)."""
+    if not pid or pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            code = wintypes.DWORD()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return False
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_heartbeat(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def check_worker(path, now=None):
+    """Return (alive, heartbeat, reason) from the heartbeat file and a PID check."""
+    data = read_heartbeat(path)
+    if data is None:
+        return False, None, "no heartbeat"
+    if data.get("status") == "stopped":
+        return False, data, "stopped"
+    if not pid_alive(data.get("pid")):
+        return False, data, f"PID {data.get('pid')} is not running"
+    age = (now or time.time()) - data.get("updated_at", 0)
+    if age > data.get("stale_after", 180):
+        return False, data, f"heartbeat is {age:.0f} s old"
+    return True, data, "running"
+
+
+class Heartbeat:
+    def __init__(self, path, stale_after=180, min_interval=DEFAULT_MIN_INTERVAL):
+        self.path = path
+        self.stale_after = stale_after
+        self.min_interval = min_interval
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.last_written = 0.0
+        self.last_status = None
+        # 매번 함께 기록할 고정 값 (예: 제어 채널 포트/토큰)
+        self.extra = {}
+
+    def beat(self, status="running", force=False, **fields):
+        # 상태가 그대로면 min_interval 에 한 번만 씁니다 (파일 변경이 잦을 때 디스크 쓰기 절약).
+        now = time.time()
+        snapshot = (status, fields)
+        if not force and snapshot == self.last_status and now - self.last_written < self.min_interval:
+            return False
+        data = {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "updated_at": now,
+            "updated": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+            "status": status,
+            "stale_after": self.stale_after,
+        }
+        data.update(self.extra)
+        data.update(fields)
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            logging.error(f"[HEARTBEAT] Failed to write heartbeat file: {e}")
+            return False
+        self.last_written = now
+        self.last_status = snapshot
+        return True
+
+    def stop(self):
+        self.beat("stopped", force=True)
+
+
+class InstanceLock:
+    """Non-blocking exclusive lock on a file; held for the life of the process."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        self.file = open(self.path, "a+")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def lock_held(path):
+    """True if some running process holds the instance lock at `path` (i.e. a worker is alive)."""
+    if not os.path.exists(path):
+        return False
+    # 잠금을 잡을 수 있으면 잠금을 쥔 워커가 없다는 뜻이므로 바로 놓아 줍니다.
+    lock = InstanceLock(path)
+    if lock.acquire():
+        lock.release()
+        return False
+    return True
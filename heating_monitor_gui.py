@@ -6,13 +6,20 @@ import sys  # 파이썬 프로그램 자체를 제어하기 위한 도구 (예:
 import json  # 설정 같은 데이터를 파일로 저장하고 불러올 때 사용하는 도구 (JSON 형식)
 import subprocess  # 현재 파이썬 프로그램 바깥의 다른 프로그램(예: cmd 명령어)을 실행하기 위한 도구
 import locale # 시스템의 언어/국가 설정(로케일)을 가져와서 글자를 올바르게 변환하기 위한 도구
+import signal # 워커 프로세스를 PID로 종료하기 위한 도구
+import time # 하트비트가 몇 초 전에 갱신되었는지 계산하기 위한 도구
+import threading # 워커 상태 조회를 화면(GUI)과 다른 스레드에서 하기 위한 도구
+
+# 워커가 주기마다 갱신하는 하트비트 파일을 읽어서 살아 있는지 확인하는 도구 (heartbeat.py)
+from heartbeat import check_worker, lock_held, pid_alive, read_heartbeat, HEARTBEAT_FILE, LOCK_FILE
+from control_channel import ControlClient, ControlError # 실행 중인 워커에게 명령(상태/즉시 확인/종료)을 보내는 도구
 
 # PySide6는 파이썬으로 화면에 보이는 프로그램(GUI)을 만들게 해주는 도구 상자입니다.
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
     QSpinBox, QHBoxLayout, QMessageBox, QLineEdit, QFileDialog
 )
-from PySide6.QtCore import Qt # Qt의 추가적인 기능들(여기서는 사용되지 않지만 기본적으로 포함)
+from PySide6.QtCore import Qt, QTimer, Signal # QTimer: 일정 시간마다 함수를 실행해 주는 타이머, Signal: 다른 스레드의 결과를 화면 스레드로 전달
 
 # ## 프로그램의 기준 경로 설정 ##
 # 이 코드가 .py 파일로 실행되든, .exe 파일로 실행되든
@@ -37,29 +44,17 @@ def decode_bytes(b: bytes) -> str:
     enc = locale.getpreferredencoding(False) or "cp1252" # 시스템 기본 인코딩 가져오기
     return (b or b"").decode(enc, errors="ignore") # 변환 시도 (오류 나면 무시)
 
-def is_process_running(exe_name: str) -> bool:
-    """특정 이름의 프로그램(.exe)이 현재 실행 중인지 확인하는 함수"""
-    try:
-        # Windows의 'tasklist' 명령어를 사용해서 현재 실행 중인 프로그램 목록을 가져옴
-        # /FI "IMAGENAME eq ..." 부분은 이름이 정확히 일치하는 프로그램만 찾아달라는 의미
-        out = subprocess.check_output(
-            f'tasklist /FI "IMAGENAME eq {exe_name}" /NH',
-            shell=True
-        )
-        # 명령어 실행 결과를 사람이 읽을 수 있는 글자로 변환
-        txt = decode_bytes(out).strip()
-        # 결과가 비어있거나 '정보: 프로세스가 없습니다' 같은 메시지면 실행 중이 아닌 것
-        if not txt or txt.lower().startswith(("정보:", "info:")):
-            return False
-        # 결과에 프로그램 이름이 포함되어 있으면 실행 중인 것으로 판단
-        return exe_name.lower() in txt.lower()
-    except Exception:
-        # 명령 실행 중 오류가 발생하면 일단은 실행되지 않는 것으로 간주
-        return False
+def is_worker_running():
+    """워커가 실행 중인지 확인하는 함수 (하트비트 파일 읽기 + PID 확인, 명령 창을 띄우지 않음)"""
+    alive, heartbeat, reason = check_worker(get_path(HEARTBEAT_FILE))
+    return alive
 
 # ## 메인 프로그램 화면(GUI)을 정의하는 클래스 ##
 # QWidget을 상속받아 우리만의 창을 만듭니다.
 class GUI_App(QWidget):
+    # 상태 조회 스레드가 끝나면 (하트비트, 워커 응답) 을 화면 스레드로 보냄
+    worker_status_received = Signal(object, object)
+
     # __init__ 메서드는 이 클래스로 객체를 만들 때 가장 먼저 실행되는 '설정' 부분입니다.
     def __init__(self):
         super(GUI_App, self).__init__() # 부모 클래스(QWidget)의 설정 기능을 먼저 실행
@@ -125,14 +120,28 @@ class GUI_App(QWidget):
         self.start_button.clicked.connect(self.start_monitoring) # 버튼을 클릭하면 start_monitoring 함수 실행
         self.stop_button = QPushButton("Stop Monitoring") # '정지' 버튼
         self.stop_button.clicked.connect(self.stop_monitoring) # 버튼을 클릭하면 stop_monitoring 함수 실행
+        self.check_button = QPushButton("Check Now") # 다음 주기를 기다리지 않고 워커가 바로 확인하도록 요청
+        self.check_button.clicked.connect(self.check_now)
         button_layout.addWidget(self.start_button)
         button_layout.addWidget(self.stop_button)
+        button_layout.addWidget(self.check_button)
         main_layout.addLayout(button_layout)
 
         # --- 6. 상태 표시줄 ---
         self.status_label = QLabel("Status: Idle") # 현재 프로그램 상태를 보여줄 글자
         main_layout.addWidget(self.status_label)
 
+        # --- 7. 워커 상태 (하트비트) ---
+        self.worker_label = QLabel("Worker: -") # 워커가 살아 있는지, 마지막 갱신 시각 등을 보여줄 글자
+        main_layout.addWidget(self.worker_label)
+        # 5초마다 하트비트 파일을 다시 읽어서 워커 상태를 갱신
+        self.status_request_running = False # 이전 조회가 아직 끝나지 않았으면 새로 보내지 않음
+        self.worker_status_received.connect(self.show_worker_status)
+        self.worker_timer = QTimer(self)
+        self.worker_timer.timeout.connect(self.refresh_worker_status)
+        self.worker_timer.start(5000)
+        self.refresh_worker_status()
+
         # 최종적으로 완성된 메인 레이아웃을 이 창의 레이아웃으로 설정
         self.setLayout(main_layout)
 
@@ -194,14 +203,22 @@ class GUI_App(QWidget):
     def save_settings(self) -> bool:
         """현재 화면에 입력된 값들을 settings.json 파일에 저장"""
         config_path = get_path("settings.json")
-        settings = { # 화면의 값들을 딕셔너리 형태로 정리
+        # 화면에 없는 설정(여러 장비 목록 "tools" 등)은 지우지 않도록 기존 파일 내용 위에 덮어씀
+        settings = {}
+        if os.path.exists(config_path):
+            try:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    settings = json.load(f)
+            except Exception:
+                settings = {}
+        settings.update({ # 화면의 값들을 딕셔너리 형태로 정리
             "interval_minutes": self.interval_spinbox.value(),
             "threshold": self.threshold_spinbox.value(),
             "monitoring_log_file_path": self.monitoring_log_input.text(),
             "log_file_path": self.log_file_input.text(),
             "converted_log_file_path": self.converted_log_input.text(),
             "converter_exe_name": self.converter_name_input.text(),
-        }
+        })
         try:
             with open(config_path, "w", encoding="utf-8") as f:
                 # 딕셔너리를 JSON 형식의 문자열로 변환하여 파일에 쓰기
@@ -213,6 +230,59 @@ class GUI_App(QWidget):
             QMessageBox.critical(self, "Save Error", f"설정 저장 실패: {e}")
             return False # 저장 실패
 
+    def refresh_worker_status(self):
+        """하트비트 파일을 읽어서 워커 상태 글자를 갱신하는 함수"""
+        alive, heartbeat, reason = check_worker(get_path(HEARTBEAT_FILE))
+        if not alive:
+            self.worker_label.setText(f"Worker: Not running ({reason})")
+            return
+        # 제어 채널로 물어볼 수 있으면 LOG 모드의 heating 횟수까지 보여줌 (응답이 없으면 하트비트 내용만 표시)
+        # 응답이 늦어도 화면이 멈추지 않도록 별도 스레드에서 물어봄
+        client = ControlClient.from_heartbeat(get_path(HEARTBEAT_FILE), timeout=1.0)
+        if client is None:
+            self.show_worker_status(heartbeat, None)
+            return
+        if self.status_request_running:
+            return
+        self.status_request_running = True
+        threading.Thread(target=self.fetch_worker_status, args=(client, heartbeat), daemon=True).start()
+
+    def fetch_worker_status(self, client, heartbeat):
+        """(상태 조회 스레드) 워커에게 상태를 물어보고 결과를 화면 스레드로 보내는 함수"""
+        try:
+            status = client.status()
+        except ControlError:
+            status = {}
+        self.worker_status_received.emit(heartbeat, status)
+
+    def show_worker_status(self, heartbeat, status):
+        """워커 상태 글자를 갱신하는 함수 (status 가 비어 있으면 하트비트 내용만 표시)"""
+        if status is not None:
+            self.status_request_running = False
+        age = time.time() - heartbeat.get("updated_at", 0)
+        tools = ", ".join(f"{name}={state}" for name, state in (heartbeat.get("tools") or {}).items())
+        try:
+            if status:
+                # 임계값과 비교되는 값(CSV 트리거 + 변환 로그의 heating 수)을 보여줌
+                tools = ", ".join(
+                    f"{name}={tool['state']}" + (f" ({tool.get('total_count', tool['heating_count'])}/{tool['threshold']})" if tool["state"] == "LOG" else "")
+                    for name, tool in status["tools"].items())
+        except KeyError:
+            pass
+        self.worker_label.setText(f"Worker: Running (PID {heartbeat['pid']}, updated {age:.0f} s ago) {tools}")
+
+    def check_now(self):
+        """'Check Now' 버튼: 워커에게 지금 바로 CSV/로그를 확인하라고 요청"""
+        client = ControlClient.from_heartbeat(get_path(HEARTBEAT_FILE))
+        if client is None:
+            QMessageBox.warning(self, "Check Now", "Worker is not running.")
+            return
+        try:
+            client.check_now()
+            self.status_label.setText("Status: Check requested.")
+        except ControlError as e:
+            QMessageBox.warning(self, "Check Now", f"Worker did not respond: {e}")
+
     # ------- 모니터링 시작/정지 핵심 기능 -------
     def start_monitoring(self):
         """'시작' 버튼을 눌렀을 때 실행되는 모든 작업"""
@@ -229,58 +299,30 @@ class GUI_App(QWidget):
                 QMessageBox.critical(self, "Start Error", f"Worker executable not found:\n{worker_exe_path}")
                 return
 
-            worker_dir = os.path.dirname(worker_exe_path) # 워커가 있는 폴더
-            worker_name_no_ext = os.path.splitext(os.path.basename(self.worker_exe_name))[0] # 확장자(.exe)를 뺀 이름
-
-            # 2. PowerShell 스크립트 파일 동적 생성
-            # 이 스크립트의 역할: "워커 프로그램이 실행 중인지 확인하고, 꺼져있으면 켜줘"
-            ps1_path = os.path.abspath(get_path("monitor_worker.ps1"))
-            ps1_content = f"""\
-# monitor_worker.ps1
-# 존재하면 아무 것도 안 함, 없으면 워커 실행 (작업 디렉터리 고정)
-$ErrorActionPreference = 'SilentlyContinue'
-$n = '{worker_name_no_ext}'
-$exe = '{worker_exe_path.replace("'", "''")}'
-$wd  = '{worker_dir.replace("'", "''")}'
-
-$p = Get-Process -Name $n -ErrorAction SilentlyContinue
-if (-not $p) {{
-    Start-Process -FilePath $exe -WorkingDirectory $wd -WindowStyle Hidden
-}}
-"""
-            with open(ps1_path, "w", encoding="utf-8") as f:
-                f.write(ps1_content)
-
-            # 3. VBScript 파일 동적 생성
-            # 이 스크립트의 역할: "위에서 만든 PowerShell 스크립트를 '완전 몰래' (까만 창 없이) 실행해줘"
-            vbs_path = os.path.abspath(get_path("run_monitor_silent.vbs"))
-            vbs_content = f'''\
-Set WshShell = CreateObject("WScript.Shell")
-cmd = "powershell.exe -NoProfile -NonInteractive -ExecutionPolicy Bypass -File ""{ps1_path}"""
-WshShell.Run cmd, 0, False
-Set WshShell = Nothing
-'''
-            with open(vbs_path, "w", encoding="utf-8") as f:
-                f.write(vbs_content)
-
-            # 4. Windows 작업 스케줄러에 등록
-            # "위에서 만든 VBScript를 5분마다 한 번씩 실행해줘" 라고 Windows에 예약하는 작업
+            # 2. 예전 버전이 만들던 PowerShell/VBScript 파일은 더 이상 쓰지 않으므로 지움
+            for old_file in ("monitor_worker.ps1", "run_monitor_silent.vbs"):
+                if os.path.exists(get_path(old_file)):
+                    os.remove(get_path(old_file))
+
+            # 3. Windows 작업 스케줄러에 등록
+            # "워커를 5분마다 직접 실행해줘" 라고 Windows에 예약하는 작업
+            # 워커는 이미 다른 워커가 실행 중이면(잠금 파일) 바로 종료하므로, 중복 실행되지 않음
             monitor_task_name = "HeatingWorkerMonitor"
-            cmd_monitor = f'schtasks /Create /TN "{monitor_task_name}" /TR "{vbs_path}" /SC MINUTE /MO 5 /F'
+            cmd_monitor = f'schtasks /Create /TN "{monitor_task_name}" /TR "\\"{worker_exe_path}\\"" /SC MINUTE /MO 5 /F'
             subprocess.run(cmd_monitor, check=True, shell=True, capture_output=True)
 
-            # 5. (옵션) 로그인 시 자동 실행 등록
+            # 4. (옵션) 로그인 시 자동 실행 등록
             # "컴퓨터를 켤 때마다 워커 프로그램을 한 번 실행해줘" 라고 Windows에 예약
             self.register_worker_autostart()
 
-            # 6. [이번 코드의 변경점] 'Start' 버튼 클릭 시, 워커가 꺼져있으면 즉시 1회 실행
-            if not is_process_running(self.worker_exe_name):
+            # 5. 'Start' 버튼 클릭 시, 워커가 꺼져있으면 즉시 1회 실행
+            if not is_worker_running():
                 subprocess.Popen([worker_exe_path], # Popen은 다른 프로그램을 실행하고 기다리지 않음
                                  creationflags=subprocess.DETACHED_PROCESS, # 이 GUI 프로그램과 완전히 독립적으로 실행
                                  close_fds=True)
 
             # 모든 작업이 성공했음을 사용자에게 알림
-            QMessageBox.information(self, "Success", "Monitoring registered: every 5 min hidden check & autorun at logon. (Started now if it wasn't running.)")
+            QMessageBox.information(self, "Success", "Monitoring registered: worker restarted every 5 min if stopped & autorun at logon. (Started now if it wasn't running.)")
             self.status_label.setText("Status: Monitoring Registered & Started.")
 
         except subprocess.CalledProcessError as e: # 명령어 실행 실패 시
@@ -304,16 +346,33 @@ Set WshShell = Nothing
             # 작업이 원래 없어서 삭제 실패해도 오류를 내지 않고 그냥 넘어감
             pass
 
-        # 현재 실행 중인 워커 프로세스를 강제 종료
-        try:
-            subprocess.run(f'taskkill /F /IM "{self.worker_exe_name}"',
-                           shell=True, check=True, capture_output=True)
-            # start_monitoring 내부에서 호출된 게 아닐 때만 성공 메시지를 보여줌
-            if not is_starting:
-                QMessageBox.information(self, "Success", "Monitoring stopped and auto-run unregistered.")
-        except subprocess.CalledProcessError:
-            # 프로세스가 원래 없어서 종료 실패해도 그냥 넘어감
-            pass
+        heartbeat = read_heartbeat(get_path(HEARTBEAT_FILE)) or {}
+        pid = heartbeat.get("pid")
+        # 먼저 제어 채널로 정상 종료를 요청 (워커가 체크포인트를 저장하고 스스로 끝남)
+        client = ControlClient.from_heartbeat(get_path(HEARTBEAT_FILE))
+        if client is not None:
+            try:
+                client.shutdown()
+                for _ in range(50): # 최대 5초 동안 워커가 실제로 끝났는지 (잠금을 놓았는지) 확인
+                    if not lock_held(get_path(LOCK_FILE)):
+                        break
+                    time.sleep(0.1)
+            except ControlError:
+                pass
+
+        # 그래도 워커가 남아 있으면 (멈춘 워커, 하트비트가 오래된 워커 포함) 하트비트 파일의 PID로 강제 종료
+        # 멈춘 워커가 worker.lock 을 계속 잡고 있으면 5분 작업이 새 워커를 띄울 수 없기 때문입니다.
+        # 단, PID는 재부팅이나 워커 종료 후 다른 프로그램에 재사용될 수 있으므로
+        # 워커가 잠금을 쥐고 있고 하트비트가 "stopped" 가 아닐 때만 그 PID를 워커로 믿습니다.
+        if heartbeat.get("status") != "stopped" and lock_held(get_path(LOCK_FILE)) and pid_alive(pid):
+            try:
+                os.kill(pid, signal.SIGTERM) # Windows에서는 TerminateProcess로 종료됨
+            except OSError:
+                # 그 사이에 프로세스가 이미 끝났으면 그냥 넘어감
+                pass
+        # start_monitoring 내부에서 호출된 게 아닐 때만 성공 메시지를 보여줌
+        if not is_starting:
+            QMessageBox.information(self, "Success", "Monitoring stopped and auto-run unregistered.")
 
         # 상태 표시줄을 초기 상태로 변경
         self.status_label.setText("Status: Idle.")
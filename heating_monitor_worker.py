@@ -1,14 +1,11 @@
 import os
 import sys
 import time
-import json
-import signal
-import re
-import subprocess
-import logging
-from logging.handlers import RotatingFileHandler
-from datetime import datetime, timedelta
-import ctypes # ctypes 모듈을 여기에 명시적으로 import 합니다.
+from startup_profile import STARTUP, lazy_import
+# --profile-startup: 아래부터의 import 시간을 모듈별로 잽니다.
+if "--profile-startup" in sys.argv:
+    STARTUP.profile_imports()
+from heartbeat import Heartbeat, InstanceLock, HEARTBEAT_FILE, LOCK_FILE
 
 # Path Configuration
 if getattr(sys, 'frozen', False):
@@ -19,6 +16,40 @@ else:
 def get_path(filename):
     return os.path.join(BASE_PATH, filename)
 
+# 작업 스케줄러가 주기적으로 워커를 직접 실행하므로, 이미 실행 중이면 (가장 흔한 재실행)
+# 기능 모듈을 하나도 불러오기 전에 조용히 종료합니다.
+if __name__ == "__main__":
+    instance_lock = InstanceLock(get_path(LOCK_FILE))
+    if not instance_lock.acquire():
+        sys.exit(0)
+
+import json
+import signal
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from datetime import datetime, timedelta
+from log_tail import TailReader
+from log_rules import RuleSet, ROLE_RESET
+from event_window import SlidingWindowCounter
+from monitor_state import HeatingStateMachine, STATE_CSV, STATE_LOG
+from worker_metrics import WorkerMetrics
+from latency import EventTrace
+from poll_scheduler import PollScheduler
+from tool_profiles import DEFAULT_TOOL_NAME, load_tool_profiles, find_path_conflicts, current_tool
+from log_setup import QueueLogging, parse_level, DEFAULT_REPEAT_SECONDS, RATE_LIMITED
+from converter_stream import output_mode
+
+# 무거운 모듈은 처음 쓸 때 로드합니다. asyncio 는 비동기 런타임에서만 로드되고,
+# 제어 채널/감시기/저널/경보/체크포인트 같은 기능 모듈과 subprocess/ctypes 는 쓰는 함수 안에서 import 합니다.
+asyncio = lazy_import("asyncio")
+
+def _frozen_imports():
+    # 호출하지 않습니다. PyInstaller 가 lazy_import 로 불러오는 모듈도 exe 에 포함하도록 import 문만 남겨 둡니다.
+    import asyncio
+
+STARTUP.mark("imports")
+
 # --- Critical Modification for Logging ---
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
@@ -28,16 +59,42 @@ log_file_path = get_path("worker.log")
 file_handler = RotatingFileHandler(log_file_path, maxBytes=2_000_000, backupCount=3)
 
 file_handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(tool_prefix)s%(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+
+# 감시 루프에서는 큐에 넣기만 하고, 파일/콘솔 쓰기는 QueueListener 스레드가 합니다.
+log_queue = QueueLogging([file_handler, console_handler])
+log_queue.install(logger)
 # --- End of Modification ---
 
+DEFAULT_RULE_SET = RuleSet.from_settings({})
+
+# 단계별 소요 시간과 트리거/경보/변환 실패 횟수 (Prometheus textfile / HTTP 로 내보냄)
+METRICS = WorkerMetrics()
+
+
+def apply_log_settings(settings):
+    file_level = parse_level(settings.get("log_level"), logging.DEBUG)
+    console_level = parse_level(settings.get("console_log_level"), logging.INFO)
+    file_handler.setLevel(file_level)
+    console_handler.setLevel(console_level)
+    # 두 핸들러가 모두 버릴 로그는 아예 만들지 않도록 루트 로거 레벨도 맞춥니다.
+    logger.setLevel(min(file_level, console_level))
+    log_queue.repeat_filter.repeat_seconds = settings.get("log_repeat_seconds", DEFAULT_REPEAT_SECONDS)
+    logging.info(f"[CONFIG] Log level: file {logging.getLevelName(file_level)}, console {logging.getLevelName(console_level)}, "
+                 f"repeated messages at most every {log_queue.repeat_filter.repeat_seconds} s")
+
+def detach_log_file(console_level=logging.WARNING):
+    # replay/backtest 처럼 워커 코드를 가져다 쓰는 도구는 worker.log 에 쓰지 않고 콘솔에만 남깁니다.
+    log_queue.set_handlers([console_handler])
+    file_handler.close()
+    console_handler.setLevel(console_level)
+    logger.setLevel(console_level)
+    log_queue.repeat_filter.repeat_seconds = 0
 
 def write_pid():
     try:
@@ -51,202 +108,1037 @@ def load_settings():
     try:
         with open(get_path("settings.json"), "r", encoding="utf-8") as f:
             settings = json.load(f)
-        logging.info(f"[CONFIG] Settings loaded successfully: {json.dumps(settings, ensure_ascii=False)}")
+        tools = settings.get("tools") or []
+        logging.info(f"[CONFIG] Settings loaded successfully ({len(settings)} keys, {len(tools) or 1} tool(s)).")
+        if logger.isEnabledFor(logging.DEBUG):
+            logging.debug(f"[CONFIG] Settings: {json.dumps(settings, ensure_ascii=False)}")
         return settings
     except Exception as e:
         logging.error(f"[CONFIG] Failed to load settings: {e}")
         return {}
 
-def show_alert():
+def show_alert(tool_name=None):
     logging.warning("[ALERT] Displaying alarm pop-up.")
     try:
+        import ctypes # ctypes 모듈을 여기에 명시적으로 import 합니다. (팝업을 띄울 때만 로드)
         # MB_SYSTEMMODAL 플래그 (0x00001000)를 사용하여 팝업을 최상단에 고정합니다.
         # 이 옵션은 사용자가 확인 버튼을 누를 때까지 다른 창을 조작할 수 없게 만듭니다.
         MB_SYSTEMMODAL = 0x00001000
         alert_style = 0x40 | 0x0 | MB_SYSTEMMODAL
         
+        message = "FIB Heating작업이 비정상적으로 반복되거나 정상완료되지 않고 있습니다.\n Please call Maint. P&T1-52964-, M14-46848-"
+        title = "Heating Alert"
+        if tool_name and tool_name != DEFAULT_TOOL_NAME:
+            message += f"\n\nTool: {tool_name}"
+            title += f" - {tool_name}"
         ctypes.windll.user32.MessageBoxW(
             0,
-            "FIB Heating작업이 비정상적으로 반복되거나 정상완료되지 않고 있습니다.\n Please call Maint. P&T1-52964-, M14-46848-",
-            "Heating Alert",
+            message,
+            title,
             alert_style
         )
     except Exception as e:
         logging.error(f"[ALERT] Failed to display pop-up: {e}")
 
-def parse_csv_for_trigger(csv_path, last_processed_time):
+def parse_csv_triggers(csv_path, last_processed_time, reader=None, rules=None):
+    """Return the timestamps of all new trigger lines after `last_processed_time`, oldest first."""
+    triggers = []
     try:
-        with open(csv_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()[-300:]
-            for line in reversed(lines):
-                parts = line.strip().split(";")
-                if len(parts) < 2:
+        # reader가 있으면 지난번 이후 새로 추가된 줄만 읽습니다. (작업량은 파일 크기가 아니라 새 줄 수에 비례)
+        if reader is None:
+            reader = TailReader(csv_path)
+        csv_rules = (rules or DEFAULT_RULE_SET).csv
+        bytes_before = reader.bytes_read
+        while True:
+            # 밀린 부분이 많으면 (체크포인트에서 재개 등) 블록 단위로 나눠 읽습니다.
+            position_before = (reader.offset, list(reader.pending))
+            with METRICS.timer("csv_read"):
+                lines = reader.read_lines()
+            for line in lines:
+                rule = csv_rules.match(line)
+                if rule is None:
                     continue
-                timestamp_str = parts[0].strip()
-                event = parts[1].strip()
-                if "Heating Steadfast ON" in event:
-                    try:
-                        ts = datetime.strptime(timestamp_str, "%Y/%m/%d %H:%M:%S.%f")
-                    except ValueError:
-                        ts = datetime.strptime(timestamp_str, "%Y/%m/%d %H:%M:%S")
-
-                    if ts > last_processed_time:
-                        logging.debug(f"[CSV_WATCH] Valid trigger found: {ts} (Reference time: {last_processed_time})")
-                        return True, ts
+                try:
+                    ts = rule.extract_timestamp(line)
+                except ValueError as e:
+                    logging.debug(f"[CSV_WATCH] Skipping line with unreadable timestamp ({e}): {line.strip()}")
+                    continue
+
+                if ts > last_processed_time:
+                    logging.debug(f"[CSV_WATCH] Valid trigger found: {ts} (Reference time: {last_processed_time})")
+                    triggers.append(ts)
+            if not reader.remaining or (reader.offset, reader.pending) == position_before:
+                break
+        METRICS.inc("csv_bytes_read", reader.bytes_read - bytes_before)
     except (IOError, PermissionError) as e:
         logging.error(f"[CSV_WATCH] Error accessing file (locked or permission issue): {e}")
     except Exception as e:
         logging.error(f"[CSV_WATCH] Unknown error occurred during CSV parsing: {e}")
-    return False, None
+    return triggers
 
-def convert_log(settings):
-    try:
-        converter_name = settings.get("converter_exe_name", "g4_converter.exe")
-        source_log_path = settings.get("log_file_path")
-        target_txt_path = settings.get("converted_log_file_path")
-        
-        converter_exe_path = get_path(converter_name)
+def build_converter_command(settings, require_target=True):
+    converter_name = settings.get("converter_exe_name", "g4_converter.exe")
+    source_log_path = settings.get("log_file_path")
+    target_txt_path = settings.get("converted_log_file_path")
 
-        if not os.path.exists(converter_exe_path):
-            logging.error(f"[LOG_WATCH] Converter executable not found: {converter_exe_path}")
-            return False
-        if not source_log_path or not os.path.exists(source_log_path):
-            logging.error(f"[LOG_WATCH] Source log file path is invalid or file does not exist: {source_log_path}")
-            return False
-        if not target_txt_path:
-            logging.error(f"[LOG_WATCH] Path to save converted log is not set")
+    converter_exe_path = get_path(converter_name)
+
+    if not os.path.exists(converter_exe_path):
+        logging.error(f"[LOG_WATCH] Converter executable not found: {converter_exe_path}")
+        return None
+    if not source_log_path or not os.path.exists(source_log_path):
+        logging.error(f"[LOG_WATCH] Source log file path is invalid or file does not exist: {source_log_path}")
+        return None
+    if not target_txt_path and require_target:
+        logging.error(f"[LOG_WATCH] Path to save converted log is not set")
+        return None
+
+    # 테스트용 파이썬 변환기(fake_g4_converter.py)는 지금 쓰는 파이썬으로 실행합니다.
+    prefix = [sys.executable] if converter_exe_path.endswith(".py") and not getattr(sys, "frozen", False) else []
+    return prefix + [converter_exe_path, source_log_path, target_txt_path]
+
+def convert_log(settings, cache=None, trace=None):
+    import subprocess # 변환이 필요할 때만 로드합니다.
+    timeout = settings.get("converter_timeout_seconds", 15)
+    try:
+        command = build_converter_command(settings)
+        if command is None:
             return False
+        source_log_path, target_txt_path = command[-2:]
 
-        command = [converter_exe_path, source_log_path, target_txt_path]
+        if cache is not None:
+            if cache.is_fresh(source_log_path, target_txt_path):
+                cache.skipped += 1
+                METRICS.inc("converter_skipped")
+                logging.debug(f"[LOG_WATCH] Source log unchanged since last conversion, reusing: {target_txt_path}")
+                return True
+            snapshot = cache.snapshot(source_log_path)
 
         logging.debug(f"[LOG_WATCH] Executing converter: {' '.join(command)}")
-        subprocess.run(command, check=True, capture_output=True, text=True, timeout=15)
+        METRICS.inc("converter_runs")
+        METRICS.set_gauge("source_log_bytes", os.path.getsize(source_log_path))
+        started = datetime.now()
+        with METRICS.timer("convert"):
+            subprocess.run(command, check=True, capture_output=True, text=True, timeout=timeout)
         
         logging.debug(f"[LOG_WATCH] Converter executed successfully, result file: {target_txt_path}")
+        if trace is not None:
+            trace.on_conversion(started, datetime.now())
+        if cache is not None:
+            cache.record(snapshot, target_txt_path)
         return True
         
     except subprocess.TimeoutExpired:
-        logging.error("[LOG_WATCH] Converter execution timed out (15 seconds). The converter process might be stuck.")
+        METRICS.inc("converter_failures")
+        logging.error(f"[LOG_WATCH] Converter execution timed out ({timeout} seconds). The converter process might be stuck.")
+        if cache is not None:
+            cache.mark_failed()
         return False
     except subprocess.CalledProcessError as e:
+        METRICS.inc("converter_failures")
         logging.error(f"[LOG_WATCH] Converter execution failed: {e.stderr}")
+        if cache is not None:
+            cache.mark_failed()
         return False
     except Exception as e:
+        METRICS.inc("converter_failures")
         logging.error(f"[LOG_WATCH] Exception occurred during converter execution: {e}")
         return False
 
-def parse_converted_log(txt_path, threshold, initial_time=None):
-    count = 0
-    reset = False
+async def convert_log_async(settings, cache=None, slots=None, trace=None):
+    # convert_log()의 asyncio 버전: 변환기가 멈춰도 이벤트 루프(다른 단계)는 계속 돌아갑니다.
+    timeout = settings.get("converter_timeout_seconds", 15)
+    command = build_converter_command(settings)
+    if command is None:
+        return False
+    source_log_path, target_txt_path = command[-2:]
+
+    if cache is not None:
+        if cache.is_fresh(source_log_path, target_txt_path):
+            cache.skipped += 1
+            METRICS.inc("converter_skipped")
+            logging.debug(f"[LOG_WATCH] Source log unchanged since last conversion, reusing: {target_txt_path}")
+            return True
+        snapshot = cache.snapshot(source_log_path)
+
+    # 변환 지연은 슬롯을 기다린 시간까지 포함해서 잽니다.
+    requested = datetime.now()
+    if slots is None:
+        slots = asyncio.Semaphore(1)
+    # 여러 장비가 동시에 변환기를 띄우지 않도록 동시 실행 개수를 제한합니다 (대기 순서는 FIFO).
+    async with slots:
+        logging.debug(f"[LOG_WATCH] Executing converter: {' '.join(command)}")
+        METRICS.inc("converter_runs")
+        METRICS.set_gauge("source_log_bytes", os.path.getsize(source_log_path))
+        started = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except Exception as e:
+            METRICS.inc("converter_failures")
+            logging.error(f"[LOG_WATCH] Exception occurred during converter execution: {e}")
+            return False
+
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # 시간 초과 또는 취소 시 변환기 프로세스를 반드시 정리합니다.
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            METRICS.inc("converter_failures")
+            if cache is not None:
+                cache.mark_failed()
+            if isinstance(e, asyncio.CancelledError):
+                logging.warning("[LOG_WATCH] Converter run cancelled, process killed.")
+                raise
+            logging.error(f"[LOG_WATCH] Converter execution timed out ({timeout} seconds). The converter process might be stuck.")
+            return False
+        finally:
+            METRICS.observe("convert", time.perf_counter() - started)
+
+    if proc.returncode != 0:
+        METRICS.inc("converter_failures")
+        logging.error(f"[LOG_WATCH] Converter execution failed: {stderr.decode(errors='ignore')}")
+        if cache is not None:
+            cache.mark_failed()
+        return False
+
+    logging.debug(f"[LOG_WATCH] Converter executed successfully, result file: {target_txt_path}")
+    if trace is not None:
+        trace.on_conversion(requested, datetime.now())
+    if cache is not None:
+        cache.record(snapshot, target_txt_path)
+    return True
+
+def read_new_converted_events(txt_path, window, rules=None):
+    from contextlib import closing
+    from log_scan import scan_reverse
+    # 워터마크(지난번에 마지막으로 본 이벤트 시각) 이후의 이벤트만 끝에서부터 거꾸로 읽어옵니다.
+    converted_rules = (rules or DEFAULT_RULE_SET).converted
+    events = []
     try:
-        with open(txt_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()[-1000:]
-            for line in reversed(lines):
-                if "The FIB source is working properly." in line:
-                    ts_match = re.search(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", line)
-                    if ts_match:
-                        try:
-                            log_ts = datetime.strptime(ts_match.group(1), "%Y-%m-%d %H:%M:%S")
-                            if initial_time and log_ts > initial_time:
-                                logging.debug(f"[LOG_WATCH] Valid 'working properly' log found: {line.strip()}")
-                                reset = True
-                                break
-                        except ValueError: continue
-                
-                if "The FIB source is heating" in line:
-                    ts_match = re.search(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", line)
-                    if ts_match:
-                        try:
-                            log_ts = datetime.strptime(ts_match.group(1), "%Y-%m-%d %H:%M:%S")
-                            if initial_time and log_ts > initial_time:
-                                logging.debug(f"[LOG_WATCH] Valid heating log detected: {line.strip()}")
-                                count += 1
-                        except ValueError: continue
-                    if count >= threshold: break
+        with closing(scan_reverse(txt_path, converted_rules.bytes_pattern)) as matches:
+            for rule_name, raw_line in matches:
+                rule = converted_rules.by_name[rule_name]
+                line = raw_line.decode("utf-8", errors="ignore")
+                try:
+                    log_ts = rule.extract_timestamp(line)
+                except ValueError:
+                    continue
+                if log_ts < window.watermark or log_ts <= window.start_time:
+                    break
+                is_reset = rule.role == ROLE_RESET
+                if is_reset:
+                    logging.debug(f"[LOG_WATCH] Valid 'working properly' log found: {line.strip()}")
+                else:
+                    logging.debug(f"[LOG_WATCH] Valid heating log detected: {line.strip()}")
+                events.append((log_ts, is_reset))
     except (IOError, PermissionError) as e:
         logging.error(f"[LOG_WATCH] Converted log file access error (locked or permission issue): {e}")
+        return []
     except Exception as e:
         logging.error(f"[LOG_WATCH] Unknown error occurred during converted log parsing: {e}")
-    return count, reset
+        return []
+    events.reverse()
+    return events
 
-def monitor_loop(settings):
-    threshold = settings.get("threshold", 3)
-    csv_path = settings.get("monitoring_log_file_path", "")
-    log_mode_timeout_minutes = settings.get("interval_minutes", 60)
-    
+def pending_rotated_sources(settings, since, done):
+    from log_rotation import rotated_members
+    # LOG 모드가 시작된 뒤 원본 .log 가 돌려쓰기되었다면, 그 이전 파일(file.1, file.1.gz, ...)에도 이벤트가 있습니다.
+    source_path = settings.get("log_file_path")
+    if not source_path or since is None:
+        return []
+    return [(member, key) for member, key in rotated_members(source_path, since) if key not in done]
+
+def analyze_rotated_sources(settings, members, initial_time, window, cache, rules=None, trace=None, done=None):
+    """Convert rotated source logs (oldest first) and count their events before the live log."""
+    from log_rotation import is_compressed, copy_member
+    import shutil
+    import tempfile
+    if window.start_time != initial_time:
+        window.start(initial_time)
+    workdir = tempfile.mkdtemp(prefix="g4_rotated_")
+    try:
+        for member, key in members:
+            source_path = member
+            if is_compressed(member):
+                # 변환기는 일반 파일만 읽으므로 임시 파일로 스트리밍 압축 해제합니다.
+                source_path = os.path.join(workdir, "rotated.log")
+                copy_member(member, source_path)
+            target_path = os.path.join(workdir, "rotated.txt")
+            member_settings = dict(settings, log_file_path=source_path, converted_log_file_path=target_path)
+            if not convert_log(member_settings):
+                # 더 새로운 파일로 넘어가면 이 파일의 이벤트가 영영 빠지므로 여기서 멈추고 다음 주기에 이 파일부터 다시 합니다.
+                logging.warning(f"[LOG_WATCH] Conversion of rotated log '{os.path.basename(member)}' failed - Retrying in next cycle.")
+                break
+            added = window.advance(read_new_converted_events(target_path, window, rules))
+            if trace is not None:
+                trace.on_events(added)
+            if added:
+                # 창이 바뀌었으므로 원본이 그대로여도 지난번 분석 결과를 재사용하지 않습니다.
+                cache.results.clear()
+            if done is not None:
+                done.add(key)
+            logging.info(f"[LOG_WATCH] Rotated source log '{os.path.basename(member)}' analyzed: {len(added)} new event(s).")
+    except (OSError, EOFError) as e:
+        logging.error(f"[LOG_WATCH] Could not read rotated source log: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def analyze_converted_log(converted_log_path, initial_time, window, cache, rules=None, trace=None):
+    # LOG 모드에 새로 들어왔으면 창을 비우고 그 트리거 시각부터 다시 셉니다.
+    if window.start_time != initial_time:
+        window.start(initial_time)
+    # 원본이 그대로라 변환을 건너뛰었다면 새 이벤트도 없으므로 다시 읽지 않습니다.
+    # (그 사이 CSV 트리거가 창에 더해졌을 수 있으므로 개수는 항상 창에서 직접 가져옵니다.)
+    if cache.get_result(initial_time) is None:
+        with METRICS.timer("parse"):
+            added = window.advance(read_new_converted_events(converted_log_path, window, rules))
+        if trace is not None:
+            trace.on_events(added)
+        try:
+            METRICS.set_gauge("converted_log_bytes", os.path.getsize(converted_log_path))
+        except OSError:
+            pass
+        cache.put_result(True, initial_time)
+    logging.debug(f"[LOG_WATCH] Converter launches: {cache.launches}, skipped (source unchanged): {cache.skipped}")
+    return window.count, window.reset_seen
+
+def stream_converted_log(settings, initial_time, window, cache=None, rules=None, trace=None, on_start=None):
+    """Streaming converter mode: parse the converter output as it arrives and stop the
+    converter as soon as a reset line is seen (see the decision rule in event_window.py).
+
+    Returns (count, reset) like analyze_converted_log, or None if the conversion failed.
+    """
+    from converter_stream import StreamingConversion
+    command = build_converter_command(settings, require_target=False)
+    if command is None:
+        return None
+    converter_path, source_log_path = command[-3:-1]
+    if window.start_time != initial_time:
+        window.start(initial_time)
+
+    snapshot = None
+    if cache is not None:
+        if cache.get_result(initial_time) is not None and cache.is_fresh(source_log_path, None):
+            cache.skipped += 1
+            METRICS.inc("converter_skipped")
+            logging.debug("[LOG_WATCH] Source log unchanged since last streamed conversion, reusing the result.")
+            return window.count, window.reset_seen
+        snapshot = cache.snapshot(source_log_path)
+
+    conversion = StreamingConversion(
+        converter_path, source_log_path, output_mode(settings),
+        timeout=settings.get("converter_timeout_seconds", 15),
+        stdout_arg=settings.get("converter_stdout_arg", "-"),
+        prefix=command[:-3],
+    )
+    if on_start is not None:
+        on_start(conversion)
+    converted_rules = (rules or DEFAULT_RULE_SET).converted
+    logging.debug(f"[LOG_WATCH] Streaming converter output ({conversion.mode}): {converter_path} {source_log_path}")
+    METRICS.inc("converter_runs")
+    METRICS.set_gauge("source_log_bytes", os.path.getsize(source_log_path))
+    started = datetime.now()
+    added = []
+    window.begin_pass()
+    lines = conversion.lines()
+    try:
+        with METRICS.timer("convert"):
+            for line in lines:
+                rule = converted_rules.match(line)
+                if rule is None:
+                    continue
+                try:
+                    log_ts = rule.extract_timestamp(line)
+                except ValueError:
+                    continue
+                is_reset = rule.role == ROLE_RESET
+                if not window.feed(log_ts, is_reset):
+                    continue
+                added.append((log_ts, is_reset))
+                # 리셋은 묶음 안 어디에 있든 이기므로 바로 끝냅니다. 임계값에 도달해도 뒤에 리셋이 있을 수 있어 끝까지 읽습니다.
+                if is_reset:
+                    conversion.stop()
+                    break
+    except OSError as e:
+        logging.error(f"[LOG_WATCH] Exception occurred during converter execution: {e}")
+    finally:
+        lines.close()
+        conversion.close()
+
+    if not conversion.succeeded:
+        METRICS.inc("converter_failures")
+        if conversion.timed_out:
+            logging.error(f"[LOG_WATCH] Converter execution timed out ({conversion.timeout} seconds). The converter process might be stuck.")
+        elif conversion.proc is not None:
+            logging.error(f"[LOG_WATCH] Converter execution failed: {conversion.error_output}")
+        if cache is not None:
+            cache.mark_failed()
+        return None
+
+    if conversion.stopped_early:
+        logging.debug(f"[LOG_WATCH] Reset found after {len(added)} new event(s) → Converter stopped early.")
+    if trace is not None:
+        trace.on_conversion(started, datetime.now())
+        trace.on_events(added)
+    if cache is not None:
+        cache.record(snapshot, None)
+        cache.put_result(True, initial_time)
+    return window.count, window.reset_seen
+
+def wait_for_change(watcher, relevant_paths, timeout, wake=None):
+    # timeout 안에 relevant_paths 중 하나가 바뀌면 바로 돌아옵니다. (그 외 파일 변경은 무시)
+    # wake 이벤트가 켜지면 (제어 채널의 check/reload/shutdown) 1초 안에 돌아옵니다.
+    relevant = {os.path.abspath(p) for p in relevant_paths if p}
+    deadline = time.monotonic() + timeout
+    while True:
+        if wake is not None and wake.is_set():
+            wake.clear()
+            return set()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return set()
+        changed = watcher.wait(min(remaining, 1.0) if wake is not None else remaining)
+        if changed & relevant:
+            return changed
+
+def check_monitor_settings(settings):
     converted_log_path = settings.get("converted_log_file_path")
-    if not converted_log_path:
+    mode = output_mode(settings)
+    if not converted_log_path and mode == "file":
         logging.critical("[CONFIG] Fatal error: Converted log file path (converted_log_file_path) is missing in settings.json.")
+        return False
+
+    logging.info(f"[CONFIG] Monitoring CSV path: {settings.get('monitoring_log_file_path', '')}")
+    if mode == "file":
+        logging.info(f"[CONFIG] Monitoring converted log path: {converted_log_path}")
+    else:
+        logging.info(f"[CONFIG] Converter output is streamed via {mode} (no converted TXT file).")
+    logging.info(f"[CONFIG] LOG mode timeout: {settings.get('interval_minutes', 60)} minutes")
+    try:
+        RuleSet.from_settings(settings)
+    except ValueError as e:
+        logging.critical(f"[CONFIG] Fatal error: Invalid trigger rules in settings.json: {e}")
+        return False
+    return True
+
+def create_event_window(settings):
+    return SlidingWindowCounter(settings.get("heating_window_minutes", settings.get("interval_minutes", 60)))
+
+def create_checkpoint_store(settings):
+    from checkpoint import CheckpointStore, DEFAULT_MILESTONE_BYTES, DEFAULT_MAX_AGE_MINUTES
+    return CheckpointStore(
+        settings.get("checkpoint_file") or get_path("worker_checkpoint.json"),
+        milestone_bytes=settings.get("checkpoint_milestone_bytes", DEFAULT_MILESTONE_BYTES),
+        max_age_minutes=settings.get("checkpoint_max_age_minutes", DEFAULT_MAX_AGE_MINUTES),
+    )
+
+def create_alert_dispatcher(settings):
+    from alert_dispatch import AlertDispatcher, create_sinks
+    # 팝업/파일/웹훅 등 경보 싱크는 장비 전체가 디스패처 하나를 같이 씁니다.
+    sinks = create_sinks(settings, show_alert, get_path("heating_alert.log"))
+    logging.info(f"[ALERT] Alert sinks: {', '.join(sink.name for sink in sinks) or 'none'}")
+    return AlertDispatcher(sinks)
+
+def create_event_journal(settings):
+    from event_journal import EventJournal
+    if not settings.get("journal_enabled", True):
+        return None
+    directory = settings.get("journal_dir") or get_path("journal")
+    logging.info(f"[JOURNAL] Recording detection events to: {directory}")
+    return EventJournal(directory)
+
+def create_metrics_exporter(settings):
+    from worker_metrics import MetricsExporter
+    textfile = settings.get("metrics_textfile", get_path("worker_metrics.prom"))
+    return MetricsExporter(METRICS, textfile, settings.get("metrics_port"),
+                           settings.get("metrics_interval_seconds", 15),
+                           settings.get("latency_summary_minutes", 60) * 60)
+
+def report_startup(settings):
+    # 시작 → 첫 CSV 확인까지 걸린 시간을 startup_budget_ms 와 비교합니다. (프로세스당 한 번만)
+    # 보통 200 ms 안팎이므로, 기능 모듈 import 가 다시 앞당겨지는 정도의 후퇴도 경고로 드러나도록 여유를 작게 둡니다.
+    elapsed = STARTUP.mark("first poll")
+    if elapsed is None:
+        return
+    METRICS.set_gauge("startup_seconds", round(elapsed, 3))
+    budget_ms = settings.get("startup_budget_ms", 300)
+    if elapsed * 1000 > budget_ms:
+        logging.warning(f"[STARTUP] Time to first poll {elapsed * 1000:.0f} ms exceeds the {budget_ms} ms budget "
+                        "→ Run with --profile-startup to see per-module import times.")
+    else:
+        logging.info(f"[STARTUP] Time to first poll: {elapsed * 1000:.0f} ms (budget {budget_ms} ms)")
+    if STARTUP.profiling:
+        STARTUP.stop_profiling()
+        for line in STARTUP.report(settings.get("startup_profile_modules", 20)):
+            logging.info(f"[STARTUP] {line}")
+
+def create_heartbeat(settings):
+    # 이 시간 동안 하트비트가 갱신되지 않으면 GUI/스케줄러는 워커가 멈춘 것으로 봅니다.
+    # 적응형 주기에서는 조용할 때 poll_max_seconds 까지 기다릴 수 있습니다.
+    longest = lambda s: s.get("poll_max_seconds", 600) if s.get("poll_adaptive", True) else s.get("poll_interval_seconds", 60)
+    slowest = max([longest(settings), settings.get("heartbeat_seconds", 30)] +
+                  [longest(dict(settings, **p)) for p in settings.get("tools") or []])
+    return Heartbeat(get_path(HEARTBEAT_FILE), stale_after=settings.get("heartbeat_stale_seconds", 3 * slowest + 30))
+
+def create_control_server(settings, heartbeat, handlers):
+    from control_channel import ControlServer
+    # 포트/토큰은 하트비트 파일에 기록되어 GUI의 ControlClient 가 찾아옵니다.
+    if not settings.get("control_enabled", True):
+        return None
+    try:
+        server = ControlServer(handlers, settings.get("control_port", 0))
+    except OSError as e:
+        logging.error(f"[CONTROL] Could not open the control channel: {e}")
+        return None
+    heartbeat.extra.update(server.heartbeat_fields())
+    server.start()
+    return server
+
+def tool_status(monitor):
+    status = monitor.machine.snapshot()
+    status.update(
+        # 임계값과 비교하는 값은 CSV 트리거 수 + 변환 로그에서 센 heating 수입니다.
+        log_count=monitor.machine.log_count,
+        total_count=monitor.machine.heating_count + monitor.machine.log_count,
+        threshold=monitor.machine.threshold,
+        interval_minutes=monitor.machine.timeout_minutes,
+        last_alert_reason=monitor.machine.last_alert_reason,
+        timings=METRICS.stage_timings(monitor.log_label),
+    )
+    return status
+
+def worker_status(monitors, runtime):
+    return {
+        "pid": os.getpid(),
+        "runtime": runtime,
+        "uptime_seconds": round(time.time() - METRICS.started_at, 1),
+        "tools": {monitor.name: tool_status(monitor) for monitor in monitors},
+    }
+
+def apply_trigger(machine, trace, ts):
+    # CSV 모드면 LOG 모드로 들어가고, 이미 LOG 모드면 heating 횟수에 더합니다.
+    if machine.on_trigger(ts):
+        METRICS.inc("triggers")
+        trace.on_log_mode()
+        return None
+    action = machine.on_repeat_trigger(ts)
+    if action is None:
+        return None
+    METRICS.inc("repeat_triggers")
+    trace.on_repeat_trigger()
+    return None if action == "counted" else action
+
+def record_action(action):
+    # 상태 기계가 돌려준 결과를 카운터에 반영합니다.
+    if action == "alert":
+        METRICS.inc("alerts")
+    elif action == "reset":
+        METRICS.inc("resets")
+
+def make_alert(name, machine, trace=None):
+    from alert_dispatch import Alert
+    # 경보 세부 내용에 이벤트별 지연(로그 기록 → 읽기 → 변환 → 결정)을 붙입니다.
+    detail = trace.on_alert(machine) if trace is not None else ""
+    return Alert(name, machine.last_alert_reason, machine.initial_heating_time, machine.last_alert_time, detail)
+
+def create_watcher(settings, paths):
+    from file_watch import FileWatcher
+    return FileWatcher(
+        paths,
+        backend=settings.get("watch_backend", "auto"),
+        poll_interval=settings.get("watch_poll_seconds", 1.0),
+    )
+
+class ToolMonitor:
+    """Per-tool monitoring state shared by both runtimes: state machine, CSV reader,
+    conversion cache, rules and event window. `apply_settings` swaps in a reloaded
+    profile without losing any of it. `clock` (datetime.now by default) lets replay.py
+    run the same monitor on a virtual clock; `checkpoints` may then be None."""
+
+    def __init__(self, settings, checkpoints, journal=None, clock=datetime.now):
+        from convert_cache import ConversionCache
+        self.settings = settings
+        self.name = settings.get("name", DEFAULT_TOOL_NAME)
+        self.log_label = current_tool.get()
+        self.window = create_event_window(settings)
+        # LOG 모드 중 CSV 트리거도 같은 이벤트 창에 넣어 변환 로그의 heating 줄과 중복 없이 셉니다.
+        self.machine = HeatingStateMachine(settings.get("threshold", 3), settings.get("interval_minutes", 60),
+                                           clock=clock, window=self.window)
+        if journal is not None:
+            self.machine.listener = lambda kind, now, **fields: journal.record(self.name, kind, now, **fields)
+        self.csv_reader = TailReader(self.csv_path) if self.csv_path else None
+        self.conversion_cache = ConversionCache(use_fingerprint=settings.get("converter_cache_fingerprint", False))
+        self.rules = RuleSet.from_settings(settings)
+        self.trace = EventTrace(METRICS, clock)
+        self.converter_output = output_mode(settings)
+        # 이미 분석한 돌려쓰기된 원본 로그 (크기, mtime)
+        self.rotated_done = set()
+        self.scheduler = PollScheduler(settings, time.monotonic if clock is datetime.now else lambda: clock().timestamp())
+        self.checkpoints = checkpoints
+        if checkpoints is not None:
+            checkpoints.restore(self.name, self.machine, self.csv_reader)
+
+    @property
+    def csv_path(self):
+        return self.settings.get("monitoring_log_file_path", "")
+
+    @property
+    def source_log_path(self):
+        return self.settings.get("log_file_path")
+
+    @property
+    def converted_log_path(self):
+        return self.settings.get("converted_log_file_path")
+
+    def next_poll(self):
+        """Seconds to wait before the next check, chosen by the poll scheduler."""
+        machine = self.machine
+        self.scheduler.observe_file("csv", self.csv_path)
+        deadline = None
+        if machine.state == STATE_LOG:
+            self.scheduler.observe_file("log", self.source_log_path)
+            if machine.log_mode_start_time is not None:
+                deadline = (machine.log_mode_start_time + timedelta(minutes=machine.timeout_minutes)
+                            - machine.clock()).total_seconds()
+        seconds, _ = self.scheduler.next_interval(machine.state, self.trace.conversion_seconds, deadline)
+        return seconds
+
+    def watched_paths(self):
+        return [self.csv_path, self.source_log_path]
+
+    def apply_settings(self, settings):
+        # 읽던 위치, 상태(CSV/LOG), 카운트는 그대로 두고 바뀐 값만 반영합니다.
+        old = self.settings
+        self.settings = settings
+        self.machine.threshold = settings.get("threshold", 3)
+        self.machine.timeout_minutes = settings.get("interval_minutes", 60)
+        self.window.window = create_event_window(settings).window
+        self.rules = RuleSet.from_settings(settings)
+        self.conversion_cache.use_fingerprint = settings.get("converter_cache_fingerprint", False)
+        self.converter_output = output_mode(settings)
+        self.scheduler.configure(settings)
+        if self.csv_path != old.get("monitoring_log_file_path", ""):
+            logging.info(f"[CONFIG] Monitoring CSV path changed → Reading '{self.csv_path}' from its tail.")
+            self.csv_reader = TailReader(self.csv_path) if self.csv_path else None
+        if any(old.get(key) != settings.get(key)
+               for key in ("log_file_path", "converted_log_file_path", "converter_exe_name", "converter_output")):
+            self.conversion_cache.invalidate()
+
+def validate_tool_settings(settings):
+    profiles = load_tool_profiles(settings)
+    return len(profiles) == 1 and check_monitor_settings(profiles[0])
+
+def monitor_loop(settings):
+    from settings_reload import SettingsReloader
+    # 'sync' 런타임은 장비 1대만 지원합니다 ("tools" 목록에 1대만 있어도 됨).
+    profile = load_tool_profiles(settings)[0]
+    if not check_monitor_settings(profile):
         return # Exit if critical path is missing
 
-    logging.info(f"[CONFIG] Monitoring CSV path: {csv_path}")
-    logging.info(f"[CONFIG] Monitoring converted log path: {converted_log_path}")
-    logging.info(f"[CONFIG] LOG mode timeout: {log_mode_timeout_minutes} minutes")
+    checkpoints = create_checkpoint_store(settings)
+    journal = create_event_journal(settings)
+    tool = ToolMonitor(profile, checkpoints, journal)
+    reloader = SettingsReloader(get_path("settings.json"), validate_tool_settings, settings)
+    watcher = create_watcher(settings, tool.watched_paths() + [reloader.path])
+    dispatcher = create_alert_dispatcher(settings)
+    exporter = create_metrics_exporter(settings)
+    heartbeat = create_heartbeat(settings)
+    wake = threading.Event()
+    stop = threading.Event()
 
-    state = "CSV"
-    last_alert_time = None
-    log_mode_start_time = None
-    initial_heating_time = None
-    last_processed_time = datetime.now()
-    logging.info(f"[START] Monitoring started at: {last_processed_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    def check_now(request):
+        wake.set()
 
-    while True:
-        if state == "CSV":
-            logging.info(f"[CSV_WATCH] Monitoring '{os.path.basename(str(csv_path))}' for new triggers...")
-            if not csv_path or not os.path.exists(csv_path):
-                logging.warning(f"[CSV_WATCH] Target file not found: {csv_path}")
+    def reload(request):
+        reloader.request_reload()
+        wake.set()
+
+    def shutdown(request):
+        stop.set()
+        wake.set()
+
+    control = create_control_server(settings, heartbeat, {
+        "status": lambda request: worker_status([tool], "sync"),
+        "check": check_now,
+        "reload": reload,
+        "shutdown": shutdown,
+    })
+    logging.info(f"[START] Monitoring started at: {tool.machine.last_processed_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    try:
+        run_monitor_cycles(tool, watcher, dispatcher, reloader, heartbeat, wake, stop)
+    finally:
+        if control is not None:
+            control.close()
+        heartbeat.stop()
+        dispatcher.close()
+        exporter.close()
+        checkpoints.save()
+        if journal is not None:
+            journal.close()
+
+def run_cycle(tool, dispatcher=None, convert=convert_log):
+    """One check of the sync runtime: read new CSV triggers and, in LOG mode, analyze the
+    converted log. Returns the action ("alert", "reset", "suppressed") or None.
+
+    replay.py calls this on a virtual clock with `convert` replaced by recorded output.
+    """
+    machine = tool.machine
+    csv_path = tool.csv_path
+    converted_log_path = tool.converted_log_path
+    cycle_started = time.perf_counter()
+    previous_state = machine.state
+    action = None
+    # CSV는 LOG 모드에서도 매 주기 새 줄만 읽어서, LOG 모드 중에 온 트리거도 놓치지 않습니다.
+    if machine.state == STATE_CSV:
+        logging.info(f"[CSV_WATCH] Monitoring '{os.path.basename(str(csv_path))}' for new triggers...", extra=RATE_LIMITED)
+    if not csv_path or not os.path.exists(csv_path):
+        logging.warning(f"[CSV_WATCH] Target file not found: {csv_path}", extra=RATE_LIMITED)
+    else:
+        for ts in parse_csv_triggers(csv_path, machine.last_processed_time, tool.csv_reader, tool.rules):
+            tool.trace.on_trigger_read(ts)
+            action = apply_trigger(machine, tool.trace, ts) or action
+
+    # 방금 LOG 모드에 들어왔으면 분석은 다음 주기(바로 이어짐)에 합니다.
+    if action is None and machine.state == STATE_LOG and previous_state == STATE_LOG:
+        logging.info(f"[LOG_WATCH] Starting analysis of converted log (Trigger time: {machine.initial_heating_time})...", extra=RATE_LIMITED)
+        rotated = pending_rotated_sources(tool.settings, machine.initial_heating_time, tool.rotated_done)
+        if rotated:
+            analyze_rotated_sources(tool.settings, rotated, machine.initial_heating_time, tool.window,
+                                    tool.conversion_cache, tool.rules, tool.trace, tool.rotated_done)
+        if machine.check_timeout() == "alert":
+            action = "alert"
+
+        elif tool.converter_output != "file":
+            result = stream_converted_log(
+                tool.settings, machine.initial_heating_time, tool.window,
+                tool.conversion_cache, tool.rules, tool.trace)
+            if result is None:
+                logging.warning("[LOG_WATCH] Conversion failed - Retrying in next cycle.")
+            else:
+                action = machine.on_log_result(*result)
+
+        elif not convert(tool.settings, tool.conversion_cache, tool.trace):
+            logging.warning("[LOG_WATCH] Conversion failed - Retrying in next cycle.")
+
+        elif os.path.exists(converted_log_path):
+            count, reset = analyze_converted_log(
+                converted_log_path, machine.initial_heating_time, tool.window, tool.conversion_cache, tool.rules,
+                tool.trace)
+            action = machine.on_log_result(count, reset)
+        else:
+            logging.warning(f"[LOG_WATCH] Converted log file not found: {converted_log_path}")
+
+    record_action(action)
+    if action == "alert" and dispatcher is not None:
+        dispatcher.dispatch(make_alert(tool.name, machine, tool.trace))
+    METRICS.observe("cycle", time.perf_counter() - cycle_started)
+
+    # 상태가 바뀌면 바로, 아니면 CSV 읽은 양이 일정 이상일 때 체크포인트를 저장합니다.
+    if tool.checkpoints is not None:
+        tool.checkpoints.update(tool.name, machine, tool.csv_reader, force=machine.state != previous_state)
+    return action
+
+def run_monitor_cycles(tool, watcher, dispatcher, reloader=None, heartbeat=None, wake=None, stop=None):
+    machine = tool.machine
+
+    while stop is None or not stop.is_set():
+        # 주기가 시작될 때만 새 설정을 적용하므로, 한 주기 안에서는 설정이 바뀌지 않습니다.
+        new_settings = reloader.poll() if reloader else None
+        if new_settings is not None:
+            apply_log_settings(new_settings)
+            old_paths = tool.watched_paths()
+            tool.apply_settings(load_tool_profiles(new_settings)[0])
+            if tool.watched_paths() != old_paths:
+                watcher.close()
+                watcher = create_watcher(new_settings, tool.watched_paths() + [reloader.path])
+
+        previous_state = machine.state
+        run_cycle(tool, dispatcher)
+        report_startup(tool.settings)
+        if heartbeat is not None:
+            heartbeat.beat(tools={tool.name: machine.state})
+        if machine.state != previous_state:
+            # 상태가 바뀌었으면 기다리지 않고 바로 다음 단계를 확인합니다.
+            continue
+        csv_path = tool.csv_path
+        watched = [csv_path] if machine.state == STATE_CSV else [tool.source_log_path, csv_path]
+        poll_seconds = tool.next_poll()
+        names = "' or '".join(os.path.basename(str(path)) for path in watched)
+        logging.info(f"... Next monitoring will start in {poll_seconds:.0f} seconds or when '{names}' changes ...", extra=RATE_LIMITED)
+        relevant = watched + [reloader.path] if reloader else watched
+        changed = wait_for_change(watcher, relevant, poll_seconds, wake)
+        if changed:
+            logging.debug(f"[WATCH] Change detected: {', '.join(sorted(changed))}")
+    logging.info("[EXIT] Shutdown requested through the control channel.")
+
+class AsyncMonitor(ToolMonitor):
+    """asyncio runtime: CSV watching, conversion/analysis and decisions run as separate
+    tasks connected by a queue; alerts go to the shared dispatcher thread, so a slow
+    converter or an open pop-up never delays trigger detection."""
+
+    def __init__(self, settings, hub, converter_slots, checkpoints, dispatcher, journal=None):
+        super().__init__(settings, checkpoints, journal)
+        self.hub = hub
+        self.converter_slots = converter_slots
+        self.dispatcher = dispatcher
+        self.events = asyncio.Queue()
+        self.log_mode = asyncio.Event()
+        self.analysis_task = None
+
+    async def run(self):
+        # 이 장비의 모든 단계(task)와 로그에 장비 이름이 따라가도록 설정합니다. (장비가 1대면 이름 생략)
+        current_tool.set(self.log_label)
+        logging.info(f"[START] Monitoring started at: {self.machine.last_processed_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        await asyncio.gather(self.csv_stage(), self.log_stage(), self.decision_stage())
+
+    async def csv_stage(self):
+        while True:
+            logging.info(f"[CSV_WATCH] Monitoring '{os.path.basename(str(self.csv_path))}' for new triggers...", extra=RATE_LIMITED)
+            if not self.csv_path or not os.path.exists(self.csv_path):
+                logging.warning(f"[CSV_WATCH] Target file not found: {self.csv_path}", extra=RATE_LIMITED)
             else:
-                trigger, ts = parse_csv_for_trigger(csv_path, last_processed_time)
-                if trigger:
-                    logging.info(f"[CSV_WATCH] 'Heating Steadfast ON' trigger detected ({ts}) → Entering LOG mode.")
-                    state = "LOG"
-                    log_mode_start_time = datetime.now()
-                    initial_heating_time = ts
-                    heating_count = 1
-                    
-        elif state == "LOG":
-            logging.info(f"[LOG_WATCH] Starting analysis of converted log (Trigger time: {initial_heating_time})...")
-            now = datetime.now()
-            timeout_delta = timedelta(minutes=log_mode_timeout_minutes)
-            if log_mode_start_time and now - log_mode_start_time > timeout_delta:
-                logging.warning(f"[LOG_WATCH] Monitoring exceeded {log_mode_timeout_minutes} minutes, timeout.")
-                logging.info("[ALERT] Timeout condition met → Executing alarm.")
-                show_alert()
-                last_alert_time = now
-                state = "CSV"
-                last_processed_time = now
-            
-            elif not convert_log(settings):
+                # 상태와 관계없이 계속 읽고, 트리거마다 이벤트로 보냅니다 (LOG 모드 중 트리거는 heating 횟수로 셈).
+                triggers = await asyncio.to_thread(
+                    parse_csv_triggers, self.csv_path, self.machine.last_processed_time, self.csv_reader, self.rules)
+                for ts in triggers:
+                    self.trace.on_trigger_read(ts)
+                    await self.events.put(("trigger", ts))
+                self.checkpoints.update(self.name, self.machine, self.csv_reader)
+            report_startup(self.settings)
+            await self.hub.wait([self.csv_path], self.next_poll())
+
+    async def analyze_once(self, initial_time):
+        with METRICS.timer("cycle"):
+            await self._analyze_once(initial_time)
+
+    async def _analyze_once(self, initial_time):
+        rotated = pending_rotated_sources(self.settings, initial_time, self.rotated_done)
+        if rotated:
+            async with self.converter_slots:
+                await asyncio.to_thread(
+                    analyze_rotated_sources, self.settings, rotated, initial_time, self.window,
+                    self.conversion_cache, self.rules, self.trace, self.rotated_done)
+        if self.converter_output != "file":
+            result = await self.stream_once(initial_time)
+            if result is None:
                 logging.warning("[LOG_WATCH] Conversion failed - Retrying in next cycle.")
-            
-            elif converted_log_path and os.path.exists(converted_log_path):
-                needed_count = threshold - heating_count
-                count, reset = parse_converted_log(converted_log_path, needed_count, initial_heating_time)
-                total_count = heating_count + count
-                logging.debug(f"[LOG_WATCH] Analysis result: additional detected ({count}), reset ({reset}), total ({total_count})")
-
-                if reset:
-                    logging.info("[LOG_WATCH] 'working properly' reset condition found → Returning to CSV mode.")
-                    state = "CSV"
-                    last_processed_time = now
-                    
-                elif total_count >= threshold:
-                    if not last_alert_time or (now - last_alert_time).seconds > 60:
-                        logging.info(f"[ALERT] Threshold condition met (Total: {total_count} >= {threshold}) → Executing alarm.")
-                        show_alert()
-                        last_alert_time = now
-                        state = "CSV"
-                        last_processed_time = now
-                    else:
-                        logging.info("[ALERT] Condition met, but pop-up skipped due to 60-second re-alarm prevention.")
             else:
-                logging.warning(f"[LOG_WATCH] Converted log file not found: {converted_log_path}")
+                await self.events.put(("log_result", initial_time) + result)
+        elif not await convert_log_async(self.settings, self.conversion_cache, self.converter_slots, self.trace):
+            logging.warning("[LOG_WATCH] Conversion failed - Retrying in next cycle.")
+        elif os.path.exists(self.converted_log_path):
+            count, reset = await asyncio.to_thread(
+                analyze_converted_log, self.converted_log_path, initial_time, self.window, self.conversion_cache,
+                self.rules, self.trace)
+            await self.events.put(("log_result", initial_time, count, reset))
+        else:
+            logging.warning(f"[LOG_WATCH] Converted log file not found: {self.converted_log_path}")
 
-        logging.info(f"... Next monitoring will start in 60 seconds ...")
-        time.sleep(60)
+    async def stream_once(self, initial_time):
+        conversions = []
+        async with self.converter_slots:
+            try:
+                return await asyncio.to_thread(
+                    stream_converted_log, self.settings, initial_time, self.window,
+                    self.conversion_cache, self.rules, self.trace, conversions.append)
+            except asyncio.CancelledError:
+                # 스레드는 취소할 수 없으므로 변환기를 끝내서 스레드가 바로 돌아오게 합니다.
+                for conversion in conversions:
+                    conversion.stop()
+                raise
 
-def signal_handler(sig, frame):
-    logging.info("[EXIT] Termination signal received, starting cleanup.")
+    async def log_stage(self):
+        while True:
+            await self.log_mode.wait()
+            machine = self.machine
+            logging.info(f"[LOG_WATCH] Starting analysis of converted log (Trigger time: {machine.initial_heating_time})...", extra=RATE_LIMITED)
+            task = asyncio.create_task(self.analyze_once(machine.initial_heating_time))
+            self.analysis_task = task
+            try:
+                # decision_stage가 LOG 모드를 끝내면 task만 취소되고 이 단계는 계속 돕니다.
+                await asyncio.wait({task})
+            finally:
+                self.analysis_task = None
+                if not task.done():
+                    task.cancel()
+            if not task.cancelled() and task.exception():
+                logging.error(f"[LOG_WATCH] Exception occurred during converted log analysis: {task.exception()}")
+            if self.log_mode.is_set():
+                poll_seconds = self.next_poll()
+                logging.info(f"... Next analysis will start in {poll_seconds:.0f} seconds or when '{os.path.basename(str(self.source_log_path))}' changes ...", extra=RATE_LIMITED)
+                await self.hub.wait([self.source_log_path], poll_seconds)
+
+    async def decision_stage(self):
+        machine = self.machine
+        while True:
+            try:
+                event = await asyncio.wait_for(self.events.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                event = None
+
+            previous_state = machine.state
+            action = None
+            if event and event[0] == "trigger":
+                action = apply_trigger(machine, self.trace, event[1])
+            elif event and event[0] == "log_result":
+                _, initial_time, count, reset = event
+                # LOG 모드가 이미 끝났거나 다른 트리거로 바뀐 뒤 도착한 결과는 버립니다.
+                if machine.state == STATE_LOG and initial_time == machine.initial_heating_time:
+                    action = machine.on_log_result(count, reset)
+            if action is None:
+                action = machine.check_timeout()
+            record_action(action)
+            if action == "alert":
+                self.dispatcher.dispatch(make_alert(self.name, machine, self.trace))
+            if machine.state != previous_state:
+                self.checkpoints.update(self.name, self.machine, self.csv_reader, force=True)
+
+            if machine.state == STATE_LOG:
+                self.log_mode.set()
+            elif self.log_mode.is_set():
+                self.log_mode.clear()
+                if self.analysis_task is not None:
+                    self.analysis_task.cancel()
+
+def load_valid_profiles(settings):
+    profiles = []
+    for profile in load_tool_profiles(settings):
+        # 이름은 체크포인트, 로그, 상태 조회의 키이므로 중복되면 뒤에 나온 장비를 건너뜁니다.
+        if any(profile["name"] == other["name"] for other in profiles):
+            logging.critical(f"[CONFIG] Tool name '{profile['name']}' is used more than once → The later one is skipped.")
+            continue
+        profiles.append(profile)
+    conflicts = find_path_conflicts(profiles)
+    for name, other, path in conflicts:
+        logging.critical(f"[CONFIG] Tools '{name}' and '{other}' share the same converted log path: {path} → '{name}' is skipped.")
+    skipped = {name for name, _, _ in conflicts}
+
+    valid = []
+    for profile in profiles:
+        if profile["name"] in skipped:
+            continue
+        token = current_tool.set(profile["name"] if len(profiles) > 1 else None)
+        try:
+            if check_monitor_settings(profile):
+                valid.append(profile)
+        finally:
+            current_tool.reset(token)
+    return valid
+
+async def settings_stage(reloader, monitors, hub):
+    # settings.json 이 바뀌면 검사 후 각 장비에 적용합니다. 장비 목록 자체의 변경은 재시작해야 반영됩니다.
+    while True:
+        await hub.wait([reloader.path], reloader.current.get("settings_check_seconds", 10))
+        new_settings = reloader.poll()
+        if new_settings is None:
+            continue
+        apply_log_settings(new_settings)
+        profiles = {profile["name"]: profile for profile in load_valid_profiles(new_settings)}
+        names = {monitor.name for monitor in monitors}
+        for monitor in monitors:
+            profile = profiles.get(monitor.name)
+            token = current_tool.set(monitor.log_label)
+            try:
+                if profile is None:
+                    logging.warning("[CONFIG] Tool missing from the new settings → Keeping its previous settings until restart.")
+                else:
+                    monitor.apply_settings(profile)
+            finally:
+                current_tool.reset(token)
+        added = sorted(set(profiles) - names)
+        if added:
+            logging.warning(f"[CONFIG] New tool(s) {', '.join(added)} will be monitored after a restart.")
+        paths = [path for monitor in monitors for path in monitor.watched_paths() if path]
+        hub.set_paths(paths + [reloader.path])
+
+async def heartbeat_stage(heartbeat, monitors, interval):
+    # 이벤트 루프가 멈추면 이 단계도 멈추므로, 하트비트가 오래되면 워커가 멈춘 것입니다.
+    while True:
+        heartbeat.beat(tools={monitor.name: monitor.machine.state for monitor in monitors})
+        await asyncio.sleep(interval)
+
+def async_control_handlers(loop, stages, monitors, reloader, hub, stop):
+    # 제어 채널 명령은 서버 스레드에서 들어오므로, 상태 읽기와 변경은 이벤트 루프 안에서 처리합니다.
+    def in_loop(func):
+        async def call():
+            return func()
+        return asyncio.run_coroutine_threadsafe(call(), loop).result(timeout=5)
+
+    def reload():
+        reloader.request_reload()
+        hub.wake_all()
+
+    def shutdown():
+        stop.set()
+        stages.cancel()
+
+    return {
+        "status": lambda request: in_loop(lambda: worker_status(monitors, "async")),
+        "check": lambda request: in_loop(hub.wake_all),
+        "reload": lambda request: in_loop(reload),
+        "shutdown": lambda request: in_loop(shutdown),
+    }
+
+async def monitor_loop_async(settings, stop=None):
+    from file_watch import WatchHub
+    from settings_reload import SettingsReloader
+    stop = stop or threading.Event()
+    profiles = load_valid_profiles(settings)
+    if not profiles:
+        logging.critical("[CONFIG] No tool profile could be started.")
+        return
+    logging.info(f"[CONFIG] Monitoring {len(profiles)} tool(s): {', '.join(p['name'] for p in profiles)}")
+
+    # 모든 장비의 파일을 스레드 하나로 감시하고, 변환기 동시 실행 개수는 공통으로 제한합니다.
+    paths = [p.get(key) for p in profiles for key in ("monitoring_log_file_path", "log_file_path")]
+    hub = WatchHub(
+        [path for path in paths if path] + [get_path("settings.json")],
+        backend=settings.get("watch_backend", "auto"),
+        poll_interval=settings.get("watch_poll_seconds", 1.0),
+    )
+    hub.start(asyncio.get_running_loop())
+    converter_slots = asyncio.Semaphore(max(1, settings.get("max_concurrent_conversions", 2)))
+    checkpoints = create_checkpoint_store(settings)
+    journal = create_event_journal(settings)
+    dispatcher = create_alert_dispatcher(settings)
+    exporter = create_metrics_exporter(settings)
+    reloader = SettingsReloader(get_path("settings.json"), lambda new: bool(load_valid_profiles(new)), settings)
+    heartbeat = create_heartbeat(settings)
+    control = None
+    try:
+        monitors = []
+        for profile in profiles:
+            current_tool.set(profile["name"] if len(profiles) > 1 else None)
+            monitors.append(AsyncMonitor(profile, hub, converter_slots, checkpoints, dispatcher, journal))
+        current_tool.set(None)
+        stages = asyncio.gather(
+            settings_stage(reloader, monitors, hub),
+            heartbeat_stage(heartbeat, monitors, settings.get("heartbeat_seconds", 30)),
+            *(monitor.run() for monitor in monitors))
+        control = create_control_server(settings, heartbeat, async_control_handlers(
+            asyncio.get_running_loop(), stages, monitors, reloader, hub, stop))
+        try:
+            await stages
+        except asyncio.CancelledError:
+            if not stop.is_set():
+                raise
+            logging.info("[EXIT] Shutdown requested through the control channel.")
+    finally:
+        if control is not None:
+            control.close()
+        heartbeat.stop()
+        hub.close()
+        dispatcher.close()
+        exporter.close()
+        checkpoints.save()
+        if journal is not None:
+            journal.close()
+
+def remove_pid():
     try:
         pid_path = get_path("worker.pid")
         if os.path.exists(pid_path):
@@ -254,15 +1146,27 @@ def signal_handler(sig, frame):
             logging.info("[EXIT] PID file deleted successfully.")
     except Exception as e:
         logging.error(f"[EXIT] Error during termination: {e}")
+
+def signal_handler(sig, frame):
+    logging.info("[EXIT] Termination signal received, starting cleanup.")
+    remove_pid()
     sys.exit(0)
 
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     settings = load_settings()
+    STARTUP.mark("settings loaded")
     if not settings:
         logging.critical("[EXIT] Program terminated as settings file could not be loaded.")
         sys.exit(1)
         
+    apply_log_settings(settings)
     write_pid()
-    monitor_loop(settings)
+    if settings.get("runtime", "async") == "sync" and len(load_tool_profiles(settings)) == 1:
+        monitor_loop(settings)
+    else:
+        if settings.get("runtime", "async") == "sync":
+            logging.warning("[CONFIG] The 'sync' runtime supports a single tool only → Using the async runtime.")
+        asyncio.run(monitor_loop_async(settings))
+    remove_pid()
@@ -0,0 +1,140 @@
+import logging
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+
+# 이상 가열이 얼마나 빨리 경보로 이어지는지 이벤트마다 재는 도구입니다.
+# 트리거/heating 이벤트마다 (로그에 찍힌 시각, 워커가 읽은 시각, 경보 시각)을 기록하고
+# 구간별 지연을 히스토그램에 넣습니다.
+#
+#   csv_write_to_read : CSV 트리거 줄의 시각 → 워커가 그 줄을 읽은 시각
+#   log_write_to_read : 원본 로그 heating 줄의 시각 → 워커가 변환을 시작한 시각
+#   converter         : 변환 시작(변환기 슬롯 대기 포함) → 변환 완료
+#   decision          : 이벤트를 읽은 시각 → 상태 기계가 LOG 진입/경보를 결정한 시각
+#                       (timeout 경보는 제한 시간이 지난 시각 → 경보 시각)
+#   end_to_end        : 경보를 일으킨 heating 줄(또는 LOG 모드 중 트리거 줄)의 시각 → 경보 시각
+#
+# 로그 시각은 초 단위라 1초 미만 값은 오차 범위입니다. 음수(시계 차이)는 0으로 기록합니다.
+
+LATENCY_STAGES = ("csv_write_to_read", "log_write_to_read", "converter", "decision", "end_to_end")
+DEFAULT_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+DEFAULT_RECENT = 500
+
+
+def _seconds(later, earlier):
+    return max(0.0, (later - earlier).total_seconds())
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts for Prometheus plus the last `keep` samples for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, keep=DEFAULT_RECENT):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=keep)
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def summary(self):
+        values = sorted(self.recent)
+        if not values:
+            return {"count": 0}
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        return {"count": len(values), "p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": values[-1]}
+
+
+class EventTrace:
+    """Timestamps of one tool's current LOG session, turned into latency samples."""
+
+    def __init__(self, metrics, clock=datetime.now):
+        self.metrics = metrics
+        self.clock = clock
+        # 가장 최근에 읽은 트리거 / heating 이벤트: {"log_time", "read_at", ...}
+        self.trigger = None
+        self.last_event = None
+        self.conversion_started = None
+        self.conversion_seconds = None
+
+    def on_trigger_read(self, log_time):
+        read_at = self.clock()
+        self.trigger = {"log_time": log_time, "read_at": read_at}
+        self.metrics.observe_latency("csv_write_to_read", _seconds(read_at, log_time))
+
+    def on_log_mode(self):
+        # LOG 모드 진입: 이번 세션의 이벤트 기록을 새로 시작합니다.
+        self.last_event = None
+        self.conversion_started = None
+        self.conversion_seconds = None
+        if self.trigger is not None:
+            self.metrics.observe_latency("decision", _seconds(self.clock(), self.trigger["read_at"]))
+
+    def on_repeat_trigger(self):
+        # LOG 모드 중에 온 트리거도 heating 으로 세므로, 경보의 원인 이벤트가 될 수 있습니다.
+        if self.trigger is not None:
+            read_at = self.trigger["read_at"]
+            self.last_event = {
+                "line": "trigger line",
+                "log_time": self.trigger["log_time"],
+                "read_at": read_at,
+                "write_to_read": _seconds(read_at, self.trigger["log_time"]),
+                "converter": None,
+            }
+
+    def on_conversion(self, started, finished):
+        self.conversion_started = started
+        self.conversion_seconds = _seconds(finished, started)
+        self.metrics.observe_latency("converter", self.conversion_seconds)
+
+    def on_events(self, events):
+        """Record newly counted (ts, is_reset) events from the converted log."""
+        read_at = self.clock()
+        noticed_at = self.conversion_started or read_at
+        for ts, is_reset in events:
+            if is_reset:
+                continue
+            self.metrics.observe_latency("log_write_to_read", _seconds(noticed_at, ts))
+            self.last_event = {
+                "line": "heating line",
+                "log_time": ts,
+                "read_at": read_at,
+                "write_to_read": _seconds(noticed_at, ts),
+                "converter": self.conversion_seconds,
+            }
+
+    def on_alert(self, machine):
+        """Record decision/end-to-end latency of an alert and return a one-line breakdown."""
+        fired_at = machine.last_alert_time or self.clock()
+        if machine.last_alert_reason == "timeout":
+            deadline = machine.log_mode_start_time + timedelta(minutes=machine.timeout_minutes)
+            decision = _seconds(fired_at, deadline)
+            self.metrics.observe_latency("decision", decision)
+            detail = f"timeout alert {decision:.1f} s after the deadline"
+        elif self.last_event is not None:
+            event = self.last_event
+            decision = _seconds(fired_at, event["read_at"])
+            end_to_end = _seconds(fired_at, event["log_time"])
+            self.metrics.observe_latency("decision", decision)
+            self.metrics.observe_latency("end_to_end", end_to_end)
+            converter = f"{event['converter']:.1f} s" if event["converter"] is not None else "-"
+            detail = (f"{event['line']} {event['log_time']}: write→read {event['write_to_read']:.1f} s, "
+                      f"converter {converter}, decision {decision:.1f} s, end-to-end {end_to_end:.1f} s")
+        else:
+            return ""
+        logging.info(f"[LATENCY] Alert latency: {detail}")
+        return detail
+
+
+def format_summary(summaries):
+    """Render {(stage, tool): summary} as log lines, one per tool/stage with samples."""
+    lines = []
+    for (stage, tool), summary in sorted(summaries.items()):
+        if summary["count"]:
+            lines.append(f"{tool} {stage}: p50 {summary['p50']:.1f} s, p90 {summary['p90']:.1f} s, "
+                         f"p99 {summary['p99']:.1f} s, max {summary['max']:.1f} s (n={summary['count']})")
+    return lines
@@ -0,0 +1,114 @@
+import os
+import re
+import struct
+import logging
+
+# 장비가 로그를 돌려쓰기(rotation)할 때 생기는 파일 묶음(chain)을 다룹니다.
+#   file          : 지금 쓰고 있는 파일 (가장 최신)
+#   file.1        : 바로 이전 파일 (또는 file.1.gz)
+#   file.2 ...    : 더 오래된 파일 (번호가 클수록 오래됨)
+#   file.gz       : 번호 없는 압축본 (가장 오래된 것으로 봄)
+# .gz 는 gzip 으로 스트리밍 압축 해제하므로 파일 전체를 메모리나 디스크에 풀지 않습니다.
+
+GZIP_SUFFIX = ".gz"
+MAX_MEMBERS = 10
+COPY_BLOCK = 256 * 1024
+
+
+def is_compressed(path):
+    return path.lower().endswith(GZIP_SUFFIX)
+
+
+def rotation_chain(path, max_members=MAX_MEMBERS):
+    """Existing members of `path`'s rotation chain, newest first (the live file itself first)."""
+    directory = os.path.dirname(path) or "."
+    base = os.path.basename(path)
+    numbered = re.compile(re.escape(base) + r"\.(\d+)(\.gz)?$", re.IGNORECASE)
+    members = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return [path] if os.path.exists(path) else []
+    for name in names:
+        m = numbered.match(name)
+        if m:
+            # 같은 번호면 압축 안 된 쪽(file.1)이 더 최신입니다.
+            members.append((int(m.group(1)), 1 if m.group(2) else 0, name))
+        elif name.lower() == (base + GZIP_SUFFIX).lower():
+            members.append((float("inf"), 1, name))
+    members.sort()
+    chain = [path] if os.path.exists(path) else []
+    chain += [os.path.join(directory, name) for _, _, name in members[:max_members]]
+    return chain
+
+
+def open_member(path):
+    """Open a chain member for binary reading; .gz members are decompressed on the fly."""
+    if is_compressed(path):
+        import gzip # 압축 파일을 읽을 때만 로드합니다.
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def member_size(path):
+    """Uncompressed size of a member (for .gz: the size stored in the gzip trailer, modulo 4 GiB)."""
+    if not is_compressed(path):
+        return os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def read_member(path, offset=0, size=-1):
+    """Return up to `size` bytes of the member's content from `offset` (uncompressed bytes; -1: to the end)."""
+    with open_member(path) as f:
+        # GzipFile.seek 는 앞으로만 이동하며, 건너뛰는 부분도 압축을 풀면서 지나갑니다.
+        f.seek(offset)
+        return f.read(size)
+
+
+def copy_member(path, target_path):
+    """Write the member's uncompressed content to `target_path` block by block."""
+    with open_member(path) as src, open(target_path, "wb") as dst:
+        while True:
+            block = src.read(COPY_BLOCK)
+            if not block:
+                break
+            dst.write(block)
+
+
+def find_predecessor(path, identity, head, offset, identity_of):
+    """Find the chain member that holds the file last read as (`identity`, `head`).
+
+    Returns (index, member) in `rotation_chain(path)` or (None, None). A renamed file
+    keeps its identity; a compressed copy is matched by its first bytes and size.
+    """
+    chain = rotation_chain(path)
+    for index, member in enumerate(chain[1:], start=1):
+        try:
+            if not is_compressed(member) and identity is not None and identity_of(os.stat(member)) == identity:
+                return index, member
+            if head and member_size(member) >= offset:
+                with open_member(member) as f:
+                    if f.read(len(head)) == head:
+                        return index, member
+        except (OSError, EOFError, struct.error) as e:
+            logging.debug(f"[TAIL] Skipping unreadable rotated file '{member}': {e}")
+    return None, None
+
+
+def rotated_members(path, since):
+    """Rotated members last modified at or after `since` (a datetime), oldest first."""
+    found = []
+    threshold = since.timestamp()
+    for member in rotation_chain(path)[1:]:
+        try:
+            st = os.stat(member)
+        except OSError:
+            continue
+        if st.st_mtime < threshold:
+            # 체인은 최신 → 오래된 순이므로 여기서부터는 모두 더 오래된 파일입니다.
+            break
+        found.append((member, (st.st_size, st.st_mtime_ns)))
+    found.reverse()
+    return found
@@ -0,0 +1,135 @@
+import re
+import logging
+
+from fast_timestamp import parse_slash_timestamp, parse_dash_timestamp
+
+# 로그에서 찾을 문구(트리거/카운트/리셋)를 settings.json의 "rules" 표로 정의하고,
+# 같은 파일(source)에 대한 규칙들을 하나의 정규식(alternation)으로 합쳐 둡니다.
+# 그래서 규칙이 몇 개든 한 줄은 한 번만 검사합니다.
+#
+#   "rules": [
+#     {"pattern": "Heating Steadfast ON", "source": "csv", "role": "trigger", "timestamp": "csv_field"},
+#     {"pattern": "The FIB source is heating", "source": "converted", "role": "count", "timestamp": "dash"},
+#     {"pattern": "The FIB source is working properly.", "source": "converted", "role": "reset", "timestamp": "dash"}
+#   ]
+#
+# pattern 은 기본적으로 일반 문자열이고, "regex": true 이면 정규식으로 취급합니다.
+
+SOURCE_CSV = "csv"
+SOURCE_CONVERTED = "converted"
+
+ROLE_TRIGGER = "trigger"
+ROLE_COUNT = "count"
+ROLE_RESET = "reset"
+
+# 한 위치에서 여러 규칙이 겹치면 앞쪽 규칙이 이기므로, 리셋을 가장 먼저 둡니다.
+ROLE_PRIORITY = {ROLE_RESET: 0, ROLE_TRIGGER: 1, ROLE_COUNT: 2}
+
+# 각 source에서 워커가 실제로 사용하는 role
+SOURCE_ROLES = {
+    SOURCE_CSV: {ROLE_TRIGGER},
+    SOURCE_CONVERTED: {ROLE_COUNT, ROLE_RESET},
+}
+
+DEFAULT_RULES = [
+    {"pattern": "Heating Steadfast ON", "source": SOURCE_CSV, "role": ROLE_TRIGGER, "timestamp": "csv_field"},
+    {"pattern": "The FIB source is heating", "source": SOURCE_CONVERTED, "role": ROLE_COUNT, "timestamp": "dash"},
+    {"pattern": "The FIB source is working properly.", "source": SOURCE_CONVERTED, "role": ROLE_RESET, "timestamp": "dash"},
+]
+
+_DASH_SEARCH = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+_SLASH_SEARCH = re.compile(r"\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}(?:\.\d{1,6})?")
+
+
+def _csv_field_timestamp(line):
+    return parse_slash_timestamp(line.split(";", 1)[0].strip())
+
+
+def _search_timestamp(regex, parser):
+    def extract(line):
+        match = regex.search(line)
+        if not match:
+            raise ValueError("no timestamp in line")
+        return parser(match.group(0))
+    return extract
+
+
+TIMESTAMP_EXTRACTORS = {
+    "csv_field": _csv_field_timestamp,
+    "dash": _search_timestamp(_DASH_SEARCH, parse_dash_timestamp),
+    "slash": _search_timestamp(_SLASH_SEARCH, parse_slash_timestamp),
+}
+
+
+class Rule:
+    def __init__(self, index, pattern, source, role, timestamp, is_regex=False):
+        if source not in SOURCE_ROLES:
+            raise ValueError(f"rule {index}: unknown source '{source}'")
+        if role not in SOURCE_ROLES[source]:
+            raise ValueError(f"rule {index}: role '{role}' is not supported for source '{source}'")
+        if timestamp not in TIMESTAMP_EXTRACTORS:
+            raise ValueError(f"rule {index}: unknown timestamp extractor '{timestamp}'")
+        if not pattern:
+            raise ValueError(f"rule {index}: empty pattern")
+        self.name = f"r{index}"
+        self.pattern = pattern
+        self.source = source
+        self.role = role
+        self.timestamp = timestamp
+        self.regex = pattern if is_regex else re.escape(pattern)
+        try:
+            re.compile(self.regex)
+        except re.error as e:
+            raise ValueError(f"rule {index}: invalid regex: {e}")
+        self.extract_timestamp = TIMESTAMP_EXTRACTORS[timestamp]
+
+    def __repr__(self):
+        return f"Rule({self.pattern!r}, {self.source}, {self.role})"
+
+
+class CompiledRules:
+    """All rules of one source compiled into a single alternation regex."""
+
+    def __init__(self, rules):
+        self.rules = sorted(rules, key=lambda r: ROLE_PRIORITY[r.role])
+        self.by_name = {rule.name: rule for rule in self.rules}
+        alternation = "|".join(f"(?P<{rule.name}>{rule.regex})" for rule in self.rules) or r"(?!)"
+        try:
+            self.pattern = re.compile(alternation)
+            # 변환 로그는 mmap(bytes) 위에서 바로 검색하므로 bytes 버전도 만들어 둡니다.
+            self.bytes_pattern = re.compile(alternation.encode("utf-8"))
+        except re.error as e:
+            raise ValueError(f"rules could not be combined: {e}")
+
+    def match(self, line):
+        """Return the Rule matching the text line, or None."""
+        m = self.pattern.search(line)
+        return self.by_name[m.lastgroup] if m else None
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = rules
+        self.csv = CompiledRules([r for r in rules if r.source == SOURCE_CSV])
+        self.converted = CompiledRules([r for r in rules if r.source == SOURCE_CONVERTED])
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build from settings["rules"] (or the built-in defaults). Raises ValueError."""
+        entries = settings.get("rules") or DEFAULT_RULES
+        rules = []
+        for index, entry in enumerate(entries):
+            try:
+                rules.append(Rule(
+                    index,
+                    entry.get("pattern"),
+                    entry.get("source", SOURCE_CONVERTED),
+                    entry.get("role", ROLE_COUNT),
+                    entry.get("timestamp", "dash"),
+                    is_regex=entry.get("regex", False),
+                ))
+            except AttributeError:
+                raise ValueError(f"rule {index}: each rule must be an object")
+        rule_set = cls(rules)
+        logging.debug(f"[RULES] {len(rule_set.csv.rules)} CSV rule(s), {len(rule_set.converted.rules)} converted-log rule(s) compiled.")
+        return rule_set
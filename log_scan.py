@@ -0,0 +1,52 @@
+import mmap
+
+# g4_converter가 만든 변환 로그(TXT)를 메모리 맵(mmap)으로 열어서
+# 파일 끝에서부터 블록 단위로 거꾸로 훑어보는 도구입니다.
+# 파일 전체를 메모리에 올리지 않으므로 로그가 아무리 커져도 사용하는 메모리는 일정합니다.
+
+BLOCK_SIZE = 256 * 1024
+
+
+def iter_blocks_reverse(mm, block_size=BLOCK_SIZE):
+    """Yield (lo, hi) ranges from the end of `mm` backwards, aligned to line starts."""
+    hi = len(mm)
+    while hi > 0:
+        lo = max(0, hi - block_size)
+        if lo > 0:
+            lo = mm.rfind(b"\n", 0, lo) + 1
+        yield lo, hi
+        hi = lo
+
+
+def scan_reverse(path, pattern, block_size=BLOCK_SIZE):
+    """Yield (key, line) for every line matching `pattern`, newest line first.
+
+    `pattern` is a compiled bytes pattern, normally a rule set's `bytes_pattern`.
+    `key` is the name of the named group that matched (see log_rules) or, for a
+    pattern without named groups, the matched bytes.
+
+    Only matching lines are copied out of the map; `line` is still raw bytes so the
+    caller decides which of them are worth decoding. Stop iterating as soon as the
+    answer is known and the map is released.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 빈 파일은 mmap 할 수 없습니다.
+            return
+        try:
+            for lo, hi in iter_blocks_reverse(mm, block_size):
+                matches = list(pattern.finditer(mm, lo, hi))
+                last_line_start = None
+                for m in reversed(matches):
+                    line_start = mm.rfind(b"\n", lo, m.start()) + 1 or lo
+                    if line_start == last_line_start:
+                        continue
+                    last_line_start = line_start
+                    line_end = mm.find(b"\n", m.end(), hi)
+                    if line_end < 0:
+                        line_end = hi
+                    yield m.lastgroup or m.group(0), mm[line_start:line_end]
+        finally:
+            mm.close()
@@ -0,0 +1,95 @@
+import time
+import queue
+import atexit
+import logging
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+
+from tool_profiles import ToolLogFilter
+
+# 감시 루프가 로그 파일/콘솔에 직접 쓰지 않도록, 로그는 큐에 넣기만 하고
+# 별도 스레드(QueueListener)가 실제 파일/콘솔 쓰기를 맡습니다. 느린 디스크나 네트워크 드라이브에서도
+# 감시 주기가 로그 쓰기 때문에 늦어지지 않습니다.
+# 또 "Next monitoring will start in 60 seconds ..." 처럼 매 주기 똑같이 나오는 메시지는
+# repeat_seconds 동안 한 번만 남기고, 다음에 남길 때 생략된 횟수를 붙입니다.
+# 생략 대상은 extra=RATE_LIMITED 를 붙여 남긴 주기 메시지뿐입니다. [ALERT] 등 나머지 로그와 ERROR 이상은 항상 기록합니다.
+
+DEFAULT_REPEAT_SECONDS = 300
+MAX_TRACKED_MESSAGES = 512
+
+LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+# 매 주기 반복되는 메시지에만 붙입니다: logging.info("...", extra=RATE_LIMITED)
+RATE_LIMITED = {"rate_limit": True}
+
+
+def parse_level(value, default):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.upper() in LEVEL_NAMES:
+        return getattr(logging, value.upper())
+    if value is not None:
+        logging.warning(f"[CONFIG] Unknown log level '{value}' → Using {logging.getLevelName(default)}.")
+    return default
+
+
+class RepeatFilter(logging.Filter):
+    def __init__(self, repeat_seconds=DEFAULT_REPEAT_SECONDS, clock=time.monotonic):
+        super().__init__()
+        self.repeat_seconds = repeat_seconds
+        self.clock = clock
+        # (장비, 레벨, 메시지) -> [마지막으로 기록한 시각, 그 뒤로 생략한 횟수]
+        self.seen = OrderedDict()
+        self.suppressed = 0
+
+    def filter(self, record):
+        if self.repeat_seconds <= 0 or record.levelno >= logging.ERROR or not getattr(record, "rate_limit", False):
+            return True
+        key = (getattr(record, "tool_prefix", ""), record.levelno, record.getMessage())
+        now = self.clock()
+        entry = self.seen.get(key)
+        if entry is not None and now - entry[0] < self.repeat_seconds:
+            entry[1] += 1
+            self.suppressed += 1
+            return False
+
+        if entry is not None and entry[1]:
+            record.msg = f"{record.getMessage()} (repeated {entry[1]} more time(s) in the last {now - entry[0]:.0f} s)"
+            record.args = None
+        self.seen[key] = [now, 0]
+        self.seen.move_to_end(key)
+        if len(self.seen) > MAX_TRACKED_MESSAGES:
+            self.seen.popitem(last=False)
+        return True
+
+
+class QueueLogging:
+    """Root logger → QueueHandler → QueueListener thread → real handlers."""
+
+    def __init__(self, handlers, repeat_seconds=DEFAULT_REPEAT_SECONDS):
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = QueueHandler(self.queue)
+        # 장비 이름(contextvar)은 로그를 남긴 쪽 스레드에서 붙여야 하므로 큐에 넣기 전에 처리합니다.
+        self.queue_handler.addFilter(ToolLogFilter())
+        self.repeat_filter = RepeatFilter(repeat_seconds)
+        self.queue_handler.addFilter(self.repeat_filter)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.installed = False
+
+    def install(self, logger=None):
+        logger = logger or logging.getLogger()
+        logger.addHandler(self.queue_handler)
+        self.listener.start()
+        if not self.installed:
+            atexit.register(self.stop)
+        self.installed = True
+
+    def set_handlers(self, handlers):
+        # 쓰던 로그를 모두 내보낸 뒤 핸들러를 바꿉니다.
+        self.listener.stop()
+        self.listener.handlers = tuple(handlers)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
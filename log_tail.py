@@ -0,0 +1,229 @@
+import os
+import struct
+import logging
+
+from log_rotation import find_predecessor, member_size, read_member, rotation_chain
+
+# 모니터링 CSV처럼 계속 뒤에 덧붙여지는(append) 파일을 매번 통째로 읽지 않고,
+# 마지막으로 읽은 위치(byte offset)부터 새로 추가된 부분만 읽기 위한 도구입니다.
+# 파일이 돌려쓰기(rotation)되면 이전 파일(file.1, file.1.gz, ...)에서 못 읽은 나머지를 먼저 읽고
+# 새 파일을 처음부터 이어 읽습니다. 경계에서 잘린 줄은 이어 붙여서 한 줄로 처리합니다.
+# 이전 파일들도 살아 있는 파일과 같이 한 번에 max_read 바이트씩만 읽고, 어디까지 읽었는지(pending) 기억합니다.
+
+DEFAULT_TAIL_LINES = 300
+DEFAULT_TAIL_BYTES = 256 * 1024
+# 한 번에 앞으로 읽는 최대 크기: 오래 꺼져 있다가 체크포인트에서 이어 읽을 때도 메모리 사용량이 일정합니다.
+DEFAULT_READ_BYTES = 4 * 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+HEAD_BYTES = 64
+
+
+def file_identity(st):
+    # Windows에서도 os.stat()의 st_ino에는 NTFS file index가 들어갑니다.
+    return (st.st_dev, st.st_ino)
+
+
+def read_tail_bytes(f, end, max_lines=DEFAULT_TAIL_LINES, max_bytes=DEFAULT_TAIL_BYTES):
+    """Scan backwards from `end` until `max_lines` newlines or `max_bytes` are seen.
+
+    Returns (start, data): data begins at a line boundary (or at `start` when the
+    byte budget ran out mid-line, in which case the fragment is dropped).
+    """
+    pos = end
+    chunks = []
+    newlines = 0
+    limit = max(0, end - max_bytes)
+    while pos > limit and newlines <= max_lines:
+        size = min(BLOCK_SIZE, pos - limit)
+        pos -= size
+        f.seek(pos)
+        chunk = f.read(size)
+        chunks.append(chunk)
+        newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    if pos > 0:
+        # 중간에서 잘린 첫 줄은 버립니다.
+        cut = data.find(b"\n")
+        if cut < 0:
+            return end, b""
+        pos += cut + 1
+        data = data[cut + 1:]
+    return pos, data
+
+
+class TailReader:
+    """Persistent reader that returns only the lines appended since the last call.
+
+    The reader remembers the byte offset and identity (size, mtime, inode/file
+    index) of the file. A trailing line without a newline is left unread until
+    it is completed. When the file is rotated, the unread rest of the previous
+    file is found in the rotation chain (renamed or gzip-compressed) and read
+    before the new file, in the same `max_read` blocks. When the file shrinks or is replaced and no previous
+    file is found, the reader falls back to a bounded reverse scan of the tail.
+    One call reads at most `max_read` bytes forward; `remaining` tells how much
+    is left, so a long backlog is read in blocks by calling again.
+    """
+
+    def __init__(self, path, encoding="utf-8", max_lines=DEFAULT_TAIL_LINES, max_bytes=DEFAULT_TAIL_BYTES,
+                 max_read=DEFAULT_READ_BYTES):
+        self.path = path
+        self.encoding = encoding
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_read = max_read
+        # 지난 호출에서 max_read 때문에 다 읽지 못하고 남은 바이트 수
+        self.remaining = 0
+        self.offset = None
+        self.identity = None
+        self.size = None
+        self.mtime = None
+        self.head = b""
+        # 이전 파일 끝의 줄바꿈 없는 조각: 새 파일의 첫 줄과 이어 붙입니다.
+        self.carry = b""
+        # 회전된 파일 중 아직 다 읽지 못한 것들: [(경로, 읽은 위치)], 오래된 순
+        self.pending = []
+        self.bytes_read = 0
+
+    def reset(self):
+        self.offset = None
+        self.identity = None
+        self.size = None
+        self.mtime = None
+        self.head = b""
+        self.carry = b""
+        self.pending = []
+
+    def snapshot(self):
+        return {
+            "path": self.path,
+            "offset": self.offset,
+            "identity": list(self.identity) if self.identity else None,
+            "size": self.size,
+            "mtime": self.mtime,
+            "head": self.head.hex(),
+            "carry": self.carry.hex(),
+            "pending": [list(entry) for entry in self.pending],
+        }
+
+    def restore(self, data):
+        # 다른 파일을 가리키던 체크포인트는 무시합니다 (다음 읽기에서 꼬리 부분만 다시 훑음).
+        if data.get("path") != self.path or data.get("offset") is None:
+            return False
+        self.offset = data["offset"]
+        self.identity = tuple(data["identity"]) if data.get("identity") else None
+        self.size = data.get("size")
+        self.mtime = data.get("mtime")
+        self.head = bytes.fromhex(data.get("head", ""))
+        self.carry = bytes.fromhex(data.get("carry", ""))
+        self.pending = [tuple(entry) for entry in data.get("pending", [])]
+        return True
+
+    def _needs_rescan(self, st):
+        if self.offset is None or self.identity != file_identity(st):
+            return True
+        # 파일이 잘렸거나(truncate) 같은 이름의 더 오래된 파일로 바뀐 경우
+        return st.st_size < self.offset or st.st_mtime < self.mtime
+
+    def _find_rotated(self):
+        # 지난번에 읽던 파일을 체인에서 찾아, 못 읽은 나머지와 그보다 새 파일들을 오래된 순으로 pending 에 넣습니다.
+        index, member = find_predecessor(self.path, self.identity, self.head, self.offset, file_identity)
+        if member is None:
+            return False
+        chain = rotation_chain(self.path)
+        self.pending = [(member, self.offset)] + [(newer, 0) for newer in reversed(chain[1:index])]
+        names = ", ".join(os.path.basename(path) for path, _ in self.pending)
+        logging.info(f"[TAIL] '{os.path.basename(self.path)}' was rotated → Reading the rest of {names} first.")
+        return True
+
+    def _read_rotated(self, budget):
+        # pending 의 파일들을 오래된 순으로 최대 budget 바이트까지 읽고 읽은 위치를 옮깁니다.
+        chunks = []
+        while self.pending and budget > 0:
+            member, offset = self.pending[0]
+            try:
+                chunk = read_member(member, offset, budget)
+            except (OSError, EOFError) as e:
+                logging.warning(f"[TAIL] Could not read the rotated file '{os.path.basename(member)}': {e}")
+                self.pending.pop(0)
+                continue
+            if len(chunk) < budget:
+                self.pending.pop(0)
+            else:
+                self.pending[0] = (member, offset + len(chunk))
+            chunks.append(chunk)
+            budget -= len(chunk)
+        return b"".join(chunks)
+
+    def _pending_size(self):
+        total = 0
+        for member, offset in self.pending:
+            try:
+                total += max(0, member_size(member) - offset)
+            except (OSError, struct.error):
+                continue
+        return total
+
+    def read_lines(self):
+        st = os.stat(self.path)
+        rescan = self._needs_rescan(st)
+        self.remaining = 0
+        carry = self.carry
+        previous = b""
+        with open(self.path, "rb") as f:
+            # inode가 재사용되는 경우를 대비해 파일 앞부분도 비교합니다.
+            # 같은 크기의 새 파일일 수도 있으므로 "변화 없음"으로 판단하기 전에 비교해야 합니다.
+            head = f.read(HEAD_BYTES)
+            if not rescan and not head.startswith(self.head):
+                rescan = True
+            if not rescan and st.st_size == self.offset and not self.pending:
+                self.size, self.mtime = st.st_size, st.st_mtime
+                return []
+            if rescan and self.offset is not None:
+                try:
+                    found = self._find_rotated()
+                except (OSError, EOFError) as e:
+                    logging.warning(f"[TAIL] Could not read the rotated file of '{os.path.basename(self.path)}': {e}")
+                    found = False
+                if found:
+                    # 회전 전 파일의 나머지를 다 읽은 뒤 새 파일을 처음부터 끊김 없이 이어 읽습니다.
+                    rescan = False
+                    self.offset = 0
+                else:
+                    logging.info(f"[TAIL] '{os.path.basename(self.path)}' was truncated or rotated, rescanning tail.")
+            if rescan:
+                carry = b""
+                self.pending = []
+                start, data = read_tail_bytes(f, st.st_size, self.max_lines, self.max_bytes)
+            else:
+                budget = self.max_read
+                if self.pending:
+                    previous = self._read_rotated(budget)
+                    budget -= len(previous)
+                start = self.offset
+                data = b""
+                if not self.pending:
+                    f.seek(start)
+                    data = f.read(min(st.st_size - start, budget))
+                self.remaining = self._pending_size() + st.st_size - start - len(data)
+
+        # 아직 줄바꿈이 없는 마지막 줄은 다음 호출 때 다시 읽습니다.
+        # 앞에 붙인 조각(carry/이전 파일)은 이 파일의 오프셋에 포함되지 않으므로 따로 기억합니다.
+        prefix = carry + previous
+        buffer = prefix + data
+        end = buffer.rfind(b"\n") + 1
+        complete = buffer[:end]
+        if end >= len(prefix):
+            self.offset = start + end - len(prefix)
+            self.carry = b""
+        else:
+            self.offset = start
+            self.carry = prefix[end:]
+        self.identity = file_identity(st)
+        self.size, self.mtime = st.st_size, st.st_mtime
+        self.head = head
+        self.bytes_read += len(data) + len(previous)
+
+        if not complete:
+            return []
+        lines = complete.decode(self.encoding, errors="ignore").splitlines()
+        return lines[-self.max_lines:] if rescan else lines
@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime, timedelta
+
+from event_window import SlidingWindowCounter
+
+# 워커의 CSV → LOG 상태 전환 규칙만 따로 모아 둔 상태 기계(state machine)입니다.
+# 파일을 읽거나 팝업을 띄우는 일은 하지 않고, "무엇을 해야 하는지"만 돌려줍니다.
+# 그래서 동기/비동기 실행 루프가 같은 규칙을 공유할 수 있습니다.
+# listener 를 지정하면 트리거/heating/리셋/경보 때마다 listener(kind, time, **fields) 로 알려 줍니다 (이벤트 저널용).
+# LOG 모드 중 다시 온 CSV 트리거는 변환 로그의 heating 줄과 같은 이벤트 창(window)에 넣어 중복 없이 셉니다.
+# heating_count 는 LOG 모드에 들어오게 한 첫 트리거(1)이고, 나머지는 모두 log_count(창의 개수)입니다.
+
+STATE_CSV = "CSV"
+STATE_LOG = "LOG"
+
+REALERT_SECONDS = 60
+
+
+class HeatingStateMachine:
+    SNAPSHOT_TIMES = ("last_alert_time", "log_mode_start_time", "initial_heating_time", "last_processed_time",
+                      "last_trigger_time")
+
+    def __init__(self, threshold=3, timeout_minutes=60, clock=datetime.now, window=None):
+        self.threshold = threshold
+        self.timeout_minutes = timeout_minutes
+        self.clock = clock
+        self.state = STATE_CSV
+        self.last_alert_time = None
+        self.last_alert_reason = None
+        self.log_mode_start_time = None
+        self.initial_heating_time = None
+        self.heating_count = 0
+        # LOG 모드 중에 본 마지막 트리거 시각과, 이벤트 창에서 센 heating 수 (변환 로그 + 짝 없는 CSV 트리거)
+        self.last_trigger_time = None
+        self.log_count = 0
+        self.window = window if window is not None else SlidingWindowCounter(timeout_minutes)
+        self.last_processed_time = clock()
+        self.listener = None
+
+    def _emit(self, kind, now, **fields):
+        if self.listener is not None:
+            self.listener(kind, now, state=self.state, threshold=self.threshold, **fields)
+
+    def snapshot(self):
+        data = {"state": self.state, "heating_count": self.heating_count}
+        for key in self.SNAPSHOT_TIMES:
+            value = getattr(self, key)
+            data[key] = value.isoformat() if value else None
+        # 변환 로그는 재시작 후 다시 읽으면 되지만, 아직 짝이 없는 CSV 트리거는 CSV를 다시 읽지 않으므로 저장합니다.
+        data["repeat_triggers"] = [ts.isoformat() for ts in list(self.window.triggers)] if self.state == STATE_LOG else []
+        return data
+
+    def restore(self, data):
+        self.state = data.get("state", STATE_CSV)
+        # 예전 체크포인트는 LOG 모드 중 트리거까지 heating_count 에 더해 두었으므로 첫 트리거만 남깁니다.
+        self.heating_count = min(data.get("heating_count", 0), 1)
+        for key in self.SNAPSHOT_TIMES:
+            value = data.get(key)
+            setattr(self, key, datetime.fromisoformat(value) if value else None)
+        if self.last_processed_time is None:
+            self.last_processed_time = self.clock()
+        if self.state == STATE_LOG and self.initial_heating_time:
+            for value in data.get("repeat_triggers", []):
+                self.window.add_trigger(datetime.fromisoformat(value), self.initial_heating_time)
+            self.log_count = self.window.count
+
+    @property
+    def needed_count(self):
+        return self.threshold - self.heating_count
+
+    def _return_to_csv(self, now):
+        self.state = STATE_CSV
+        self.last_processed_time = now
+
+    def _fire_alert(self, now, reason):
+        self.last_alert_time = now
+        self.last_alert_reason = reason
+        self._return_to_csv(now)
+        self._emit("alert", now, reason=reason, initial_heating_time=self.initial_heating_time,
+                   count=self.heating_count + self.log_count)
+        return "alert"
+
+    def on_trigger(self, ts):
+        """Handle a 'Heating Steadfast ON' line. Returns True when LOG mode is entered."""
+        if self.state != STATE_CSV or ts <= self.last_processed_time:
+            return False
+        logging.info(f"[CSV_WATCH] 'Heating Steadfast ON' trigger detected ({ts}) → Entering LOG mode.")
+        self.state = STATE_LOG
+        self.log_mode_start_time = self.clock()
+        self.initial_heating_time = ts
+        self.last_trigger_time = ts
+        self.heating_count = 1
+        self.log_count = 0
+        self._emit("trigger", self.log_mode_start_time, event_time=ts, count=1)
+        return True
+
+    def on_repeat_trigger(self, ts):
+        """Count another 'Heating Steadfast ON' that arrives while already in LOG mode.
+
+        Returns "alert", "suppressed", "counted" or None (not counted).
+        """
+        if self.state != STATE_LOG or (self.last_trigger_time and ts <= self.last_trigger_time):
+            return None
+        self.last_trigger_time = ts
+        if not self.window.add_trigger(ts, self.initial_heating_time):
+            logging.info(f"[CSV_WATCH] Another 'Heating Steadfast ON' during LOG mode ({ts}) → Already counted from the converted log.")
+            return None
+        self.log_count = self.window.count
+        total_count = self.heating_count + self.log_count
+        logging.info(f"[CSV_WATCH] Another 'Heating Steadfast ON' during LOG mode ({ts}) → Heating count {total_count}.")
+        self._emit("trigger", self.clock(), event_time=ts, count=total_count)
+        return self._check_threshold(self.clock()) or "counted"
+
+    def check_timeout(self):
+        """Return "alert" when LOG mode has run longer than the timeout."""
+        if self.state != STATE_LOG:
+            return None
+        now = self.clock()
+        if self.log_mode_start_time and now - self.log_mode_start_time > timedelta(minutes=self.timeout_minutes):
+            logging.warning(f"[LOG_WATCH] Monitoring exceeded {self.timeout_minutes} minutes, timeout.")
+            logging.info("[ALERT] Timeout condition met → Executing alarm.")
+            return self._fire_alert(now, "timeout")
+        return None
+
+    def on_log_result(self, count, reset):
+        """Apply a converted-log analysis result.
+
+        Returns "reset", "alert", "suppressed" or None (keep watching).
+        """
+        if self.state != STATE_LOG:
+            return None
+        now = self.clock()
+        if count != self.log_count:
+            self._emit("heating", now, count=self.heating_count + count, log_count=count,
+                       initial_heating_time=self.initial_heating_time)
+        self.log_count = count
+        logging.debug(f"[LOG_WATCH] Analysis result: additional detected ({count}), reset ({reset}), total ({self.heating_count + count})")
+
+        if reset:
+            logging.info("[LOG_WATCH] 'working properly' reset condition found → Returning to CSV mode.")
+            self._return_to_csv(now)
+            self._emit("reset", now, initial_heating_time=self.initial_heating_time)
+            return "reset"
+        return self._check_threshold(now)
+
+    def _check_threshold(self, now):
+        # 첫 트리거(heating_count)와 이벤트 창에서 센 heating 수를 합쳐 임계값과 비교합니다.
+        total_count = self.heating_count + self.log_count
+        if total_count >= self.threshold:
+            if not self.last_alert_time or (now - self.last_alert_time).seconds > REALERT_SECONDS:
+                logging.info(f"[ALERT] Threshold condition met (Total: {total_count} >= {self.threshold}) → Executing alarm.")
+                return self._fire_alert(now, f"threshold ({total_count} >= {self.threshold})")
+            logging.info("[ALERT] Condition met, but pop-up skipped due to 60-second re-alarm prevention.")
+            self._emit("suppressed", now, count=total_count)
+            return "suppressed"
+        return None
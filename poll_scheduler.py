@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+
+# 다음 감시 주기까지 얼마나 기다릴지를 상태(CSV/LOG), 파일이 늘어나는 속도, 변환기 실행 시간으로 정합니다.
+#  - CSV 모드 : poll_interval_seconds 로 시작하고, CSV가 poll_idle_minutes 이상 그대로면 점점 늘림 (밤/주말)
+#  - LOG 모드 : log_poll_seconds (기본: poll_interval_seconds / 4) 로 자주 확인
+#  - 두 모드 모두 파일이 늘어나는 속도에 맞춰 간격을 조절: 한 주기에 poll_target_bytes 정도가 쌓이도록
+#               빨리 늘면 짧게, 느리게 늘면 길게 (기본 간격의 1/RATE_STRETCH ~ RATE_STRETCH 배)
+#               단, 변환기 실행 시간 × converter_cost_factor 보다 짧게는 돌리지 않음 (변환기가 쉬지 않고 도는 것 방지)
+#               타임아웃 시각이 더 가까우면 그 시각에 맞춰 깨어남 (poll_min_seconds 보다 우선)
+#  - 결과는 poll_min_seconds ~ poll_max_seconds 로 제한하고, 간격이나 이유가 바뀔 때마다 로그에 남깁니다.
+# 파일이 바뀌면 감시기(file_watch)가 어차피 바로 깨우므로, 여기서 정하는 값은 "최대 대기 시간"입니다.
+
+DEFAULTS = {
+    "poll_interval_seconds": 60,
+    "poll_min_seconds": 5,
+    "poll_max_seconds": 600,
+    "poll_idle_minutes": 30,
+    "converter_cost_factor": 4,
+    "poll_target_bytes": 64 * 1024,
+}
+# 증가 속도로 기본 간격을 줄이거나 늘리는 최대 배수
+RATE_STRETCH = 4
+# 간격이 이 비율 이상 바뀔 때만 INFO 로 남깁니다 (속도에 따라 매 주기 조금씩 바뀌므로).
+LOG_CHANGE_RATIO = 0.25
+
+
+class PollScheduler:
+    def __init__(self, settings, clock=time.monotonic):
+        self.clock = clock
+        # 파일별: [마지막 크기, 마지막으로 커진 시각, 증가 속도(bytes/s, 지수 평균), 마지막 확인 시각]
+        self.files = {}
+        self.last_choice = None
+        self.configure(settings)
+
+    def configure(self, settings):
+        get = lambda key: settings.get(key, DEFAULTS.get(key))
+        self.adaptive = settings.get("poll_adaptive", True)
+        self.base = get("poll_interval_seconds")
+        self.log_base = settings.get("log_poll_seconds", self.base / 4)
+        self.min_seconds = get("poll_min_seconds")
+        self.max_seconds = max(self.min_seconds, get("poll_max_seconds"))
+        self.idle_seconds = get("poll_idle_minutes") * 60
+        self.cost_factor = get("converter_cost_factor")
+        self.target_bytes = get("poll_target_bytes")
+
+    def observe_file(self, kind, path):
+        """Record the current size of a watched file ("csv" or "log")."""
+        try:
+            size = os.path.getsize(path) if path else None
+        except OSError:
+            size = None
+        now = self.clock()
+        entry = self.files.get(kind)
+        if entry is None:
+            self.files[kind] = [size, now, 0.0, now]
+            return
+        last_size, _, rate, checked = entry
+        if size is not None and size != last_size:
+            # 줄어든 경우(로테이션)도 새 데이터가 있는 것으로 봅니다.
+            grown = size - last_size if last_size is not None and size > last_size else size
+            elapsed = max(now - checked, 1e-3)
+            entry[1] = now
+            entry[2] = 0.5 * rate + 0.5 * grown / elapsed
+        elif now - entry[1] > self.idle_seconds:
+            entry[2] = 0.0
+        entry[0] = size
+        entry[3] = now
+
+    def idle_for(self, kind):
+        entry = self.files.get(kind)
+        return self.clock() - entry[1] if entry else 0.0
+
+    def rate(self, kind):
+        entry = self.files.get(kind)
+        return entry[2] if entry else 0.0
+
+    def _scale_by_rate(self, interval, kind, reasons):
+        # 한 주기에 target_bytes 정도가 쌓이는 간격으로 맞춥니다. 증가가 없으면 (아직 모름/멈춤) 그대로 둡니다.
+        rate = self.rate(kind)
+        if rate <= 0 or not self.target_bytes:
+            return interval
+        scaled = min(interval * RATE_STRETCH, max(interval / RATE_STRETCH, self.target_bytes / rate))
+        if scaled < interval * 0.9:
+            reasons.append("fast growth")
+        elif scaled > interval * 1.1:
+            reasons.append("slow growth")
+        else:
+            return interval
+        return scaled
+
+    def next_interval(self, state, converter_seconds=None, deadline_seconds=None):
+        """Return (seconds, reason) for the next wait."""
+        if not self.adaptive:
+            return self.base, "fixed poll_interval_seconds"
+
+        if state == "LOG":
+            interval = self.log_base
+            reasons = [f"LOG mode, source log +{self.rate('log'):.0f} B/s"]
+            idle = self.idle_for("log")
+            if idle > self.idle_seconds:
+                interval = self.base
+                reasons = [f"LOG mode, source log idle {idle / 60:.0f} min"]
+            else:
+                interval = self._scale_by_rate(interval, "log", reasons)
+            if converter_seconds and converter_seconds * self.cost_factor > interval:
+                interval = converter_seconds * self.cost_factor
+                reasons.append(f"converter takes {converter_seconds:.1f} s")
+        else:
+            interval = self.base
+            idle = self.idle_for("csv")
+            if idle > self.idle_seconds:
+                # 조용한 시간이 길수록 간격을 늘립니다 (poll_idle_minutes 마다 기본 간격만큼 추가).
+                interval = self.base * (1 + (idle - self.idle_seconds) / self.idle_seconds)
+                reasons = [f"CSV mode, CSV idle {idle / 60:.0f} min"]
+            else:
+                reasons = [f"CSV mode, CSV +{self.rate('csv'):.0f} B/s"]
+                interval = self._scale_by_rate(interval, "csv", reasons)
+
+        if interval < self.min_seconds:
+            interval = self.min_seconds
+            reasons.append("raised to poll_min_seconds")
+        elif interval > self.max_seconds:
+            interval = self.max_seconds
+            reasons.append("capped at poll_max_seconds")
+
+        # 타임아웃 경보가 늦지 않도록 제한 시각이 더 가까우면 그때 깨어납니다 (poll_min_seconds 보다 우선).
+        if state == "LOG" and deadline_seconds is not None and 0 <= deadline_seconds < interval:
+            interval = deadline_seconds + 1
+            reasons.append(f"timeout in {deadline_seconds:.0f} s")
+
+        reason = ", ".join(reasons)
+        kind = (reasons[0].split(",")[0], len(reasons))
+        last = self.last_choice
+        if last is None or last[1] != kind or abs(interval - last[0]) > LOG_CHANGE_RATIO * last[0]:
+            logging.info(f"[SCHEDULER] Poll interval {interval:.0f} s ({reason})")
+            self.last_choice = (interval, kind)
+        else:
+            logging.debug(f"[SCHEDULER] Poll interval {interval:.0f} s ({reason})")
+        return interval, reason
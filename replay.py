@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import deque
+from datetime import datetime, timedelta
+
+import heating_monitor_worker as worker
+from log_rules import TIMESTAMP_EXTRACTORS
+from monitor_state import STATE_CSV
+
+# 녹화해 둔 CSV / 변환 로그를 가상 시계(virtual clock)에 맞춰 임시 파일에 다시 써 넣으면서
+# 워커의 감시 주기(heating_monitor_worker.run_cycle)와 폴링 간격(PollScheduler)을 그대로 돌려 봅니다.
+# 변환기만 녹화된 변환 로그로 대신합니다. 실제로 기다리지 않으므로
+# 하루치 로그도 몇 초 만에 재생되고, 각 경보가 원인 이벤트보다 얼마나 늦게 떴는지 알 수 있습니다.
+#
+#   python replay.py --csv recorded.csv --converted recorded.txt --settings settings.json
+#   python replay.py --demo          (합성한 하루치 로그로 실행)
+
+SOURCE_CSV = "csv"
+SOURCE_CONVERTED = "converted"
+
+
+class VirtualClock:
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance_to(self, when):
+        if when > self.current:
+            self.current = when
+
+
+SEEK_BLOCK = 64 * 1024
+
+
+def _seek_time(f, size, start, extract, encoding):
+    # 시각 순으로 쌓인 파일에서 start 이전 줄을 이분 탐색으로 건너뜁니다 (몇 달치 파일도 seek 몇 번).
+    # 돌려주는 위치 뒤의 첫 완전한 줄부터 읽으면 start 이후의 줄은 하나도 빠지지 않습니다.
+    lo, hi = 0, size
+    while hi - lo > SEEK_BLOCK:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()
+        ts = None
+        for raw in f:
+            try:
+                ts = extract(raw.decode(encoding, errors="ignore"))
+                break
+            except ValueError:
+                continue
+        if ts is None or ts >= start:
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+def load_recording(path, timestamp="dash", encoding="utf-8", start=None, end=None):
+    """Return [(ts, line)] for a recorded log. Lines without a timestamp keep the previous one.
+
+    With `start`/`end`, only lines stamped in [start, end) are loaded; the file is
+    assumed to be in time order and the lines before `start` are skipped by seeking.
+    """
+    extract = TIMESTAMP_EXTRACTORS[timestamp]
+    entries = []
+    last_ts = None
+    with open(path, "rb") as f:
+        if start is not None:
+            offset = _seek_time(f, os.fstat(f.fileno()).st_size, start, extract, encoding)
+            f.seek(offset)
+            if offset:
+                f.readline() # 중간에서 잘린 줄
+        for raw in f:
+            line = raw.decode(encoding, errors="ignore").replace("\r\n", "\n")
+            if not line.endswith("\n"):
+                line += "\n"
+            try:
+                last_ts = extract(line)
+            except ValueError:
+                if last_ts is None:
+                    continue # 헤더 등 첫 시각보다 앞선 줄
+            if start is not None and last_ts < start:
+                continue
+            if end is not None and last_ts >= end:
+                break
+            entries.append((last_ts, line))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+
+class ReplayHarness:
+    def __init__(self, settings, csv_entries, converted_entries, workdir,
+                 converter_seconds=0.0, debounce_seconds=0.2):
+        self.settings = settings
+        self.workdir = workdir
+        self.csv_path = os.path.join(workdir, "replay_monitor.csv")
+        self.converted_path = os.path.join(workdir, "replay_converted.txt")
+        for path in (self.csv_path, self.converted_path):
+            open(path, "w").close()
+
+        self.pending = {SOURCE_CSV: deque(csv_entries), SOURCE_CONVERTED: deque(converted_entries)}
+        first = min((entries[0][0] for entries in self.pending.values() if entries), default=datetime.now())
+        self.clock = VirtualClock(first - timedelta(seconds=1))
+        self.start = self.clock.now()
+        self.poll = timedelta(seconds=settings.get("poll_interval_seconds", 60))
+        self.converter_delay = timedelta(seconds=converter_seconds)
+        self.debounce = timedelta(seconds=debounce_seconds)
+
+        # 원본 로그 자리에는 변환 로그를 두어, 폴링 간격이 워커처럼 로그가 늘어나는 속도를 따르게 합니다.
+        self.tool = worker.ToolMonitor(dict(settings, monitoring_log_file_path=self.csv_path,
+                                            log_file_path=self.converted_path,
+                                            converted_log_file_path=self.converted_path,
+                                            converter_output="file"),
+                                       None, clock=self.clock.now)
+        self.tool.machine.listener = self._on_event
+        self.machine = self.tool.machine
+        self.window = self.tool.window
+        self.cache = self.tool.conversion_cache
+        self.source_changed = False
+        # CSV 모드에서 결과가 달라지는 건 트리거 줄이 쓰일 때뿐이므로 그 시각만 따로 모아 둡니다.
+        self.trigger_times = deque(ts for ts, line in csv_entries if self.tool.rules.csv.match(line))
+
+        self.cycles = 0
+        self.triggers = []
+        self.resets = []
+        self.alerts = []
+
+    def _flush_until(self, now):
+        # 가상 시각 now 까지 "기록된" 줄을 임시 파일에 덧붙입니다.
+        for source, path in ((SOURCE_CSV, self.csv_path), (SOURCE_CONVERTED, self.converted_path)):
+            queue = self.pending[source]
+            lines = []
+            while queue and queue[0][0] <= now:
+                lines.append(queue.popleft()[1])
+            if lines:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                if source == SOURCE_CONVERTED:
+                    # 원본이 바뀌었으므로 다음 주기에 변환기가 다시 돌고 지난 분석 결과는 버려집니다.
+                    self.cache.invalidate()
+                    self.source_changed = True
+
+    def _on_event(self, kind, now, **fields):
+        if kind == "trigger" and fields.get("count") == 1:
+            self.triggers.append(fields["event_time"])
+
+    def _convert(self, settings, cache=None, trace=None):
+        # 변환기 대신 녹화된 변환 로그를 그대로 쓰고, 변환기가 실제로 도는 주기(원본 변경 시)에만
+        # 변환에 걸리는 시간만큼 시계를 진행합니다.
+        if self.source_changed:
+            self.source_changed = False
+            started = self.clock.now()
+            self.clock.advance_to(started + self.converter_delay)
+            if trace is not None:
+                trace.on_conversion(started, self.clock.now())
+        return True
+
+    def _cycle(self):
+        self.cycles += 1
+        return worker.run_cycle(self.tool, convert=self._convert)
+
+    def _record(self, action):
+        machine = self.machine
+        now = self.clock.now()
+        if action == "reset":
+            self.resets.append(now)
+        elif action == "alert":
+            if machine.last_alert_reason == "timeout":
+                cause = machine.log_mode_start_time + timedelta(minutes=machine.timeout_minutes)
+            else:
+                cause = self.window.events[-1] if self.window.events else machine.initial_heating_time
+            self.alerts.append({
+                "fired_at": now,
+                "reason": machine.last_alert_reason,
+                "trigger_time": machine.initial_heating_time,
+                "cause_time": cause,
+                "latency_from_trigger": (now - machine.initial_heating_time).total_seconds(),
+                "latency_from_cause": (now - cause).total_seconds(),
+            })
+
+    def _next_wake(self, action):
+        """Return the next virtual time at which a cycle can change anything, or None.
+
+        The worker wakes when its poll interval runs out or a watched file changes;
+        wakeups that bring no new trigger or converted-log line change nothing, so
+        they are only followed (to keep the poll scheduler in step) and not run.
+        """
+        now = self.clock.now()
+        machine = self.machine
+        while self.trigger_times and self.trigger_times[0] <= now:
+            self.trigger_times.popleft()
+        # 워커는 감시 중인 파일이 바뀌면 디바운스 후 바로 깨어납니다.
+        next_trigger = self.trigger_times[0] + self.debounce if self.trigger_times else None
+        if machine.state == STATE_CSV:
+            return next_trigger
+
+        changes = [next_trigger] if next_trigger is not None else []
+        queue = self.pending[SOURCE_CONVERTED]
+        if queue:
+            changes.append(max(queue[0][0], now) + self.debounce)
+        change = min(changes, default=None)
+        deadline = machine.log_mode_start_time + timedelta(minutes=machine.timeout_minutes)
+        while True:
+            # LOG 모드에서는 CSV, 원본 로그 어느 쪽이 바뀌어도, 또는 폴링 스케줄러가 고른 간격이 지나도 깨어납니다.
+            now = self.clock.now()
+            self._flush_until(now)
+            wake = now + timedelta(seconds=self.tool.next_poll())
+            csv_queue = self.pending[SOURCE_CSV]
+            if csv_queue:
+                wake = min(wake, max(csv_queue[0][0], now) + self.debounce)
+            if change is not None and change <= wake:
+                return change
+            # 재경보 방지 시간이 지나면 같은 결과로도 경보가 뜨고, 제한 시각을 넘기면 타임아웃이므로 그 주기는 돌립니다.
+            if action == "suppressed" or wake > deadline:
+                return wake
+            self.clock.advance_to(wake)
+
+    def run(self):
+        started = time.perf_counter()
+        last_event = max((entries[-1][0] for entries in self.pending.values() if entries), default=self.clock.now())
+        end = last_event + timedelta(minutes=self.machine.timeout_minutes) + self.poll
+        while self.clock.now() <= end:
+            self._flush_until(self.clock.now())
+            previous_state = self.machine.state
+            action = self._cycle()
+            self._record(action)
+            if self.machine.state != previous_state:
+                continue
+            wake = self._next_wake(action)
+            if wake is None:
+                break
+            self.clock.advance_to(wake)
+        return {
+            "cycles": self.cycles,
+            "triggers": len(self.triggers),
+            "resets": len(self.resets),
+            "alerts": self.alerts,
+            "virtual_seconds": (self.clock.now() - self.start).total_seconds(),
+            "wall_seconds": time.perf_counter() - started,
+        }
+
+
+def replay(settings, csv_entries, converted_entries, converter_seconds=0.0):
+    workdir = tempfile.mkdtemp(prefix="heating_replay_")
+    try:
+        return ReplayHarness(settings, csv_entries, converted_entries, workdir, converter_seconds).run()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def generate_demo_recording(day_start, triggers=12, seed_minutes=7):
+    """Synthesize one day of CSV/converted lines: every other trigger ends in an alert."""
+    csv_entries, converted_entries = [], []
+    for n in range(triggers):
+        t0 = day_start + timedelta(hours=2 * n, minutes=seed_minutes)
+        csv_entries.append((t0, f"{t0.strftime('%Y/%m/%d %H:%M:%S.%f')[:-3]};Heating Steadfast ON\n"))
+        for m in range(0, 120, 1):
+            # 작업과 무관한 CSV 잡음
+            ts = t0 + timedelta(minutes=m, seconds=30)
+            csv_entries.append((ts, f"{ts.strftime('%Y/%m/%d %H:%M:%S.%f')[:-3]};Stage idle\n"))
+        heating = 3 if n % 2 else 1
+        for k in range(1, heating + 1):
+            ts = t0 + timedelta(minutes=5 * k)
+            converted_entries.append((ts, f"{ts.strftime('%Y-%m-%d %H:%M:%S')} The FIB source is heating\n"))
+        if not n % 2:
+            ts = t0 + timedelta(minutes=20)
+            converted_entries.append((ts, f"{ts.strftime('%Y-%m-%d %H:%M:%S')} The FIB source is working properly.\n"))
+    csv_entries.sort(key=lambda entry: entry[0])
+    converted_entries.sort(key=lambda entry: entry[0])
+    return csv_entries, converted_entries
+
+
+def print_report(report):
+    print(f"Replayed {report['cycles']} cycles in {report['wall_seconds']:.2f} s "
+          f"({report['virtual_seconds'] / 3600:.1f} virtual hours)")
+    print(f"Triggers: {report['triggers']}, resets: {report['resets']}, alerts: {len(report['alerts'])}")
+    for alert in report["alerts"]:
+        print(f"  {alert['fired_at']}  {alert['reason']:<22} trigger {alert['trigger_time']}  "
+              f"+{alert['latency_from_trigger']:.0f} s from trigger, +{alert['latency_from_cause']:.1f} s from cause")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded heating logs against the worker logic.")
+    parser.add_argument("--csv", help="recorded monitoring CSV")
+    parser.add_argument("--converted", help="recorded converted log (TXT)")
+    parser.add_argument("--settings", help="settings.json to take threshold/interval/rules from")
+    parser.add_argument("--poll", type=float, help="override poll_interval_seconds")
+    parser.add_argument("--converter-seconds", type=float, default=0.0, help="virtual time each conversion takes")
+    parser.add_argument("--demo", action="store_true", help="replay a synthetic day instead of recorded files")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the worker's INFO log")
+    args = parser.parse_args(argv)
+
+    # 재생 중에는 실제 worker.log 에 쓰지 않습니다.
+    worker.detach_log_file(logging.INFO if args.verbose else logging.WARNING)
+
+    settings = {}
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+    if args.poll is not None:
+        settings["poll_interval_seconds"] = args.poll
+
+    if args.demo:
+        csv_entries, converted_entries = generate_demo_recording(datetime(2024, 1, 1))
+    elif args.csv and args.converted:
+        csv_entries = load_recording(args.csv, "csv_field")
+        converted_entries = load_recording(args.converted, "dash")
+    else:
+        parser.error("either --demo or both --csv and --converted are required")
+
+    report = replay(settings, csv_entries, converted_entries, args.converter_seconds)
+    if args.json:
+        print(json.dumps(report, default=str, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
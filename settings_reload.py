@@ -0,0 +1,73 @@
+import os
+import json
+import logging
+
+# settings.json 이 바뀌면 (수정 시각/크기로 판단) 다시 읽고 검사한 뒤 새 설정을 돌려줍니다.
+# 워커는 이를 다음 감시 주기 시작 시점에 적용하므로, 재시작 없이도 읽던 위치(offset)와
+# 상태(CSV/LOG, 카운트)를 그대로 유지합니다. 읽기/검사에 실패하면 지금 설정을 계속 씁니다.
+
+# 실행 중에는 바꿀 수 없고 재시작해야 반영되는 공통 설정
+RESTART_KEYS = (
+    "runtime", "watch_backend", "watch_poll_seconds", "max_concurrent_conversions",
+    "checkpoint_file", "checkpoint_milestone_bytes", "checkpoint_max_age_minutes",
+    "alert_sinks", "alert_log_file", "alert_webhook_url", "alert_webhook_timeout",
+    "metrics_textfile", "metrics_port", "metrics_interval_seconds", "latency_summary_minutes",
+    "control_enabled", "control_port", "journal_enabled", "journal_dir",
+)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def changed_keys(old, new):
+    return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+
+
+class SettingsReloader:
+    def __init__(self, path, validate, current=None):
+        self.path = path
+        self.validate = validate
+        self.current = current or {}
+        self.stamp = _stamp(path)
+        self.reloads = 0
+
+    def request_reload(self):
+        # 수정 시각과 관계없이 다음 poll() 에서 파일을 다시 읽습니다. (제어 채널의 reload 명령)
+        self.stamp = None
+
+    def poll(self):
+        """Return the new settings dict if the file changed and is valid, else None."""
+        stamp = _stamp(self.path)
+        if stamp is None or stamp == self.stamp:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                settings = json.load(f)
+        except (OSError, ValueError) as e:
+            # GUI가 아직 쓰는 중일 수 있으므로 stamp는 그대로 두고 다음 주기에 다시 읽습니다.
+            logging.error(f"[CONFIG] settings.json changed but could not be read ({e}) → Keeping current settings.")
+            return None
+        self.stamp = stamp
+
+        if not isinstance(settings, dict):
+            logging.error("[CONFIG] settings.json must contain a JSON object → Keeping current settings.")
+            return None
+        changed = changed_keys(self.current, settings)
+        if not changed:
+            return None
+        if not self.validate(settings):
+            logging.error("[CONFIG] New settings.json failed validation → Keeping current settings.")
+            return None
+
+        restart = [key for key in changed if key in RESTART_KEYS]
+        if restart:
+            logging.warning(f"[CONFIG] Changes to {', '.join(restart)} take effect after a restart.")
+        logging.info(f"[CONFIG] settings.json reloaded, changed: {', '.join(changed)}")
+        self.current = settings
+        self.reloads += 1
+        return settings
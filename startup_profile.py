@@ -0,0 +1,96 @@
+import sys
+import time
+import builtins
+import importlib
+import importlib.util
+
+# 워커 시작 시간을 재는 도구입니다. (로그온 작업/5분 감시 작업이 워커를 자주 다시 실행하므로 시작이 빨라야 합니다)
+#  - STARTUP.mark("...") : 이 모듈을 import 한 순간부터 걸린 시간을 단계별로 기록 (exe 압축 해제 등 그 이전 시간은 제외)
+#  - --profile-startup   : builtins.__import__ 를 감싸서 모듈별 import 시간(자체/누적)을 기록
+#                          (-X importtime 은 frozen exe 에서 쓸 수 없으므로 직접 잽니다)
+#  - lazy_import(name)   : 모듈 객체만 먼저 만들고, 실제 로드는 처음 속성을 쓸 때 합니다 (importlib LazyLoader)
+
+
+def lazy_import(name):
+    """Return `name` as a module that is only executed on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+        return importlib.import_module(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupProfile:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.marks = {}
+        # 모듈 이름 → [자체 시간, 누적 시간] (초)
+        self.imports = {}
+        self._stack = []
+        self._original_import = None
+
+    @property
+    def profiling(self):
+        return self._original_import is not None
+
+    def mark(self, label):
+        """Record the first time `label` is reached; returns seconds since start, or None if already marked."""
+        if label in self.marks:
+            return None
+        self.marks[label] = self.clock() - self.started
+        return self.marks[label]
+
+    def profile_imports(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def stop_profiling(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        full_name = name
+        if level:
+            try:
+                full_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if full_name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        started = self.clock()
+        self._stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = self.clock() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            entry = self.imports.setdefault(full_name, [0.0, 0.0])
+            entry[0] += elapsed - children
+            entry[1] += elapsed
+
+    def report(self, limit=20):
+        """Log-ready lines: startup marks, then the slowest modules by self time."""
+        lines = [f"{label}: {seconds * 1000:.0f} ms" for label, seconds in
+                 sorted(self.marks.items(), key=lambda item: item[1])]
+        if self.imports:
+            total = sum(own for own, _ in self.imports.values())
+            lines.append(f"{len(self.imports)} module(s) imported in {total * 1000:.0f} ms, slowest (self / cumulative):")
+            slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+            for name, (own, cumulative) in slowest:
+                lines.append(f"  {name:<32} {own * 1000:7.1f} ms {cumulative * 1000:8.1f} ms")
+        return lines
+
+
+STARTUP = StartupProfile()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from control_channel import ControlClient, ControlError, ControlServer
+
+# 127.0.0.1 에 ControlServer 를 띄우고 ControlClient 로 명령을 보내 봅니다.
+# 클라이언트는 GUI 처럼 하트비트 파일에 적힌 포트/토큰으로 만듭니다.
+
+
+@pytest.fixture
+def server():
+    calls = []
+
+    def status(request):
+        calls.append("status")
+        return {"tools": {"default": {"state": "CSV", "heating_count": 0}}}
+
+    def check(request):
+        calls.append("check")
+        return {}
+
+    def shutdown(request):
+        calls.append("shutdown")
+        return {"stopping": True}
+
+    def reload(request):
+        raise ValueError("settings.json is not valid JSON")
+
+    control = ControlServer({"status": status, "check": check, "shutdown": shutdown, "reload": reload})
+    control.start()
+    control.calls = calls
+    yield control
+    control.close()
+
+
+def write_heartbeat(path, control, status="running"):
+    path.write_text(json.dumps(dict(control.heartbeat_fields(), status=status)))
+    return str(path)
+
+
+def test_client_from_heartbeat_sends_commands(server, tmp_path):
+    client = ControlClient.from_heartbeat(write_heartbeat(tmp_path / "heartbeat.json", server))
+    assert client.status()["tools"]["default"]["state"] == "CSV"
+    assert client.check_now() == {"ok": True}
+    assert client.shutdown() == {"ok": True, "stopping": True}
+    assert server.calls == ["status", "check", "shutdown"]
+
+
+def test_client_reports_errors(server):
+    with pytest.raises(ControlError, match="invalid token"):
+        ControlClient(server.port, "wrong").status()
+    client = ControlClient(server.port, server.token)
+    with pytest.raises(ControlError, match="unknown command"):
+        client.request("restart")
+    with pytest.raises(ControlError, match="not valid JSON"):
+        client.reload()
+    assert server.calls == []
+
+
+def test_client_needs_a_running_worker(server, tmp_path):
+    assert ControlClient.from_heartbeat(str(tmp_path / "missing.json")) is None
+    assert ControlClient.from_heartbeat(write_heartbeat(tmp_path / "heartbeat.json", server, "stopped")) is None
+    port = server.port
+    server.close()
+    with pytest.raises(ControlError, match="not reachable"):
+        ControlClient(port, server.token, timeout=1).status()
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+import heating_monitor_worker as worker
+from convert_cache import ConversionCache
+from event_window import SlidingWindowCounter
+
+# fake_g4_converter.py 로 stream_converted_log 를 stdout / fifo 모드에서 실제로 실행해 보고
+# 기존 file 모드(convert_log + analyze_converted_log)와 결과가 같은지, 리셋에서 일찍 멈추는지,
+# 변환기가 늦게 시작하면 시간 초과로 실패하는지 확인합니다.
+
+worker.detach_log_file(logging.ERROR)
+
+START = datetime(2024, 5, 1, 9, 0, 0)
+STREAM_MODES = [
+    "stdout",
+    pytest.param("fifo", marks=pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="FIFO is POSIX only")),
+]
+
+
+def heating(minutes):
+    return f"{START + timedelta(minutes=minutes):%Y-%m-%d %H:%M:%S} The FIB source is heating"
+
+
+def working(minutes):
+    return f"{START + timedelta(minutes=minutes):%Y-%m-%d %H:%M:%S} The FIB source is working properly."
+
+
+def make_settings(tmp_path, lines, mode="file", timeout=10):
+    source = tmp_path / "source.log"
+    source.write_text("".join(line + "\n" for line in lines))
+    return {
+        "converter_exe_name": "fake_g4_converter.py",
+        "log_file_path": str(source),
+        "converted_log_file_path": str(tmp_path / "converted.txt"),
+        "converter_output": mode,
+        "converter_timeout_seconds": timeout,
+    }
+
+
+def run_file_mode(settings):
+    window, cache = SlidingWindowCounter(), ConversionCache()
+    assert worker.convert_log(settings, cache)
+    return worker.analyze_converted_log(settings["converted_log_file_path"], START, window, cache), window
+
+
+def run_stream_mode(settings):
+    window, cache = SlidingWindowCounter(), ConversionCache()
+    conversions = []
+    result = worker.stream_converted_log(settings, START, window, cache, on_start=conversions.append)
+    return result, window, conversions[0] if conversions else None
+
+
+@pytest.mark.parametrize("mode", STREAM_MODES)
+def test_stream_matches_file_mode(tmp_path, mode):
+    lines = [heating(-5), heating(1), "unrelated line", heating(2), heating(2), heating(7)]
+    expected, file_window = run_file_mode(make_settings(tmp_path, lines))
+    result, window, conversion = run_stream_mode(make_settings(tmp_path, lines, mode))
+    assert result == expected == (4, False)
+    assert list(window.events) == list(file_window.events)
+    assert conversion.succeeded and not conversion.stopped_early
+
+
+@pytest.mark.parametrize("mode", STREAM_MODES)
+def test_stream_stops_early_on_reset(tmp_path, mode, monkeypatch):
+    # 리셋 뒤에 줄이 많이 남아 있어도 끝까지 읽지 않고 변환기를 멈춰야 합니다.
+    monkeypatch.setenv("FAKE_G4_LINE_DELAY", "0.01")
+    lines = [heating(1), working(2)] + [heating(3)] * 500
+    expected, _ = run_file_mode(make_settings(tmp_path, [heating(1), working(2)]))
+    started = time.monotonic()
+    result, window, conversion = run_stream_mode(make_settings(tmp_path, lines, mode))
+    assert result == expected == (0, True)
+    assert conversion.stopped_early and conversion.succeeded
+    assert time.monotonic() - started < 3
+
+
+@pytest.mark.parametrize("mode", STREAM_MODES)
+def test_stream_times_out_on_slow_start(tmp_path, mode, monkeypatch):
+    monkeypatch.setenv("FAKE_G4_START_DELAY", "10")
+    started = time.monotonic()
+    result, window, conversion = run_stream_mode(make_settings(tmp_path, [heating(1)], mode, timeout=1))
+    assert result is None
+    assert conversion.timed_out and not conversion.succeeded
+    assert time.monotonic() - started < 5
@@ -0,0 +1,47 @@
+import os
+import time
+import tempfile
+
+import pytest
+
+from file_watch import FileWatcher, PollingBackend, measure_latency
+
+# file_watch.measure_latency (python file_watch.py 데모와 같은 함수) 로
+# 기본 설정(poll_interval, debounce)에서 파일에 한 줄을 덧붙인 뒤 wait() 가 돌아오기까지 걸린 시간을 잽니다.
+
+MAX_LATENCY_SECONDS = 1.5
+
+
+def has_native_backend():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "monitor.csv")
+        open(path, "w").close()
+        watcher = FileWatcher([path], backend="auto")
+        try:
+            return not isinstance(watcher.backend, PollingBackend)
+        finally:
+            watcher.close()
+
+
+@pytest.mark.parametrize("backend", ["auto", "poll"])
+def test_wake_latency_with_default_settings(backend):
+    if backend == "auto" and not has_native_backend():
+        pytest.skip("no native file watching on this platform")
+    latencies = measure_latency(backend)
+    assert None not in latencies, latencies
+    assert max(latencies) < MAX_LATENCY_SECONDS, latencies
+
+
+def test_wait_times_out_without_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "monitor.csv")
+        with open(path, "w") as f:
+            f.write("start\n")
+        watcher = FileWatcher([path])
+        try:
+            watcher.wait(0.1)
+            started = time.monotonic()
+            assert watcher.wait(0.5) == set()
+            assert time.monotonic() - started >= 0.45
+        finally:
+            watcher.close()
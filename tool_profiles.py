@@ -0,0 +1,57 @@
+import os
+import logging
+import contextvars
+
+# settings.json 하나로 여러 장비(tool)를 감시하기 위한 설정 처리 도구입니다.
+#
+# 예전 형식 (장비 1대) 은 그대로 동작합니다:
+#   {"monitoring_log_file_path": "...", "log_file_path": "...", ...}
+#
+# 여러 대를 감시할 때는 "tools" 목록을 씁니다. 각 항목에 없는 값은 바깥(공통) 값을 따릅니다:
+#   {"threshold": 3, "interval_minutes": 60,
+#    "tools": [{"name": "FIB-01", "monitoring_log_file_path": "...", "log_file_path": "...",
+#               "converted_log_file_path": "...", "threshold": 4}, ...]}
+
+DEFAULT_TOOL_NAME = "default"
+
+# 지금 실행 중인 코드가 어느 장비의 작업인지 (로그에 장비 이름을 붙이는 데 사용)
+current_tool = contextvars.ContextVar("current_tool", default=None)
+
+
+class ToolLogFilter(logging.Filter):
+    def filter(self, record):
+        tool = current_tool.get()
+        record.tool_prefix = f"[{tool}] " if tool else ""
+        return True
+
+
+def load_tool_profiles(settings):
+    """Return one settings dict per tool, with shared top-level values filled in."""
+    tools = settings.get("tools")
+    if not tools:
+        return [dict(settings, name=settings.get("name", DEFAULT_TOOL_NAME))]
+
+    base = {key: value for key, value in settings.items() if key != "tools"}
+    profiles = []
+    for index, tool in enumerate(tools, start=1):
+        profile = dict(base)
+        profile.update(tool)
+        profile.setdefault("name", f"tool{index}")
+        profiles.append(profile)
+    return profiles
+
+
+def find_path_conflicts(profiles):
+    """Return (name, other_name, path) for tools that would write the same converted TXT."""
+    seen = {}
+    conflicts = []
+    for profile in profiles:
+        path = profile.get("converted_log_file_path")
+        if not path or profile.get("converter_output", "file") != "file":
+            continue
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            conflicts.append((profile["name"], seen[key], path))
+        else:
+            seen[key] = profile["name"]
+    return conflicts
@@ -0,0 +1,248 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from tool_profiles import DEFAULT_TOOL_NAME, current_tool
+from latency import LatencyHistogram, LATENCY_STAGES, format_summary
+
+# 워커 내부 수치(단계별 소요 시간, 트리거/리셋/경보/변환 실패 횟수, 읽은 바이트 수)를 모아서
+# Prometheus 텍스트 형식으로 내보냅니다.
+#  - textfile : node_exporter textfile collector 가 읽을 수 있도록 .prom 파일을 주기적으로 덮어씀
+#  - HTTP     : metrics_port 를 지정하면 127.0.0.1:<port>/metrics 로도 제공
+# 장비(tool) 라벨은 현재 작업의 current_tool 값을 씁니다.
+# 이벤트별 감지 지연(latency.py)은 히스토그램으로 내보내고, 최근 값의 p50/p90/p99 요약은 로그에도 남깁니다.
+
+PREFIX = "heating_worker"
+
+COUNTERS = {
+    "triggers": "'Heating Steadfast ON' triggers that started LOG mode.",
+    "repeat_triggers": "'Heating Steadfast ON' triggers counted while already in LOG mode.",
+    "resets": "LOG mode sessions ended by a 'working properly' line.",
+    "alerts": "Alerts dispatched.",
+    "converter_runs": "Converter launches.",
+    "converter_skipped": "Conversions skipped because the source log was unchanged.",
+    "converter_failures": "Converter runs that failed, timed out or were cancelled.",
+    "csv_bytes_read": "Bytes read from the monitoring CSV.",
+}
+
+GAUGES = {
+    "source_log_bytes": "Size of the raw tool log at the last conversion.",
+    "converted_log_bytes": "Size of the converted log at the last analysis.",
+    "startup_seconds": "Seconds from worker start to the first CSV poll.",
+}
+
+# stage 라벨: csv_read, convert, parse, cycle
+STAGE_SECONDS = "stage_seconds"
+
+
+class WorkerMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        # (stage, tool) -> [count, sum, max, last]
+        self.timings = {}
+        # (stage, tool) -> LatencyHistogram
+        self.latencies = {}
+        self.started_at = time.time()
+
+    @staticmethod
+    def _tool(tool):
+        return tool or current_tool.get() or DEFAULT_TOOL_NAME
+
+    def inc(self, name, amount=1, tool=None):
+        key = (name, self._tool(tool))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, tool=None):
+        with self._lock:
+            self.gauges[(name, self._tool(tool))] = value
+
+    def observe(self, stage, seconds, tool=None):
+        key = (stage, self._tool(tool))
+        with self._lock:
+            entry = self.timings.setdefault(key, [0, 0.0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] = seconds
+
+    def observe_latency(self, stage, seconds, tool=None):
+        key = (stage, self._tool(tool))
+        with self._lock:
+            histogram = self.latencies.get(key)
+            if histogram is None:
+                histogram = self.latencies[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def latency_summary(self):
+        """Return {(stage, tool): {"count", "p50", "p90", "p99", "max"}} over recent samples."""
+        with self._lock:
+            return {key: histogram.summary() for key, histogram in self.latencies.items()}
+
+    @contextmanager
+    def timer(self, stage, tool=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, tool)
+
+    def value(self, name, tool=None):
+        return self.counters.get((name, self._tool(tool)), 0)
+
+    def stage_timings(self, tool=None):
+        """Return {stage: {"last", "max", "count"}} for one tool (used by the control channel)."""
+        tool = self._tool(tool)
+        with self._lock:
+            return {stage: {"last": round(entry[3], 6), "max": round(entry[2], 6), "count": entry[0]}
+                    for (stage, key), entry in self.timings.items() if key == tool}
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            timings = {key: list(entry) for key, entry in self.timings.items()}
+            latencies = {key: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count,
+                               histogram.summary())
+                         for key, histogram in self.latencies.items()}
+
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (key, tool), value in sorted(counters.items()):
+                if key == name:
+                    lines.append(f'{metric}{{tool="{_escape(tool)}"}} {value}')
+
+        for name, help_text in GAUGES.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for (key, tool), value in sorted(gauges.items()):
+                if key == name:
+                    lines.append(f'{metric}{{tool="{_escape(tool)}"}} {value}')
+
+        metric = f"{PREFIX}_{STAGE_SECONDS}"
+        lines.append(f"# HELP {metric} Time spent per stage (csv_read, convert, parse, cycle).")
+        lines.append(f"# TYPE {metric} summary")
+        for (stage, tool), (count, total, _, _) in sorted(timings.items()):
+            labels = f'{{tool="{_escape(tool)}",stage="{stage}"}}'
+            lines.append(f"{metric}_sum{labels} {total:.6f}")
+            lines.append(f"{metric}_count{labels} {count}")
+        for suffix, index in (("max", 2), ("last", 3)):
+            lines.append(f"# TYPE {metric}_{suffix} gauge")
+            for (stage, tool), entry in sorted(timings.items()):
+                lines.append(f'{metric}_{suffix}{{tool="{_escape(tool)}",stage="{stage}"}} {entry[index]:.6f}')
+
+        metric = f"{PREFIX}_event_latency_seconds"
+        lines.append(f"# HELP {metric} Detection latency per event ({', '.join(LATENCY_STAGES)}).")
+        lines.append(f"# TYPE {metric} histogram")
+        for (stage, tool), (buckets, counts, total, count, _) in sorted(latencies.items()):
+            labels = f'tool="{_escape(tool)}",stage="{stage}"'
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {total:.3f}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+        lines.append(f"# TYPE {metric}_recent gauge")
+        for (stage, tool), (_, _, _, _, summary) in sorted(latencies.items()):
+            for quantile in ("p50", "p90", "p99"):
+                if summary["count"]:
+                    lines.append(f'{metric}_recent{{tool="{_escape(tool)}",stage="{stage}",'
+                                 f'quantile="0.{quantile[1:]}"}} {summary[quantile]:.3f}')
+
+        lines.append(f"# TYPE {PREFIX}_start_time_seconds gauge")
+        lines.append(f"{PREFIX}_start_time_seconds {self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        # textfile collector 가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 바꿔치기합니다.
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class MetricsExporter:
+    """Background thread that rewrites the textfile every `interval` seconds and,
+    when `port` is set, serves /metrics on 127.0.0.1."""
+
+    def __init__(self, metrics, textfile_path=None, port=None, interval=15.0, summary_interval=3600.0):
+        self.metrics = metrics
+        self.textfile_path = textfile_path
+        self.interval = interval
+        self.summary_interval = summary_interval
+        self.last_summary = time.monotonic()
+        self.server = None
+        self._stop = threading.Event()
+
+        if port:
+            # http.server 는 metrics_port 를 쓸 때만 로드합니다 (워커 시작 시간 단축).
+            from http.server import ThreadingHTTPServer
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="MetricsHTTP", daemon=True).start()
+            logging.info(f"[METRICS] Serving metrics at http://127.0.0.1:{self.server.server_address[1]}/metrics")
+        self._thread = threading.Thread(target=self._run, name="MetricsExporter", daemon=True)
+        self._thread.start()
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"[METRICS] {self.address_string()} {format % args}")
+
+        return Handler
+
+    def write(self):
+        if not self.textfile_path:
+            return
+        try:
+            self.metrics.write_textfile(self.textfile_path)
+        except OSError as e:
+            logging.error(f"[METRICS] Failed to write metrics textfile: {e}")
+
+    def log_summary(self):
+        for line in format_summary(self.metrics.latency_summary()):
+            logging.info(f"[LATENCY] {line}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+            if self.summary_interval and time.monotonic() - self.last_summary >= self.summary_interval:
+                self.last_summary = time.monotonic()
+                self.log_summary()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(self.interval + 1)
+        self.write()
+        self.log_summary()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()